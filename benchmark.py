@@ -0,0 +1,117 @@
+"""
+Mesures de performance des moteurs sur les structures du catalogue et sur clock.rle, écrites au format JSON.
+
+Chaque cas (structure, moteur, niveau de compression temporelle) est simulé dans un processus neuf :
+la table des nodes part vide et le pic de mémoire résidente est celui du cas seul.
+Pour chaque cas sont mesurés les générations par seconde, les cellules calculées par seconde (moteur à ensemble),
+le pic de mémoire, le nombre de nodes de known_nodes et la part des appels à Node.evolve servis par le cache des résultats (Hashlife).
+Ces appels sont comptés par les compteurs de hashlife (enableStats) lors d'une seconde simulation du cas, dans un autre processus neuf :
+les compteurs ralentissent Node.evolve, les durées mesurées n'en dépendent pas.
+
+Exemples :
+python benchmark.py --output mesures.json
+python benchmark.py --engines hashlife --levels 0 2 4 6 --generations 1024
+python benchmark.py --files clock.rle autre.mc --file-generations 64
+"""
+
+# Importation des librairies
+
+from multiprocessing import get_context
+from platform import platform, python_version
+from sys import stderr
+from time import perf_counter, strftime
+import json
+import hashlife
+from catalog import loadCatalog
+from engine import HashlifeEngine, SetEngine, createEngine, getPeakMemory, loadRLE
+
+ENGINE_NAMES = (SetEngine.name, HashlifeEngine.name)  # Moteurs de main.py et de main_hashlife.py
+
+
+def runCase(pattern, engine_name, level, generations, count_calls=False):  # Simule un cas dans le processus actuel et retourne ses mesures
+    # count_calls : compte les appels à Node.evolve servis ou non par le cache des résultats (durées faussées par les compteurs)
+    options = {} if engine_name == SetEngine.name else {"temporal_compression_level": level}
+    if count_calls:
+        hashlife.enableStats()
+    if isinstance(pattern, int):
+        engine = createEngine(engine_name, loadCatalog()[pattern], **options)
+    else:
+        engine = loadRLE(engine_name, pattern, **options)
+    steps = 0
+    start = perf_counter()
+    while engine.generation < generations:  # Hashlife peut dépasser generations de moins d'une étape
+        engine.step()
+        steps += 1
+    seconds = perf_counter() - start
+    measures = {
+        "pattern": f"catalog[{pattern}]" if isinstance(pattern, int) else pattern,
+        "engine": engine_name,
+        "level": None if engine_name == SetEngine.name else level,
+        "generations": engine.generation,
+        "steps": steps,
+        "seconds": seconds,
+        "generations_per_second": engine.generation / max(seconds, 1e-9),
+        "cell_updates_per_second": engine.cell_updates / max(seconds, 1e-9) if engine.cell_updates else None,
+        "population": engine.population(),
+        "peak_memory": getPeakMemory(),
+        "nodes": None,
+        "result_cache_hits": None,
+        "result_cache_misses": None,
+        "result_cache_hit_rate": None,
+    }
+    if engine_name == HashlifeEngine.name:
+        measures["nodes"] = len(hashlife.known_nodes)
+    if count_calls:
+        counters = hashlife.takeStats()
+        hits = sum(counters["evolve_hits"].values())
+        misses = sum(counters["evolve_misses"].values())
+        measures["result_cache_hits"] = hits
+        measures["result_cache_misses"] = misses
+        measures["result_cache_hit_rate"] = hits / (hits+misses) if hits+misses else None
+    engine.close()
+    return measures
+
+
+def runBenchmark(engines=ENGINE_NAMES, levels=(0, 4, 8), generations=256, files=("clock.rle",), file_generations=16):  # Retourne le rapport complet
+    patterns = [(index, generations) for index in range(len(loadCatalog()))] + [(file_path, file_generations) for file_path in files]
+    results = []
+    context = get_context("spawn")  # Processus neufs, sans la mémoire du processus principal
+    for pattern, pattern_generations in patterns:
+        for engine_name in engines:
+            for level in ([None] if engine_name == SetEngine.name else levels):
+                with context.Pool(1) as pool:
+                    measures = pool.apply(runCase, (pattern, engine_name, level, pattern_generations))
+                if engine_name == HashlifeEngine.name:
+                    with context.Pool(1) as pool:
+                        counted = pool.apply(runCase, (pattern, engine_name, level, pattern_generations, True))
+                    for key in ("result_cache_hits", "result_cache_misses", "result_cache_hit_rate"):
+                        measures[key] = counted[key]
+                results.append(measures)
+                print(f"{measures['pattern']} {engine_name}" + ("" if level is None else f" (niveau {level})") +
+                      f" : {measures['generations_per_second']:.1f} gen/s", file=stderr)
+    return {
+        "date": strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform(),
+        "python": python_version(),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Mesures de performance des moteurs sur le catalogue et sur des fichiers RLE, au format JSON")
+    parser.add_argument("--engines", nargs="+", choices=ENGINE_NAMES, default=ENGINE_NAMES)
+    parser.add_argument("--levels", nargs="+", type=int, default=[0, 4, 8], help="niveaux de compression temporelle du moteur hashlife")
+    parser.add_argument("--generations", type=int, default=256, help="générations simulées pour chaque structure du catalogue")
+    parser.add_argument("--files", nargs="*", default=["clock.rle"], help="fichiers RLE ou macrocell (.mc) à mesurer en plus du catalogue")
+    parser.add_argument("--file-generations", type=int, default=16, help="générations simulées pour chaque fichier")
+    parser.add_argument("--output", default=None, help="fichier JSON à écrire (sinon le rapport est affiché)")
+    args = parser.parse_args()
+
+    report = runBenchmark(args.engines, args.levels, args.generations, args.files, args.file_generations)
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
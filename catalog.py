@@ -0,0 +1,157 @@
+"""
+Catalogue binaire des structures, chargé entrée par entrée.
+
+Format du fichier catalog.bin (entiers little-endian) :
+- en-tête : b"GOLC", version (uint16), nombre d'entrées (uint32)
+- index : pour chaque entrée, x, y, largeur et hauteur du rectangle englobant (int32), population (uint32),
+  position et taille de son bloc dans le fichier (uint64, uint32)
+- blocs : cellules du rectangle englobant, 1 bit par cellule ligne par ligne, compressées avec zlib
+
+À l'ouverture, seuls l'en-tête et l'index sont lus : les cellules d'une entrée sont lues quand elle est affichée ou collée.
+L'ancien catalog.json est converti automatiquement la première fois : il reste dans le dépôt comme source de cette conversion,
+alors que catalog.bin, créé sur chaque machine, n'est pas suivi par git.
+"""
+
+# Importation des librairies
+
+from hashlib import sha1
+from json import load
+from os import path, replace
+import struct
+import zlib
+
+CATALOG_PATH = "catalog.bin"
+JSON_PATH = "catalog.json"
+MAGIC = b"GOLC"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+INDEX = struct.Struct("<iiiiIQI")
+EXPANDED_BYTES = [bytes(byte >> i & 1 for i in range(8)) for byte in range(256)]  # Octet → 8 octets valant 0 ou 1
+
+
+class CatalogEntry:  # Entrée du catalogue : rectangle englobant, population et cellules (lues seulement si besoin)
+
+    __slots__ = ('x', 'y', 'width', 'height', 'population', 'offset', 'size', 'blob', 'cells')
+
+    def __init__(self, x, y, width, height, population, offset=0, size=0, blob=None, cells=None):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.population = population
+        self.offset = offset  # Position du bloc dans le fichier (blob est None tant que le bloc n'a pas été lu)
+        self.size = size
+        self.blob = blob
+        self.cells = cells
+
+
+def encodeCells(cells):  # Retourne l'entrée correspondant à une liste de cellules [x, y]
+    if not cells:
+        return CatalogEntry(0, 0, 0, 0, 0, blob=zlib.compress(b""), cells=[])
+    x_axis, y_axis = tuple(zip(*cells))
+    x, y = min(x_axis), min(y_axis)
+    width = max(x_axis) - x + 1
+    height = max(y_axis) - y + 1
+    bits = bytearray((width*height + 7) // 8)
+    for cell_x, cell_y in cells:
+        i = (cell_y-y) * width + cell_x-x
+        bits[i >> 3] |= 1 << (i & 7)
+    population = sum(bin(byte).count("1") for byte in bits)
+    return CatalogEntry(x, y, width, height, population, blob=zlib.compress(bytes(bits)), cells=[list(cell) for cell in cells])
+
+
+def decodeCells(entry):  # Retourne la liste des cellules [x, y] d'une entrée à partir de son bloc
+    cells = []
+    bits = zlib.decompress(entry.blob)
+    for i, byte in enumerate(bits):
+        while byte:
+            low_bit = byte & -byte
+            j = 8*i + low_bit.bit_length() - 1
+            cells.append([entry.x + j % entry.width, entry.y + j // entry.width])
+            byte ^= low_bit
+    return cells
+
+
+class Catalog:  # Liste des structures du catalogue : catalog[i] retourne les cellules [x, y] de la structure i
+
+    def __init__(self, file_path=CATALOG_PATH):
+        self.file_path = file_path
+        self.entries = []
+        if path.exists(file_path):
+            with open(file_path, "rb") as f:
+                magic, version, count = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{file_path} n'est pas un catalogue de structures (version {VERSION})")
+                index = f.read(INDEX.size * count)
+            self.entries = [CatalogEntry(*fields) for fields in INDEX.iter_unpack(index)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        entry = self.entries[index]
+        if entry.cells is None:
+            entry.cells = decodeCells(self.readBlob(entry))
+        return entry.cells
+
+    def getEntry(self, index):  # Retourne l'entrée (rectangle englobant et population) sans lire ses cellules
+        return self.entries[index]
+
+    def readBlob(self, entry):  # Lit si besoin le bloc compressé d'une entrée dans le fichier et retourne l'entrée
+        if entry.blob is None:
+            with open(self.file_path, "rb") as f:
+                f.seek(entry.offset)
+                entry.blob = f.read(entry.size)
+        return entry
+
+    def getBits(self, index):  # Retourne les cellules du rectangle englobant, 1 bit par cellule ligne par ligne (bit de poids faible en premier)
+        return zlib.decompress(self.readBlob(self.entries[index]).blob)
+
+    def getPixels(self, index):  # Retourne les cellules du rectangle englobant, 1 octet (0 ou 1) par cellule ligne par ligne
+        entry = self.entries[index]
+        return b"".join(map(EXPANDED_BYTES.__getitem__, self.getBits(index)))[:entry.width*entry.height]
+
+    def getHash(self, index):  # Retourne une empreinte du contenu de la structure (indépendante de sa position)
+        entry = self.readBlob(self.entries[index])
+        return sha1(struct.pack("<ii", entry.width, entry.height) + entry.blob).hexdigest()
+
+    def append(self, cells):
+        self.entries.append(encodeCells(cells))
+
+    def pop(self, index):
+        return self.entries.pop(index)
+
+    def save(self):  # Réécrit le fichier (les blocs des entrées non modifiées sont recopiés sans être décodés)
+        blobs = [self.readBlob(entry).blob for entry in self.entries]
+        offset = HEADER.size + INDEX.size * len(self.entries)
+        temporary_path = self.file_path + ".tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.entries)))
+            for entry, blob in zip(self.entries, blobs):
+                f.write(INDEX.pack(entry.x, entry.y, entry.width, entry.height, entry.population, offset, len(blob)))
+                offset += len(blob)
+            for blob in blobs:
+                f.write(blob)
+        replace(temporary_path, self.file_path)
+        offset = HEADER.size + INDEX.size * len(self.entries)
+        for entry, blob in zip(self.entries, blobs):
+            entry.offset, entry.size = offset, len(blob)
+            offset += len(blob)
+
+
+def loadCatalog(file_path=CATALOG_PATH, json_path=JSON_PATH):  # Ouvre le catalogue, en convertissant l'ancien catalogue JSON s'il n'existe pas encore
+    catalog = Catalog(file_path)
+    if not path.exists(file_path):
+        if path.exists(json_path):
+            with open(json_path, "r") as f:
+                for cells in load(f):
+                    catalog.append(cells)
+        catalog.save()
+    return catalog
+
+
+if __name__ == "__main__":
+    catalog = loadCatalog()
+    for i in range(len(catalog)):
+        entry = catalog.getEntry(i)
+        print(f"{i} : {entry.width}x{entry.height}, {entry.population} cellules, {entry.size} octets")
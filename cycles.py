@@ -0,0 +1,267 @@
+"""
+Détection des cycles d'une simulation Hashlife (structures stables, oscillateurs, vaisseaux), utilisée par main_hashlife.py.
+
+Les nodes étant canoniques, un état déjà vu est la même racine : le retrouver est une recherche dans un dictionnaire.
+Chaque état est aussi rangé sous sa forme, la node de ses cellules vivantes recadrée sur le coin de leur rectangle englobant :
+2 états identiques à une translation près ont la même forme, ce qui reconnaît aussi les vaisseaux.
+Dès qu'un état revient, la période exacte et la génération où le cycle commence sont retrouvées avec hashlife.advance,
+et l'état de n'importe quelle génération suivante se calcule sans simuler plus d'une période (Cycle.getRoot).
+Une soupe laisse souvent des débris stables et des planeurs qui s'en éloignent : la grille ne se répète alors jamais.
+Avec remove_gliders, les planeurs qui s'échappent sont retirés des bords de la grille avant de calculer sa forme
+(chacun est un cycle de période 4 à part) et ne sont gardés dans le cycle trouvé que s'ils ne peuvent plus toucher le reste.
+Les autres vaisseaux qui s'échappent (LWSS...) empêchent toujours la grille de se répéter.
+"""
+
+# Importation des librairies
+
+from bisect import bisect_left
+from math import ceil, isqrt, log2
+import hashlife
+
+MAX_STATES = 4096  # Nombre maximal d'états retenus (les plus anciens sont oubliés)
+MAX_CACHE_SIZE = 2**18  # Nombre maximal de rectangles et de décalages de nodes gardés d'un état à l'autre
+GLIDER_REACH = 2  # Distance maximale entre 2 cellules vivantes d'un même objet
+GLIDER_MARGIN = 4  # Nombre de cellules vides au moins entre un planeur qui s'échappe et le rectangle englobant du reste
+MAX_PHASES = 1024  # Période maximale du reste de la grille pour vérifier que les planeurs retirés ne le touchent jamais
+
+
+def getShape(root, boxes=None, shifts=None):  # Retourne la forme des cellules vivantes et le coin x, y de leur rectangle englobant (None, 0, 0 si la racine est vide)
+    # boxes, shifts : caches des rectangles et des décalages de nodes, réutilisables tant que le ramasse-miettes ne passe pas
+    box = hashlife.getBoundingBox(root, boxes)
+    if box is None:
+        return None, 0, 0
+    x, y, width, height = box
+    depth = max(1, ceil(log2(max(width, height))))
+    return hashlife.extractNode(root, x, y, depth, {} if shifts is None else shifts), x, y
+
+
+def getUnionBox(box1, box2):  # Retourne le plus petit rectangle (x, y, largeur, hauteur) contenant les 2 rectangles
+    x = min(box1[0], box2[0])
+    y = min(box1[1], box2[1])
+    return x, y, max(box1[0]+box1[2], box2[0]+box2[2]) - x, max(box1[1]+box1[3], box2[1]+box2[3]) - y
+
+
+def getDivisors(n):  # Retourne les diviseurs de n dans l'ordre croissant
+    divisors = set()
+    for i in range(1, isqrt(n)+1):
+        if n % i == 0:
+            divisors.update((i, n//i))
+    return sorted(divisors)
+
+
+def getObject(root, x, y):  # Retourne les cellules vivantes reliées à la cellule x, y (None au-delà de 5 : ce n'est pas un planeur)
+    cells = {(x, y)}
+    pending = [(x, y)]
+    while pending:
+        cx, cy = pending.pop()
+        for cell in hashlife.getLivingCells(root, (cx-GLIDER_REACH, cy-GLIDER_REACH, 2*GLIDER_REACH+1, 2*GLIDER_REACH+1)):
+            if cell not in cells:
+                if len(cells) == 5:
+                    return None
+                cells.add(cell)
+                pending.append(cell)
+    return cells
+
+
+def getGlider(cells, generation):  # Retourne le cycle du planeur formé par les cellules à cette génération, None si ce n'en est pas un
+    if cells is None or len(cells) != 5:
+        return None
+    x = min(cx for cx, _ in cells)
+    y = min(cy for _, cy in cells)
+    root = hashlife.pasteNode(hashlife.getEmptyNode(4), hashlife.buildNode([(cx-x, cy-y) for cx, cy in cells]), x, y)
+    shape, x, y = getShape(root)
+    moved_shape, moved_x, moved_y = getShape(hashlife.advance(root, 4))
+    if moved_shape is not shape or abs(moved_x-x) != 1 or abs(moved_y-y) != 1:
+        return None
+    return Cycle(4, generation, moved_x-x, moved_y-y, root)
+
+
+def isEscaping(glider, box, generation):  # Vrai si le planeur est assez loin du rectangle box, du côté où il se déplace
+    if box is None:
+        return False
+    gx, gy, width, height = hashlife.getBoundingBox(glider.getRoot(generation))
+    x, y, box_width, box_height = box
+    escaping_x = gx >= x+box_width+GLIDER_MARGIN if glider.dx > 0 else gx+width+GLIDER_MARGIN <= x
+    escaping_y = gy >= y+box_height+GLIDER_MARGIN if glider.dy > 0 else gy+height+GLIDER_MARGIN <= y
+    return escaping_x and escaping_y
+
+
+def removeEscapedGliders(root, generation, boxes):  # Retourne la racine sans les planeurs qui s'échappent de ses bords, et leurs cycles
+    # Tous les planeurs des bords sont d'abord retirés (ceux des autres coins agrandissent le rectangle englobant du reste),
+    # puis ceux qui ne sont pas assez loin du reste y sont remis
+    gliders = []
+    found = True
+    while found:
+        found = False
+        box = hashlife.getBoundingBox(root, boxes)
+        if box is None:
+            break
+        x, y, width, height = box
+        for edge in ((x, y, width, 1), (x, y+height-1, width, 1), (x, y, 1, height), (x+width-1, y, 1, height)):
+            cells = getObject(root, *next(hashlife.getLivingCells(root, edge)))  # Le premier objet touchant ce bord
+            glider = getGlider(cells, generation)
+            if glider is not None:
+                for cx, cy in cells:
+                    root = hashlife.setCell(root, cx, cy, False, False)
+                gliders.append(glider)
+                found = True
+                break
+    hashlife.edit_cache.clear()
+    while gliders:
+        box = hashlife.getBoundingBox(root, boxes)
+        if box is None:  # Il ne reste que des planeurs : le premier devient le reste
+            escaping = gliders[1:]
+        else:
+            escaping = [glider for glider in gliders if isEscaping(glider, box, generation)]
+        if len(escaping) == len(gliders):
+            break
+        for glider in gliders:
+            if glider not in escaping:
+                shape, x, y = getShape(glider.root)
+                root = hashlife.pasteNode(root, shape, x, y)
+        gliders = escaping
+    return root, gliders
+
+
+class Cycle:  # L'état de la génération start revient toutes les period générations, décalé de dx, dy
+
+    def __init__(self, period, start, dx, dy, root, gliders=()):
+        self.period = period
+        self.start = start
+        self.dx = dx
+        self.dy = dy
+        self.root = root  # Racine de la génération start, sans les planeurs
+        self.gliders = gliders  # Cycles des planeurs qui s'éloignent de la racine sans plus jamais la toucher
+
+    def getRoot(self, generation):  # Retourne la racine d'une génération du cycle (>= start) en simulant moins d'une période
+        cycles, phase = divmod(generation - self.start, self.period)
+        root = hashlife.advance(self.root, phase)
+        if cycles != 0 and (self.dx or self.dy):
+            shape, x, y = getShape(root)
+            root = hashlife.pasteNode(hashlife.getEmptyNode(4), shape, x + cycles*self.dx, y + cycles*self.dy)
+        for glider in self.gliders:
+            shape, x, y = getShape(glider.getRoot(generation))
+            root = hashlife.pasteNode(root, shape, x, y)
+        return root
+
+
+class CycleDetector:  # Retient les états d'une simulation jusqu'à ce que l'un d'eux revienne
+
+    def __init__(self, max_states=MAX_STATES, remove_gliders=False):
+        self.max_states = max_states
+        self.remove_gliders = remove_gliders  # Retire les planeurs qui s'échappent avant de comparer les états
+        self.clear()
+
+    def clear(self):  # Oublie les états retenus et le cycle (à appeler quand la grille est modifiée)
+        self.generations = []  # Générations des états retenus, dans l'ordre
+        self.states = {}  # Génération → (racine, racine sans les planeurs retirés, forme, x, y, planeurs retirés)
+        self.roots = {}  # Racine → génération
+        self.shapes = {}  # Forme → génération
+        self.cycle = None
+        self.clearCaches()
+
+    def clearCaches(self):  # Vide les caches de getShape (à appeler après le ramasse-miettes : leurs nodes ne sont plus canoniques)
+        self.boxes = {}
+        self.shifts = {}
+
+    def getNodes(self):  # Génère les nodes à garder au ramasse-miettes (sinon un état retenu, recréé, serait un autre objet)
+        for root, core, shape, _, _, gliders in self.states.values():
+            yield root
+            yield core
+            if shape is not None:
+                yield shape
+            for glider in gliders:
+                yield glider.root
+        if self.cycle is not None:
+            yield self.cycle.root
+            for glider in self.cycle.gliders:
+                yield glider.root
+
+    def split(self, root, generation):  # Retourne la racine sans les planeurs qui s'échappent, et leurs cycles
+        if not self.remove_gliders:
+            return root, ()
+        return removeEscapedGliders(root, generation, self.boxes)
+
+    def record(self, root, generation):  # Retient l'état d'une génération, retourne le cycle dès qu'un état revient (None avant)
+        if self.cycle is not None:
+            return self.cycle
+        if self.generations and generation <= self.generations[-1]:  # Les états ne viennent plus de la même simulation
+            self.clear()
+        seen = self.roots.get(root)  # Même racine : rien à calculer
+        if seen is not None:
+            self.cycle = self.findCycle(seen, generation)
+            return self.cycle
+        if len(self.boxes) + len(self.shifts) > MAX_CACHE_SIZE:
+            self.clearCaches()
+        core, gliders = self.split(root, generation)
+        shape, x, y = getShape(core, self.boxes, self.shifts)
+        seen = self.shapes.get(shape)
+        # Si un planeur de plus s'est échappé (canon), le reste a la même forme mais la grille ne se répète pas
+        if seen is not None and len(self.states[seen][5]) == len(gliders):
+            self.cycle = self.findCycle(seen, generation)
+            if self.cycle is not None:
+                return self.cycle
+
+        self.generations.append(generation)
+        self.states[generation] = (root, core, shape, x, y, gliders)
+        self.roots[root] = generation
+        self.shapes[shape] = generation
+        if len(self.generations) > self.max_states:
+            old_generation = self.generations.pop(0)
+            old_root, _, old_shape, _, _, _ = self.states.pop(old_generation)
+            if self.roots.get(old_root) == old_generation:
+                del self.roots[old_root]
+            if self.shapes.get(old_shape) == old_generation:  # La forme a pu revenir depuis sans former de cycle
+                del self.shapes[old_shape]
+        return None
+
+    def findCycle(self, first, last):  # Retourne le cycle, sachant que l'état de la génération first revient à la génération last (None si les planeurs retirés peuvent toucher le reste)
+        _, root, shape, x, y, gliders = self.states[first]
+        for period in getDivisors(last - first):  # La période exacte divise l'écart
+            moved_shape, moved_x, moved_y = getShape(hashlife.advance(root, period))
+            if moved_shape is shape:
+                break
+
+        def isInCycle(node, generation):  # Retourne node sans ses planeurs s'il revient après une période (vrai aussi pour toutes les générations suivantes), None sinon
+            core, core_gliders = self.split(node, generation)
+            if len(core_gliders) != len(gliders):
+                return None
+            core_shape = getShape(core)[0]
+            return core if getShape(hashlife.advance(core, period))[0] is core_shape else None
+
+        # Début du cycle : on remonte les états retenus tant qu'ils sont dans le cycle, puis dichotomie avec le premier qui n'y est pas
+        start, start_root = first, root
+        index = bisect_left(self.generations, first)
+        while index > 0:
+            previous = self.generations[index-1]
+            _, core, core_shape, _, _, core_gliders = self.states[previous]
+            if len(core_gliders) != len(gliders) or getShape(hashlife.advance(core, period))[0] is not core_shape:
+                break
+            index -= 1
+            start, start_root = previous, core
+        if index > 0:
+            low = self.generations[index-1]
+            low_root = self.states[low][0]
+            while start - low > 1:
+                middle = (low + start) // 2
+                middle_root = hashlife.advance(low_root, middle - low)
+                core = isInCycle(middle_root, middle)
+                if core is not None:
+                    start, start_root = middle, core
+                else:
+                    low, low_root = middle, middle_root
+        dx, dy = moved_x - x, moved_y - y
+        if gliders:
+            # Les planeurs retirés doivent rester hors du rectangle couvert par le reste pendant une période, et s'en éloigner
+            if period > MAX_PHASES:
+                return None
+            box, node = None, start_root
+            for _ in range(period):
+                node_box = hashlife.getBoundingBox(node)
+                if node_box is not None:
+                    box = node_box if box is None else getUnionBox(box, node_box)
+                node = hashlife.advance(node, 1)
+            for glider in gliders:
+                if not isEscaping(glider, box, start) or (4*dx - glider.dx*period)*glider.dx > 0 or (4*dy - glider.dy*period)*glider.dy > 0:
+                    return None
+        return Cycle(period, start, dx, dy, start_root, gliders)
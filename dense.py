@@ -0,0 +1,206 @@
+"""
+Grilles denses NumPy pour le moteur à ensemble de cellules de main.py.
+
+La zone active (rectangle englobant les cellules vivantes et une marge) est stockée dans un tableau uint8 et
+les voisins sont comptés en additionnant les 8 décalages du tableau, ce qui est bien plus rapide que le dictionnaire
+de voisins quand la population est dense. La grille s'agrandit automatiquement lorsque des cellules approchent de ses bords.
+PackedGrid va plus loin en stockant 64 cellules par mot uint64 et en calculant la génération suivante avec
+des additionneurs bit à bit (SWAR). Les coordonnées sont (y, x), comme dans living_cells.
+"""
+
+# Importation des librairies
+
+import numpy as np
+
+DENSITY_THRESHOLD = 0.01  # Densité (cellules vivantes / aire du rectangle englobant) à partir de laquelle la grille dense est utilisée
+MIN_POPULATION = 256  # En dessous, le dictionnaire de voisins reste plus rapide quelle que soit la densité
+BIT_COUNTS = np.array([bin(byte).count("1") for byte in range(256)], np.uint8)  # Nombre de bits à 1 de chaque octet (NumPy < 2.0)
+
+
+def getBoundingBox(living_cells):  # Retourne (y_min, x_min, y_max, x_max) d'un ensemble de cellules (y, x)
+    y_axis, x_axis = tuple(zip(*living_cells))
+    return min(y_axis), min(x_axis), max(y_axis), max(x_axis)
+
+
+def getDensity(living_cells):  # Retourne la proportion de cellules vivantes dans le rectangle englobant
+    if not living_cells:
+        return 0
+    y_min, x_min, y_max, x_max = getBoundingBox(living_cells)
+    return len(living_cells) / ((y_max-y_min+1) * (x_max-x_min+1))
+
+
+def isDense(living_cells):  # Retourne True si la grille dense est plus avantageuse que le dictionnaire de voisins
+    return len(living_cells) >= MIN_POPULATION and getDensity(living_cells) >= DENSITY_THRESHOLD
+
+
+class DenseGrid:  # Tableau de cellules couvrant la zone active, dont la cellule [0, 0] a pour coordonnées (self.y, self.x)
+
+    MARGIN = 16  # Nombre de lignes / colonnes ajoutées quand la grille doit s'agrandir
+
+    def __init__(self, living_cells):
+        y_axis = np.fromiter((y for y, _ in living_cells), np.int64, len(living_cells))
+        x_axis = np.fromiter((x for _, x in living_cells), np.int64, len(living_cells))
+        if len(living_cells):
+            self.y = int(y_axis.min()) - self.MARGIN
+            self.x = int(x_axis.min()) - self.MARGIN
+            height = int(y_axis.max()) - self.y + 1 + self.MARGIN
+            width = int(x_axis.max()) - self.x + 1 + self.MARGIN
+        else:
+            self.y = self.x = -self.MARGIN
+            height = width = 2 * self.MARGIN
+        self.grid = np.zeros((height, width), np.uint8)
+        self.grid[y_axis-self.y, x_axis-self.x] = 1
+
+    def step(self):  # Simule une génération
+        self.fitBounds()
+        grid = self.grid
+        # Somme des 8 voisins de chaque cellule intérieure (les 2 lignes / colonnes du bord sont vides)
+        n = grid[:-2, :-2] + grid[:-2, 1:-1]
+        n += grid[:-2, 2:]
+        n += grid[1:-1, :-2]
+        n += grid[1:-1, 2:]
+        n += grid[2:, :-2]
+        n += grid[2:, 1:-1]
+        n += grid[2:, 2:]
+        center = grid[1:-1, 1:-1]
+        center[...] = (n == 3) | ((n == 2) & (center == 1))
+
+    def fitBounds(self):  # Agrandit la grille pour que ses 2 lignes / colonnes de bord restent vides
+        grid = self.grid
+        top = self.MARGIN if grid[:2].any() else 0
+        bottom = self.MARGIN if grid[-2:].any() else 0
+        left = self.MARGIN if grid[:, :2].any() else 0
+        right = self.MARGIN if grid[:, -2:].any() else 0
+        if top or bottom or left or right:
+            self.grid = np.pad(grid, ((top, bottom), (left, right)))
+            self.y -= top
+            self.x -= left
+
+    def crop(self):  # Réduit la grille au rectangle englobant des cellules vivantes et à sa marge
+        rows = np.flatnonzero(self.grid.any(axis=1))
+        if not len(rows):
+            return
+        columns = np.flatnonzero(self.grid.any(axis=0))
+        y_min = max(0, rows[0] - self.MARGIN)
+        x_min = max(0, columns[0] - self.MARGIN)
+        self.grid = self.grid[y_min:rows[-1]+self.MARGIN+1, x_min:columns[-1]+self.MARGIN+1].copy()
+        self.y += int(y_min)
+        self.x += int(x_min)
+
+    def population(self):  # Retourne le nombre de cellules vivantes
+        return int(np.count_nonzero(self.grid))
+
+    def getArea(self):  # Retourne le nombre de cellules calculées à chaque génération
+        return self.grid.size
+
+    def getDensity(self):  # Retourne la proportion de cellules vivantes dans le rectangle englobant
+        rows = np.flatnonzero(self.grid.any(axis=1))
+        if not len(rows):
+            return 0
+        columns = np.flatnonzero(self.grid.any(axis=0))
+        return self.population() / ((rows[-1]-rows[0]+1) * (columns[-1]-columns[0]+1))
+
+    def getCoordinates(self):  # Retourne les tableaux des coordonnées y et x des cellules vivantes
+        y_axis, x_axis = np.nonzero(self.grid)
+        return y_axis+self.y, x_axis+self.x
+
+    def toCells(self, living_cells):  # Remplace le contenu de living_cells par les cellules vivantes de la grille
+        y_axis, x_axis = self.getCoordinates()
+        living_cells.clear()
+        living_cells.update(zip(y_axis.tolist(), x_axis.tolist()))
+
+
+class PackedGrid:  # Grille compressée : 64 cellules par mot uint64, la cellule x de la ligne est le bit x % 64 du mot x // 64
+
+    MARGIN = 16  # Nombre de lignes ajoutées quand la grille doit s'agrandir verticalement
+    MARGIN_WORDS = 1  # Nombre de mots (de 64 cellules) ajoutés quand la grille doit s'agrandir horizontalement
+
+    def __init__(self, living_cells):
+        y_axis = np.fromiter((y for y, _ in living_cells), np.int64, len(living_cells))
+        x_axis = np.fromiter((x for _, x in living_cells), np.int64, len(living_cells))
+        if len(living_cells):
+            self.y = int(y_axis.min()) - self.MARGIN
+            self.x = int(x_axis.min()) - 64*self.MARGIN_WORDS
+            height = int(y_axis.max()) - self.y + 1 + self.MARGIN
+            words = (int(x_axis.max()) - self.x) // 64 + 1 + self.MARGIN_WORDS
+        else:
+            self.y = -self.MARGIN
+            self.x = -64*self.MARGIN_WORDS
+            height = 2 * self.MARGIN
+            words = 2 * self.MARGIN_WORDS
+        cells = np.zeros((height, words*64), np.uint8)
+        cells[y_axis-self.y, x_axis-self.x] = 1
+        self.grid = np.packbits(cells, axis=1, bitorder="little").view("<u8")
+
+    def step(self):  # Simule une génération avec des additionneurs bit à bit (SWAR) sur 64 cellules à la fois
+        self.fitBounds()
+        grid = self.grid
+        # Voisins de gauche et de droite alignés sur chaque cellule, en propageant le bit qui passe d'un mot à l'autre
+        left = grid << np.uint64(1)
+        left[:, 1:] |= grid[:, :-1] >> np.uint64(63)
+        right = grid >> np.uint64(1)
+        right[:, :-1] |= grid[:, 1:] << np.uint64(63)
+        # Somme horizontale gauche + cellule + droite sur 2 bits (h1 h0)
+        h0 = left ^ grid ^ right
+        h1 = (left & grid) | (right & (left ^ grid))
+        # Somme verticale des 3 lignes sur 4 bits (s3 s2 s1 s0), cellule elle-même comprise
+        up0, mid0, down0 = h0[:-2], h0[1:-1], h0[2:]
+        up1, mid1, down1 = h1[:-2], h1[1:-1], h1[2:]
+        s0 = up0 ^ mid0 ^ down0
+        carry = (up0 & mid0) | (down0 & (up0 ^ mid0))
+        t = up1 ^ mid1 ^ down1
+        c1 = (up1 & mid1) | (down1 & (up1 ^ mid1))
+        s1 = t ^ carry
+        c2 = t & carry
+        s2 = c1 ^ c2
+        s3 = c1 & c2
+        # Vivante si la somme vaut 3, ou 4 en comptant la cellule vivante elle-même
+        center = grid[1:-1]
+        center[...] = ~s3 & ((s0 & s1 & ~s2) | (center & ~s0 & ~s1 & s2))
+
+    def fitBounds(self):  # Agrandit la grille pour que ses 2 lignes du bord et ses mots du bord restent vides
+        grid = self.grid
+        top = self.MARGIN if grid[:2].any() else 0
+        bottom = self.MARGIN if grid[-2:].any() else 0
+        left = self.MARGIN_WORDS if grid[:, 0].any() else 0
+        right = self.MARGIN_WORDS if grid[:, -1].any() else 0
+        if top or bottom or left or right:
+            self.grid = np.pad(grid, ((top, bottom), (left, right)))
+            self.y -= top
+            self.x -= 64*left
+
+    def crop(self):  # Réduit la grille au rectangle englobant des cellules vivantes et à sa marge
+        rows = np.flatnonzero(self.grid.any(axis=1))
+        if not len(rows):
+            return
+        words = np.flatnonzero(self.grid.any(axis=0))
+        y_min = max(0, rows[0] - self.MARGIN)
+        w_min = max(0, words[0] - self.MARGIN_WORDS)
+        self.grid = self.grid[y_min:rows[-1]+self.MARGIN+1, w_min:words[-1]+self.MARGIN_WORDS+1].copy()
+        self.y += int(y_min)
+        self.x += 64*int(w_min)
+
+    def population(self):  # Retourne le nombre de cellules vivantes
+        if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+            return int(np.bitwise_count(self.grid).sum())
+        return int(BIT_COUNTS[self.grid.view(np.uint8)].sum(dtype=np.int64))
+
+    def getArea(self):  # Retourne le nombre de cellules calculées à chaque génération
+        return self.grid.size * 64
+
+    def getDensity(self):  # Retourne la proportion de cellules vivantes dans le rectangle englobant (arrondi aux mots)
+        rows = np.flatnonzero(self.grid.any(axis=1))
+        if not len(rows):
+            return 0
+        words = np.flatnonzero(self.grid.any(axis=0))
+        return self.population() / ((rows[-1]-rows[0]+1) * (words[-1]-words[0]+1) * 64)
+
+    def getCoordinates(self):  # Retourne les tableaux des coordonnées y et x des cellules vivantes
+        cells = np.unpackbits(self.grid.view(np.uint8), axis=1, bitorder="little")
+        y_axis, x_axis = np.nonzero(cells)
+        return y_axis+self.y, x_axis+self.x
+
+    def toCells(self, living_cells):  # Remplace le contenu de living_cells par les cellules vivantes de la grille
+        y_axis, x_axis = self.getCoordinates()
+        living_cells.clear()
+        living_cells.update(zip(y_axis.tolist(), x_axis.tolist()))
@@ -0,0 +1,514 @@
+"""
+Moteurs de simulation du jeu de la vie de Conway, utilisables sans pygame ni écran.
+
+Tous les moteurs partagent la même interface (class Engine) :
+- step(n) avance de n étapes et retourne le nombre de générations parcourues
+- advance(generations) avance d'exactement ce nombre de générations (en O(log generations) étapes pour Hashlife)
+- population() retourne le nombre de cellules vivantes
+- cellsIn(rect) génère les coordonnées x, y des cellules vivantes dans le rectangle (x, y, largeur, hauteur)
+Chaque moteur compte aussi ses générations (generation) et les cellules dont il a calculé l'état (cell_updates).
+Le moteur à ensemble n'examine que les cellules voisines d'un changement de la génération précédente, et refait sans les examiner
+les changements des tuiles de 8x8 cellules revenues à leur état d'il y a 2 générations (structures stables et oscillateurs de période 2).
+
+Exemple pour chronométrer uniquement la simulation, sans affichage :
+python engine.py clock.rle --engine hashlife --steps 100 --level 4
+Le moteur compact (nodestore.py) fait le même calcul avec des nodes stockées dans des tableaux typés :
+python engine.py clock.rle --engine compact --steps 100 --level 4
+Pour mesurer les moteurs sur tout le catalogue et clock.rle (rapport JSON) : python benchmark.py --output mesures.json
+"""
+
+# Importation des librairies
+
+from collections import defaultdict
+from sys import platform
+from time import perf_counter
+from weakref import WeakSet
+import hashlife
+from nodestore import NodeStore
+from hashlife_parallel import ParallelEvolver
+
+try:
+    import dense
+    import tiled
+except ImportError:  # NumPy n'est pas installé : le moteur à ensemble n'utilise jamais la grille dense
+    dense = tiled = None
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:  # Windows : le pic de mémoire n'est pas mesuré
+    getrusage = None
+
+NEIGHBORS = ((-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1))
+NEIGHBORS_AND_SELF = NEIGHBORS + ((0, 0),)
+TILE_SHIFT = 3  # Les changements d'état sont suivis par tuiles de 8x8 cellules
+ACTIVITY_COST = 12  # Coût d'un changement suivi, comparé à l'examen d'une cellule lors d'un balayage complet
+
+
+# Définition des fonctions du moteur à ensemble de cellules (utilisées par main.py)
+
+def countNeighbors(living_cells, neighbors):  # Recompte le nombre de voisins de chaque cellule en possèdant au moins 1
+    neighbors.clear()
+    for y, x in living_cells:
+        for dx, dy in NEIGHBORS:
+            neighbors[y+dy, x+dx] += 1
+
+
+def groupByTile(cells):  # Range des cellules (y, x) par tuile de 2^TILE_SHIFT x 2^TILE_SHIFT cellules
+    tiles = defaultdict(set)
+    for y, x in cells:
+        tiles[y >> TILE_SHIFT, x >> TILE_SHIFT].add((y, x))
+    return tiles
+
+
+def stepCells(living_cells, neighbors, changes=None, last_changes=None):  # Simule une génération en modifiant living_cells et neighbors
+    # changes, last_changes : cellules qui ont changé d'état aux 2 dernières générations, par tuile (None si elles sont inconnues)
+    # Retourne la liste des cellules qui ont changé d'état et le nombre de cellules examinées
+    to_kill = []
+    to_birth = []
+
+    if changes is None:  # Changements inconnus ou trop nombreux : toutes les cellules sont examinées
+        for cell in living_cells:  # On retient les cellules vivantes n'ayant pas un nombre de voisins entre 2 et 3
+            if not 1 < neighbors.get(cell, 0) < 4:
+                to_kill.append(cell)
+        for cell, n in neighbors.items():  # On retient les cellules mortes qui possèdent 3 voisins
+            if n == 3 and cell not in living_cells:
+                to_birth.append(cell)
+        examined = len(living_cells) + len(neighbors)
+
+    else:
+        # Tuiles figées (hors de unstable) : si aucune tuile autour n'a changé autrement qu'à la génération précédente, la tuile est
+        # revenue à son état d'il y a 2 générations et refait les mêmes changements (cellules stables et oscillateurs de période 2)
+        unstable = None
+        if last_changes is not None:
+            different = [tile for tile, cells in changes.items() if last_changes.get(tile) != cells]
+            different += [tile for tile in last_changes if tile not in changes]
+            unstable = {(ty+dy, tx+dx) for ty, tx in different for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+            for tile, cells in changes.items():
+                if tile not in unstable:
+                    for cell in cells:
+                        (to_kill if cell in living_cells else to_birth).append(cell)
+
+        # Ailleurs, seules les cellules voisines d'un changement peuvent changer d'état
+        # (les changements d'une tuile figée entourée de tuiles figées ne touchent aucune cellule à examiner)
+        candidates = {(y+dy, x+dx) for (ty, tx), cells in changes.items()
+                      if unstable is None or any((ty+dy, tx+dx) in unstable for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+                      for y, x in cells for dx, dy in NEIGHBORS_AND_SELF}
+        if unstable is not None:
+            candidates = [(y, x) for y, x in candidates if (y >> TILE_SHIFT, x >> TILE_SHIFT) in unstable]
+
+        get = neighbors.get
+        for cell in candidates:  # Les cellules vivantes n'ayant pas entre 2 et 3 voisins meurent, les cellules mortes qui en ont 3 naissent
+            n = get(cell, 0)
+            if cell in living_cells:
+                if not 1 < n < 4:
+                    to_kill.append(cell)
+            elif n == 3:
+                to_birth.append(cell)
+        examined = len(candidates) + len(to_birth) + len(to_kill)
+
+    for y, x in to_birth:  # On fait naitre les cellules
+        living_cells.add((y, x))
+        for dx, dy in NEIGHBORS:
+            neighbors[y+dy, x+dx] += 1
+
+    for y, x in to_kill:  # On tue les cellules
+        living_cells.discard((y, x))
+        for dx, dy in NEIGHBORS:
+            count = neighbors[y+dy, x+dx] - 1
+            if count:
+                neighbors[y+dy, x+dx] = count
+            else:
+                del neighbors[y+dy, x+dx]
+
+    return to_birth + to_kill, examined
+
+
+# Définition des moteurs
+
+class Engine:  # Interface commune à tous les moteurs de simulation
+
+    name = None
+
+    def __init__(self):
+        self.generation = 0
+        self.cell_updates = 0  # Nombre de cellules dont l'état a été calculé, pour comparer les moteurs entre eux
+
+    def step(self, n=1):  # Avance de n étapes et retourne le nombre de générations parcourues
+        raise NotImplementedError
+
+    def advance(self, generations):  # Avance d'exactement generations générations
+        raise NotImplementedError
+
+    def population(self):  # Retourne le nombre de cellules vivantes
+        raise NotImplementedError
+
+    def cellsIn(self, rect):  # Génère les coordonnées x, y des cellules vivantes dans le rectangle (x, y, largeur, hauteur)
+        raise NotImplementedError
+
+    def close(self):  # Libère les ressources du moteur (processus, mémoire partagée)
+        pass
+
+
+class SetEngine(Engine):  # Moteur de main.py : ensemble des cellules vivantes et dictionnaire du nombre de voisins
+
+    name = "set"
+    DENSITY_CHECK_PERIOD = 32  # Nombre de générations entre 2 vérifications de la densité
+
+    def __init__(self, cells=(), auto_dense=True):
+        super().__init__()
+        self.living_cells = set((y, x) for x, y in cells)  # Coordonnées (y, x) comme dans main.py
+        self.neighbors = defaultdict(int)
+        self.auto_dense = auto_dense and dense is not None
+        self.dense_grid = None  # Grille NumPy utilisée à la place de living_cells et neighbors quand la population est dense
+        self.cells_outdated = False  # True si living_cells n'a pas encore reçu les dernières générations de la grille dense
+        self.grid_outdated = False  # True si living_cells a été modifié depuis la création de la grille dense
+        self.recorded = None  # Cellules qui ont changé d'état depuis startRecording() (None : pas d'enregistrement en cours)
+        self.recording_start = None  # Cellules vivantes au début de l'enregistrement, gardées seulement si la grille dense est utilisée
+        self.reset()
+
+    def reset(self):  # À appeler après avoir remplacé living_cells depuis l'extérieur (recompte tous les voisins)
+        self.dense_grid = None
+        self.cells_outdated = False
+        self.next_density_check = self.generation
+        self.recountNeighbors()
+
+    def recountNeighbors(self):  # Recompte les voisins ; les derniers changements deviennent inconnus
+        countNeighbors(self.living_cells, self.neighbors)
+        self.changes = None  # Cellules qui ont changé d'état à la dernière génération, par tuile
+        self.last_changes = None  # À l'avant-dernière génération
+        self.changes_edited = False  # True si des cellules ont été modifiées depuis la dernière génération
+
+    def setCell(self, cell, alive):  # Donne vie à la cellule (y, x) ou la tue, en ne mettant à jour que ses 8 voisins
+        self.syncCells()
+        if (cell in self.living_cells) == alive:
+            return
+        if alive:
+            self.living_cells.add(cell)
+        else:
+            self.living_cells.discard(cell)
+        if self.recorded is not None and self.recording_start is None:
+            self.recorded ^= {cell}
+        if self.dense_grid is not None:  # Grille recréée avant la prochaine génération
+            self.grid_outdated = True
+            return
+        y, x = cell
+        for dx, dy in NEIGHBORS:
+            count = self.neighbors[y+dy, x+dx] + (1 if alive else -1)
+            if count:
+                self.neighbors[y+dy, x+dx] = count
+            else:
+                del self.neighbors[y+dy, x+dx]
+        if self.changes is not None:  # La modification compte comme un changement de la dernière génération
+            tile = self.changes[y >> TILE_SHIFT, x >> TILE_SHIFT]
+            tile ^= {cell}
+            if not tile:
+                del self.changes[y >> TILE_SHIFT, x >> TILE_SHIFT]
+        # Ces changements ne viennent plus seulement de la simulation : aucune tuile ne doit les refaire
+        self.last_changes = None
+        self.changes_edited = True
+
+    def setCells(self, cells):  # Remplace les cellules vivantes par cells en ne modifiant que celles qui changent d'état
+        self.syncCells()
+        cells = set(cells)
+        for cell in self.living_cells ^ cells:
+            self.setCell(cell, cell in cells)
+
+    def toggleCells(self, cells):  # Inverse l'état de chaque cellule de cells (pour annuler ou refaire une modification)
+        self.syncCells()
+        for cell in cells:
+            self.setCell(cell, cell not in self.living_cells)
+
+    def clearCells(self):  # Tue toutes les cellules
+        if self.recorded is not None and self.recording_start is None:
+            self.recorded ^= self.living_cells
+        self.living_cells.clear()
+        self.neighbors.clear()
+        self.changes = self.last_changes = None
+        self.cells_outdated = False
+        if self.dense_grid is not None:
+            self.grid_outdated = True
+
+    def startRecording(self):  # Commence à retenir les cellules qui changent d'état (simulation et modifications)
+        self.syncCells()
+        self.recorded = set()
+        self.recording_start = None if self.dense_grid is None else set(self.living_cells)
+
+    def stopRecording(self):  # Retourne l'ensemble des cellules dont l'état a changé depuis startRecording()
+        self.syncCells()
+        if self.recording_start is not None:  # La grille dense ne donne pas ses changements : comparaison avec l'état de départ
+            changed = self.living_cells ^ self.recording_start
+        else:
+            changed = self.recorded
+        self.recorded = self.recording_start = None
+        return changed
+
+    def rebuildGrid(self):  # Recrée la grille dense à partir de living_cells
+        self.dense_grid = dense.DenseGrid(self.living_cells)
+
+    def step(self, n=1):
+        for _ in range(n):
+            if self.grid_outdated:
+                self.grid_outdated = False
+                self.rebuildGrid()
+            if self.generation >= self.next_density_check:
+                if self.auto_dense:
+                    self.chooseGrid()
+                elif self.dense_grid is not None:  # Grille imposée (moteurs dense, packed et tiled) : elle est seulement réduite
+                    self.next_density_check = self.generation + self.DENSITY_CHECK_PERIOD
+                    self.dense_grid.crop()
+            if self.dense_grid is None:
+                flips, examined = stepCells(self.living_cells, self.neighbors, self.changes, self.last_changes)
+                if self.recorded is not None and self.recording_start is None:
+                    self.recorded.symmetric_difference_update(flips)
+                # Trop de changements pour qu'il soit rentable de les suivre : la prochaine génération examine toutes les cellules
+                tracked = len(flips) * ACTIVITY_COST <= len(self.living_cells) + len(self.neighbors)
+                self.changes, self.last_changes = (groupByTile(flips) if tracked else None), (None if self.changes_edited else self.changes)
+                self.changes_edited = False
+                self.cell_updates += examined
+            else:
+                self.dense_grid.step()
+                self.cell_updates += self.dense_grid.getArea()
+                self.cells_outdated = True
+            self.generation += 1
+        return n
+
+    def advance(self, generations):  # Une étape est une génération
+        self.step(generations)
+
+    def chooseGrid(self):  # Passe à la grille dense ou revient au dictionnaire de voisins selon la densité
+        self.next_density_check = self.generation + self.DENSITY_CHECK_PERIOD
+        if self.dense_grid is None:
+            if dense.isDense(self.living_cells):
+                if self.recorded is not None and self.recording_start is None:  # Les changements ne seront plus connus
+                    self.recording_start = self.living_cells ^ self.recorded
+                self.dense_grid = dense.DenseGrid(self.living_cells)
+        else:
+            self.dense_grid.crop()
+            if self.dense_grid.getDensity() < dense.DENSITY_THRESHOLD / 2:  # Seuil plus bas pour ne pas alterner sans arrêt
+                self.syncCells()
+                self.dense_grid = None
+                self.recountNeighbors()
+
+    def syncCells(self):  # Recopie la grille dense dans living_cells si elle a évolué depuis
+        if self.cells_outdated:
+            self.dense_grid.toCells(self.living_cells)
+            self.cells_outdated = False
+
+    def population(self):
+        if self.dense_grid is not None:
+            return self.dense_grid.population()
+        return len(self.living_cells)
+
+    def cellsIn(self, rect):
+        self.syncCells()
+        x0, y0, w, h = rect
+        for y, x in self.living_cells:
+            if x0 <= x < x0+w and y0 <= y < y0+h:
+                yield x, y
+
+
+class HashlifeEngine(Engine):  # Moteur de main_hashlife.py : chaque étape avance de 2^temporal_compression_level générations
+
+    name = "hashlife"
+    instances = WeakSet()  # Moteurs existants : ils partagent la table des nodes, leurs racines doivent toutes survivre au ramasse-miettes
+
+    def __init__(self, cells=(), temporal_compression_level=0, root=None, workers=0, parallel_levels=2, memory_budget=None):
+        super().__init__()
+        self.temporal_compression_level = temporal_compression_level
+        self.memory_budget = memory_budget  # En octets : au-delà, les nodes inaccessibles sont supprimées
+        self.last_collection = None  # Statistiques du dernier ramasse-miettes
+        HashlifeEngine.instances.add(self)
+        self.evolver = ParallelEvolver(workers, parallel_levels) if workers else None  # Niveaux du haut répartis sur des processus
+        self.root = hashlife.getEmptyNode(4) if root is None else root
+        for x, y in cells:
+            self.root = hashlife.setCell(self.root, x, y, True)
+        hashlife.edit_cache.clear()
+
+    def step(self, n=1):
+        generations = 0
+        for _ in range(n):
+            self.root = hashlife.simulateRoot(self.root, self.temporal_compression_level, self.evolver and self.evolver.evolve)
+            generations += hashlife.getGenerationsPerStep(self.root.depth, self.temporal_compression_level)
+            if hashlife.needsGarbageCollection(self.memory_budget):
+                self.collectGarbage()
+        self.generation += generations
+        return generations
+
+    def advance(self, generations):
+        self.root = hashlife.advance(self.root, generations, self.evolver and self.evolver.evolve)
+        self.generation += generations
+        if hashlife.needsGarbageCollection(self.memory_budget):
+            self.collectGarbage()
+
+    def population(self):
+        return self.root.n
+
+    def collectGarbage(self):  # Supprime les nodes inaccessibles depuis la racine
+        self.last_collection = hashlife.collectGarbage(*(engine.root for engine in HashlifeEngine.instances))
+        if self.evolver is not None:
+            self.evolver.reset()
+        return self.last_collection
+
+    def close(self):
+        if self.evolver is not None:
+            self.evolver.close()
+            self.evolver = None
+
+    def cellsIn(self, rect):  # Les nodes vides ne sont pas parcourues
+        return hashlife.getLivingCells(self.root, rect)
+
+
+class CompactHashlifeEngine(Engine):  # Moteur Hashlife dont les nodes sont stockées dans les tableaux d'un NodeStore
+
+    name = "compact"
+
+    def __init__(self, cells=(), temporal_compression_level=0, root=None, store=None):
+        super().__init__()
+        self.temporal_compression_level = temporal_compression_level
+        self.store = NodeStore() if store is None else store
+        self.root = self.store.getEmptyNode(4) if root is None else root
+        for x, y in cells:
+            position = -2**(self.store.depth[self.root]-1)
+            while not (position <= x < -position and position <= y < -position):
+                self.root = self.store.increaseRootSize(self.root)
+                position *= 2
+            self.root = self.store.setCell(self.root, position, position, x, y, True)
+
+    def step(self, n=1):
+        generations = 0
+        for _ in range(n):
+            self.root = self.store.simulateRoot(self.root, self.temporal_compression_level)
+            generations += hashlife.getGenerationsPerStep(self.store.depth[self.root], self.temporal_compression_level)
+        self.generation += generations
+        return generations
+
+    def advance(self, generations):
+        self.root = self.store.advance(self.root, generations)
+        self.generation += generations
+
+    def population(self):
+        return self.store.population[self.root]
+
+    def cellsIn(self, rect):
+        x0, y0, w, h = rect
+        position = -2**(self.store.depth[self.root]-1)
+        return self.store.getLivingCells(self.root, position, position, x0, y0, x0+w, y0+h)
+
+
+class DenseEngine(SetEngine):  # Moteur à grille dense NumPy (1 octet par cellule), quelle que soit la densité
+
+    name = "dense"
+
+    def __init__(self, cells=()):
+        super().__init__(cells, auto_dense=False)
+
+    def reset(self):
+        self.dense_grid = self.createGrid()
+        self.cells_outdated = False
+        self.next_density_check = self.generation + self.DENSITY_CHECK_PERIOD
+
+    def rebuildGrid(self):
+        self.reset()
+
+    def createGrid(self):
+        return dense.DenseGrid(self.living_cells)
+
+
+class PackedEngine(DenseEngine):  # Moteur à grille compressée NumPy (64 cellules par mot uint64, additionneurs SWAR)
+
+    name = "packed"
+
+    def createGrid(self):
+        return dense.PackedGrid(self.living_cells)
+
+
+class TiledEngine(DenseEngine):  # Moteur à tuiles calculées en parallèle par un pool de processus
+
+    name = "tiled"
+
+    def __init__(self, cells=(), workers=None):
+        self.workers = workers
+        super().__init__(cells)
+
+    def reset(self):
+        self.close()
+        super().reset()
+
+    def createGrid(self):
+        return tiled.TiledGrid(self.living_cells, self.workers)
+
+    def close(self):
+        if self.dense_grid is not None:
+            self.dense_grid.close()
+            self.dense_grid = None
+
+
+ENGINES = {engine.name: engine for engine in (SetEngine, HashlifeEngine, CompactHashlifeEngine)}
+if dense is not None:
+    ENGINES[DenseEngine.name] = DenseEngine
+    ENGINES[PackedEngine.name] = PackedEngine
+    ENGINES[TiledEngine.name] = TiledEngine
+
+
+def createEngine(name, cells=(), **options):  # Crée le moteur demandé à partir d'une liste de coordonnées x, y
+    return ENGINES[name](cells, **options)
+
+
+def loadRLE(name, file_path, **options):  # Crée le moteur demandé à partir d'un fichier RLE lu par morceaux (ou macrocell .mc pour Hashlife)
+    load = hashlife.loadMacrocell if file_path.endswith(".mc") else hashlife.loadRLEFile
+    if name == HashlifeEngine.name:
+        return HashlifeEngine(root=load(file_path), **options)
+    if name == CompactHashlifeEngine.name:
+        store = NodeStore()
+        return CompactHashlifeEngine(root=load(file_path, store), store=store, **options)
+    with open(file_path, "r") as f:
+        return createEngine(name, ((x, y) for y, x1, x2 in hashlife.RLE_Reader(f) for x in range(x1, x2)), **options)
+
+
+def getPeakMemory():  # Retourne le pic de mémoire résidente du processus en octets (None si la mesure n'est pas disponible)
+    if getrusage is None:
+        return None
+    peak = getrusage(RUSAGE_SELF).ru_maxrss
+    return peak if platform == "darwin" else peak * 1024  # Octets sous macOS, kilo-octets sous Linux
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Simulation sans affichage d'un fichier RLE")
+    parser.add_argument("rle", help="fichier RLE à simuler (ou macrocell .mc pour les moteurs hashlife et compact)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=HashlifeEngine.name)
+    parser.add_argument("--steps", type=int, default=100, help="nombre d'étapes à simuler")
+    parser.add_argument("--generations", type=int, default=None, help="nombre exact de générations à simuler (à la place de --steps)")
+    parser.add_argument("--level", type=int, default=0, help="niveau de compression temporelle (moteur hashlife)")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (moteurs tiled et hashlife)")
+    args = parser.parse_args()
+
+    options = {}
+    if args.engine in (HashlifeEngine.name, CompactHashlifeEngine.name):
+        options["temporal_compression_level"] = args.level
+    if args.engine == HashlifeEngine.name:
+        options["workers"] = args.workers or 0
+    elif args.engine == TiledEngine.name:
+        options["workers"] = args.workers
+    start = perf_counter()
+    engine = loadRLE(args.engine, args.rle, **options)
+    loaded = perf_counter()
+    if args.generations is None:
+        engine.step(args.steps)
+    else:
+        engine.advance(args.generations)
+    end = perf_counter()
+    peak_memory = getPeakMemory()
+    print(f"Chargement : {loaded-start:.3f} s" + (f", pic de mémoire {peak_memory/2**20:.1f} Mo" if peak_memory else ""))
+    print(f"Simulation : {f'{args.steps} étapes, ' if args.generations is None else ''}{engine.generation} générations en {end-loaded:.3f} s "
+          f"({engine.generation/max(end-loaded, 1e-9):.1f} gen/s)")
+    if engine.cell_updates:
+        print(f"Cellules calculées : {engine.cell_updates/max(end-loaded, 1e-9):.4g} cellules/s")
+    print(f"Population : {engine.population()}")
+    if args.engine == HashlifeEngine.name:
+        print(f"Rectangle englobant (x, y, largeur, hauteur) : {hashlife.getBoundingBox(engine.root)}")
+        print(f"Nodes : {len(hashlife.known_nodes)}, {hashlife.measureMemoryUsage()/2**20:.1f} Mo")
+    elif args.engine == CompactHashlifeEngine.name:
+        print(f"Nodes : {len(engine.store)}, {engine.store.getMemoryUsage()/2**20:.1f} Mo")
+    engine.close()
@@ -0,0 +1,896 @@
+"""
+Cœur de l'algorithme Hashlife, indépendant de pygame.
+Lien vers l'article utilisé pour implémenter le Hashlife : https://www.dev-mind.blog/hashlife
+
+Les nodes sont canoniques : deux nodes ayant les mêmes sous-nodes sont le même objet (voir newNode).
+La node racine est centrée sur l'origine : sa cellule en haut à gauche a pour coordonnées -2^(depth-1), -2^(depth-1).
+La récursion s'arrête aux nodes 16x16 : leurs cellules sont rangées dans un entier et simulées bit à bit (stepBlock),
+et les nodes 4x4 lisent leur résultat dans une table des 65536 configurations possibles (base_results).
+enableStats() active des compteurs (nodes trouvées par newNode, résultats de Node.evolve en cache par profondeur, durée des étapes)
+en remplaçant ces 2 fonctions : désactivés, ils ne coûtent rien.
+"""
+
+# Importation des librairies
+
+from math import log2, ceil
+from collections import defaultdict
+from sys import getsizeof
+import re
+
+BLOCK_DEPTH = 4  # Profondeur maximale des nodes simulées bit à bit sur un seul entier, sans descendre dans leurs sous-nodes
+GARBAGE_GROWTH = 2  # Après un ramasse-miettes, le suivant attend que les nodes dépassent aussi ce multiple de la mémoire nécessaire
+
+
+class RLE_Loader:  # Class contenant les fonctions permettant de charger une structure massive depuis le format RLE de façon optimale
+
+    # Tout le code contenu dans cette class a été créé par ChatGPT
+
+    def parse_rle(rle_text):
+        rows = defaultdict(list)
+
+        x = y = 0
+        count = 0
+        width = height = 0
+
+        for c in rle_text:
+            if c.isdigit():
+                count = count * 10 + int(c)
+                continue
+
+            n = count if count else 1
+            count = 0
+
+            if c == 'o':  # cellules vivantes
+                rows[y].append((x, x + n))
+                x += n
+
+            elif c == 'b':  # cellules mortes (on ignore)
+                x += n
+
+            elif c == '$':  # nouvelle ligne
+                y += n
+                x = 0
+
+            elif c == '!':
+                break
+
+            width = max(width, x)
+            height = max(height, y + 1)
+
+        return rows, width, height
+
+    def build_node(depth, x0, y0, rows, store=None):  # store : nodestore.NodeStore où créer les nodes (table globale par défaut)
+        if not rows:
+            return store.getEmptyNode(depth) if store else getEmptyNode(depth)
+
+        def cell_alive(x, y, rows):
+            runs = rows.get(y)
+            if not runs:
+                return False
+
+            for x1, x2 in runs:
+                if x1 <= x < x2:
+                    return True
+            return False
+
+        if depth == 1:
+            # construire un 2×2
+            return (store.newNode if store else newNode)(
+                1,
+                cell_alive(x0,     y0,     rows),
+                cell_alive(x0 + 1, y0,     rows),
+                cell_alive(x0,     y0 + 1, rows),
+                cell_alive(x0 + 1, y0 + 1, rows),
+            )
+
+        half = 1 << (depth - 1)
+
+        nw_rows = {}
+        ne_rows = {}
+        sw_rows = {}
+        se_rows = {}
+
+        for y, runs in rows.items():
+            if y < y0 or y >= y0 + 2 * half:
+                continue
+
+            if y < y0 + half:
+                target = (nw_rows, ne_rows)
+            else:
+                target = (sw_rows, se_rows)
+
+            for x1, x2 in runs:
+                if x2 <= x0 or x1 >= x0 + 2 * half:
+                    continue
+
+                if x1 < x0 + half:
+                    target[0].setdefault(y, []).append((x1, min(x2, x0 + half)))
+                if x2 > x0 + half:
+                    target[1].setdefault(y, []).append((max(x1, x0 + half), x2))
+
+        return (store.newNode if store else newNode)(
+            depth,
+            RLE_Loader.build_node(depth - 1, x0, y0, nw_rows, store),
+            RLE_Loader.build_node(depth - 1, x0 + half, y0, ne_rows, store),
+            RLE_Loader.build_node(depth - 1, x0, y0 + half, sw_rows, store),
+            RLE_Loader.build_node(depth - 1, x0 + half, y0 + half, se_rows, store),
+        )
+
+    def load(rle_text, store=None):
+        # 1) Parser le RLE → runs horizontaux
+        rows, width, height = RLE_Loader.parse_rle(rle_text)
+
+        # 2) Taille minimale du carré englobant
+        size = max(width, height)
+        if size <= 1:
+            return store.getEmptyNode(1) if store else getEmptyNode(1)
+
+        # 3) Profondeur Hashlife (2^depth ≥ size)
+        depth = ceil(log2(size))
+        if depth < 1:
+            depth = 1
+
+        # 4) Construire la node racine bottom-up
+        return RLE_Loader.build_node(depth, 0, 0, rows, store)
+
+    def cells(rle_text):  # Génère les coordonnées x, y de chaque cellule vivante du RLE
+        rows, _, _ = RLE_Loader.parse_rle(rle_text)
+        for y, runs in rows.items():
+            for x1, x2 in runs:
+                for x in range(x1, x2):
+                    yield x, y
+
+
+class RLE_Reader:  # Lecture d'un fichier RLE par morceaux, sans charger tout le texte en mémoire
+
+    CHUNK_SIZE = 2**16  # Nombre de caractères lus à la fois
+    TOKEN = re.compile(r"(\d*)([bo$!])")
+
+    def __init__(self, file):
+        self.file = file
+        self.width = 0  # Mêmes dimensions que RLE_Loader.parse_rle (cellules mortes en fin de ligne comprises)
+        self.height = 0
+
+    def __iter__(self):  # Génère les suites de cellules vivantes (y, x1, x2) dans l'ordre des lignes
+        line = self.file.readline()
+        while line.startswith(("#", "x")):  # Commentaires et en-tête
+            line = self.file.readline()
+        x = y = 0
+        rest = "".join(line.split())
+        while True:
+            chunk = self.file.read(self.CHUNK_SIZE)
+            text = rest + "".join(chunk.split())  # Un nombre peut être coupé par un retour à la ligne
+            end = 0
+            for match in self.TOKEN.finditer(text):
+                end = match.end()
+                n = int(match[1]) if match[1] else 1
+                tag = match[2]
+                if tag == "o":
+                    yield y, x, x+n
+                    x += n
+                elif tag == "b":
+                    x += n
+                elif tag == "$":
+                    y += n
+                    x = 0
+                else:
+                    return
+                self.width = max(self.width, x)
+                self.height = max(self.height, y+1)
+            rest = text[end:]  # Nombre coupé en fin de morceau, complété au morceau suivant
+            if not chunk:
+                return
+
+
+class Node:
+
+    __slots__ = ('depth', 'a', 'b', 'c', 'd', 'result', 'hash', 'n')
+
+    def __init__(self, depth, a, b, c, d):
+        self.depth = depth
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.n = (a.n + b.n + c.n + d.n) if self.depth > 1 else (a + b + c + d)
+        self.result = [None] * (self.depth - 1)
+        self.hash = hash((id(self.a), id(self.b), id(self.c), id(self.d)))
+
+    def evolve(self, temporal_compression_level, is_root=False):  # Fonction de simulation utilisant l'algorithme Hashlife pour compresser l'espace et le temps
+
+        # Si la node a déjà été calculée au moins 1 fois, on réutilise le résultat enregistré
+        if temporal_compression_level == -1:
+            self_temporal_compression = len(self.result)-1
+        else:
+            self_temporal_compression = min(temporal_compression_level, len(self.result)-1)
+        if is_root:  # La racine n'avance que de 2^(depth-3) générations au maximum pour que le résultat reste en son centre
+            self_temporal_compression = min(self_temporal_compression, self.depth-3)
+        result = self.result[self_temporal_compression]
+        if result == None:
+            if self.n == 0:
+                result = getEmptyNode(self.depth-1)
+            elif self.depth == 2:  # Plus petites nodes (4x4) : résultat lu dans la table des 65536 configurations
+                bits = base_results[packNode(self, 4)]
+                result = newNode(1, bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+            elif self.depth <= BLOCK_DEPTH:  # Nodes 8x8 et 16x16 : générations calculées bit à bit sur un seul entier
+                width = 2**self.depth
+                cells = packNode(self, width)
+                for _ in range(2**self_temporal_compression):
+                    cells = stepBlock(cells, width)
+                result = unpackNode(cells, width, width//4, width//4, self.depth-1)
+            else:
+                node1 = self.a
+                node2 = newNode(self.depth-1, self.a.b, self.b.a, self.a.d, self.b.c)
+                node3 = self.b
+                node4 = newNode(self.depth-1, self.a.c, self.a.d, self.c.a, self.c.b)
+                node5 = self.getCenterNode()
+                node6 = newNode(self.depth-1, self.b.c, self.b.d, self.d.a, self.d.b)
+                node7 = self.c
+                node8 = newNode(self.depth-1, self.c.b, self.d.a, self.c.d, self.d.c)
+                node9 = self.d
+
+                node1Res = node1.evolve(temporal_compression_level)
+                node2Res = node2.evolve(temporal_compression_level)
+                node3Res = node3.evolve(temporal_compression_level)
+                node4Res = node4.evolve(temporal_compression_level)
+                node5Res = node5.evolve(temporal_compression_level)
+                node6Res = node6.evolve(temporal_compression_level)
+                node7Res = node7.evolve(temporal_compression_level)
+                node8Res = node8.evolve(temporal_compression_level)
+                node9Res = node9.evolve(temporal_compression_level)
+
+                intermediateNode1 = newNode(self.depth-1, node1Res, node2Res, node4Res, node5Res)
+                intermediateNode2 = newNode(self.depth-1, node2Res, node3Res, node5Res, node6Res)
+                intermediateNode3 = newNode(self.depth-1, node4Res, node5Res, node7Res, node8Res)
+                intermediateNode4 = newNode(self.depth-1, node5Res, node6Res, node8Res, node9Res)
+
+                if self_temporal_compression == self.depth-2:
+                    result = newNode(self.depth-1,
+                                intermediateNode1.evolve(temporal_compression_level),
+                                intermediateNode2.evolve(temporal_compression_level),
+                                intermediateNode3.evolve(temporal_compression_level),
+                                intermediateNode4.evolve(temporal_compression_level)
+                                )
+                else:
+                    result = newNode(self.depth-1,
+                                intermediateNode1.getCenterNode(),
+                                intermediateNode2.getCenterNode(),
+                                intermediateNode3.getCenterNode(),
+                                intermediateNode4.getCenterNode()
+                                )
+            self.result[self_temporal_compression] = result
+        return result
+
+    def getCenterNode(self):  # Retourne la node centrale de celle-ci, centrée et 2 fois plus petite
+        return newNode(self.depth-1, self.a.d, self.b.c, self.c.b, self.d.a)
+
+    def getSubNodes(self):  # Retourne la position relative de chaque sous-node et celle-ci
+        half = 2**(self.depth-1)
+        yield 0, 0, self.a
+        yield half, 0, self.b
+        yield 0, half, self.c
+        yield half, half, self.d
+
+    def getSubNodeFromXY(self, dx, dy):  # Retourne la sous-node correspondante à dx, dy
+        match dx, dy:
+            case 0, 0: return self.a
+            case 1, 0: return self.b
+            case 0, 1: return self.c
+            case 1, 1: return self.d
+        raise ValueError
+
+    def setCell(self, x, y, cx, cy, value):  # Renvoie une nouvelle node de la même taille avec la cellule modifiée
+
+        cached = edit_cache.get((self, cx-x, cy-y, value))
+        if cached != None:
+            return cached
+
+        if self.depth == 1:
+            result = newNode(1, *(value if x+dx == cx and y+dy == cy else cell for dx, dy, cell in self.getSubNodes()))
+            edit_cache[(self, cx-x, cy-y, value)] = result
+            return result
+
+        half = 2**(self.depth-1)
+        result = newNode(self.depth, *(node.setCell(x+dx, y+dy, cx, cy, value)
+                                     if x+dx <= cx < x+dx+half and y+dy <= cy < y+dy+half else node
+                                     for dx, dy, node in self.getSubNodes()
+                                     )
+                       )
+        edit_cache[(self, cx-x, cy-y, value)] = result
+        return result
+
+    def isLiving(self, x, y, cx, cy):  # Retourne True si la cellule en cx, cy est vivante sinon False
+        if self.n == 0:
+            return False
+        if self.depth == 1:
+            return self.getSubNodeFromXY(cx-x, cy-y)
+        half = 2**(self.depth-1)
+        for dx, dy, node in self.getSubNodes():
+            if x+dx <= cx < x+dx+half and y+dy <= cy < y+dy+half:
+                return node.isLiving(x+dx, y+dy, cx, cy)
+        return False
+
+    def getPopulationIn(self, x, y, x1, y1, x2, y2):  # Nombre de cellules vivantes dans le rectangle x1 <= cx < x2, y1 <= cy < y2
+        size = 2**self.depth
+        if self.n == 0 or x >= x2 or y >= y2 or x+size <= x1 or y+size <= y1:
+            return 0
+        if x1 <= x and y1 <= y and x+size <= x2 and y+size <= y2:  # Node entièrement dans le rectangle
+            return self.n
+        if self.depth == 1:
+            return sum(cell for dx, dy, cell in self.getSubNodes() if x1 <= x+dx < x2 and y1 <= y+dy < y2)
+        return sum(node.getPopulationIn(x+dx, y+dy, x1, y1, x2, y2) for dx, dy, node in self.getSubNodes())
+
+    def getLivingCells(self, x, y, x1, y1, x2, y2):  # Génère les coordonnées des cellules vivantes dans le rectangle, sans parcourir les nodes vides
+        size = 2**self.depth
+        if self.n == 0 or x >= x2 or y >= y2 or x+size <= x1 or y+size <= y1:
+            return
+        if self.depth == 1:
+            for dx, dy, cell in self.getSubNodes():
+                if cell and x1 <= x+dx < x2 and y1 <= y+dy < y2:
+                    yield x+dx, y+dy
+            return
+        for dx, dy, node in self.getSubNodes():
+            yield from node.getLivingCells(x+dx, y+dy, x1, y1, x2, y2)
+
+    def getBoundingBox(self, cache):  # Retourne le rectangle englobant des cellules vivantes (x1, y1, x2, y2) par rapport au coin de la node, None si elle est vide
+        if self.n == 0:
+            return None
+        if self.depth == 1:
+            cells = [(dx, dy) for dx, dy, cell in self.getSubNodes() if cell]
+            return min(dx for dx, _ in cells), min(dy for _, dy in cells), max(dx for dx, _ in cells)+1, max(dy for _, dy in cells)+1
+        box = cache.get(self)
+        if box is None:
+            boxes = [(dx, dy, node.getBoundingBox(cache)) for dx, dy, node in self.getSubNodes() if node.n]
+            box = cache[self] = (min(dx+b[0] for dx, _, b in boxes), min(dy+b[1] for _, dy, b in boxes),
+                                 max(dx+b[2] for dx, _, b in boxes), max(dy+b[3] for _, dy, b in boxes))
+        return box
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, node):
+        if not isinstance(node, Node): return False
+        return id(self.a) == id(node.a) and id(self.b) == id(node.b) and id(self.c) == id(node.c) and id(self.d) == id(node.d)
+
+    def __ne__(self, node):
+        return not self.__eq__(node)
+
+    def __repr__(self):
+        if self.depth == 1:
+            return f"Node 2x2 a={self.a} b={self.b} c={self.c} d={self.d}"
+        return f"Node {2**self.depth}x{2**self.depth} depth={self.depth} n={self.n}"
+
+
+# Définition des fonctions
+
+def lifeRule(cells, neighbors):  # Applique la règle bit à bit : chaque bit de cells est une cellule, neighbors ses 8 voisins alignés
+    s0 = s1 = s2 = 0  # Nombre de voisins sur 3 bits, s2 reste à 1 dès 4 voisins
+    for n in neighbors:
+        carry = s0 & n
+        s0 ^= n
+        s2 |= s1 & carry
+        s1 ^= carry
+    return s1 & ~s2 & (s0 | cells)  # 3 voisins, ou 2 voisins et vivante
+
+
+def stepBlock(cells, width):  # Simule une génération d'un bloc carré (la cellule x, y est le bit y*width+x), faux sur le bord du bloc
+    mask = 2**(width*width) - 1
+    left = (cells << 1) & mask
+    right = cells >> 1
+    return lifeRule(cells, (left, right, (cells << width) & mask, cells >> width,
+                            (left << width) & mask, left >> width, (right << width) & mask, right >> width))
+
+
+def packNode(node, width, x=0, y=0):  # Retourne les cellules d'une node 4x4 ou plus sous forme d'entier (la cellule x, y est le bit y*width+x)
+    if node.n == 0:
+        return 0
+    if node.depth == 2:
+        key = block_keys.get(node)
+        if key is None:
+            key = 0
+            for i, leaf in enumerate((node.a, node.b, node.c, node.d)):
+                j = 8*(i >> 1) + 2*(i & 1)
+                key |= leaf.a << j | leaf.b << (j+1) | leaf.c << (j+4) | leaf.d << (j+5)
+            block_keys[node] = key
+            block_nodes[key] = node
+        i = y*width + x
+        return (key & 15) << i | (key >> 4 & 15) << (i+width) | (key >> 8 & 15) << (i+2*width) | (key >> 12) << (i+3*width)
+    half = 2**(node.depth-1)
+    return (packNode(node.a, width, x, y) | packNode(node.b, width, x+half, y)
+            | packNode(node.c, width, x, y+half) | packNode(node.d, width, x+half, y+half))
+
+
+def unpackNode(cells, width, x, y, depth):  # Retourne la node (4x4 ou plus) de profondeur depth dont le coin est la cellule x, y de l'entier cells
+    if depth == 2:
+        i = y*width + x
+        key = (cells >> i & 15) | (cells >> (i+width) & 15) << 4 | (cells >> (i+2*width) & 15) << 8 | (cells >> (i+3*width) & 15) << 12
+        node = block_nodes.get(key)
+        if node is None:
+            leaves = []
+            for j in (0, 2, 8, 10):
+                leaves.append(newNode(1, bool(key >> j & 1), bool(key >> (j+1) & 1), bool(key >> (j+4) & 1), bool(key >> (j+5) & 1)))
+            node = newNode(2, *leaves)
+            block_keys[node] = key
+            block_nodes[key] = node
+        return node
+    half = 2**(depth-1)
+    return newNode(depth, unpackNode(cells, width, x, y, depth-1), unpackNode(cells, width, x+half, y, depth-1),
+                   unpackNode(cells, width, x, y+half, depth-1), unpackNode(cells, width, x+half, y+half, depth-1))
+
+
+def buildBaseResults():  # Retourne le résultat (node 2x2 sur 4 bits) de chacune des 65536 nodes 4x4 (cellule x, y au bit y*4+x)
+    # Les 65536 nodes sont simulées ensemble : le bit k de cells[i] est la cellule i de la node k
+    size = 2**16
+    cells = [((1 << 2**i) - 1 << 2**i) * ((2**size - 1) // (2**2**(i+1) - 1)) for i in range(16)]
+    table = 0
+    for bit, (x, y) in enumerate(((1, 1), (2, 1), (1, 2), (2, 2))):
+        result = lifeRule(cells[y*4+x], [cells[(y+dy)*4+x+dx] for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy])
+        # Un octet par node : le bit k du résultat devient l'octet k
+        table |= int.from_bytes(format(result, f"0{size}b").translate({48: 0, 49: 1}).encode("latin-1"), "big") << bit
+    return table.to_bytes(size, "little")
+
+
+def newNode(depth, a, b, c, d):  # Vérifie si une node avec les mêmes propriétés existe et la retourne, sinon en créé une nouvelle
+    key = (a, b, c, d)
+    node = known_nodes.get(key)
+    if node == None:
+        node = Node(depth, a, b, c, d)
+        known_nodes[key] = node
+    return node
+
+
+def getEmptyNode(depth):  # Retourne une node avec la profondeur demandée
+    while depth > len(empty_nodes):
+        empty_nodes.append(newNode(len(empty_nodes)+1, *[empty_nodes[-1]]*4))
+    return empty_nodes[depth-1]
+
+
+def loadRLEFile(file_path, store=None):  # Charge un fichier RLE en construisant l'arbre au fur et à mesure que les lignes sont lues
+    new_node = store.newNode if store else newNode
+    get_empty_node = store.getEmptyNode if store else getEmptyNode
+    levels = []  # levels[k] : bande de nodes de profondeur k+1 ({colonne: node}) qui attend la bande du dessous
+
+    def push(strip, k):  # Ajoute une bande de profondeur k+1 sous les précédentes, en fusionnant les paires de bandes terminées
+        while True:
+            if k == len(levels):
+                levels.append(None)
+            if levels[k] is None:
+                levels[k] = strip
+                return
+            top = levels[k]
+            levels[k] = None
+            empty_node = get_empty_node(k+1)
+            strip = {i: new_node(k+2, top.get(2*i, empty_node), top.get(2*i+1, empty_node),
+                                 strip.get(2*i, empty_node), strip.get(2*i+1, empty_node))
+                     for i in {i >> 1 for i in (*top, *strip)}}
+            k += 1
+
+    def pushLeaves(leaves):  # Ajoute la bande de nodes 2x2 d'une paire de lignes
+        push({i: new_node(1, bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8)) for i, bits in leaves.items()}, 0)
+
+    def pushEmpty(pairs):  # Ajoute des paires de lignes vides par bandes vides aussi grandes que leur alignement le permet
+        while pairs:
+            k = 0  # Une bande de profondeur k+2 ne peut être ajoutée que si aucune bande n'attend aux niveaux 0 à k
+            while 2**(k+1) <= pairs and (k >= len(levels) or levels[k] is None):
+                k += 1
+            push({}, k)
+            pairs -= 2**k
+
+    with open(file_path, "r") as f:
+        reader = RLE_Reader(f)
+        leaves = {}  # Cellules de la paire de lignes en cours : {colonne // 2: bits a, b, c, d}
+        pair = 0
+        for y, x1, x2 in reader:
+            if y >> 1 != pair:
+                pushLeaves(leaves)
+                leaves = {}
+                pushEmpty((y >> 1) - pair - 1)  # Paires de lignes vides
+                pair = y >> 1
+            for x in range(x1, x2):
+                leaves[x >> 1] = leaves.get(x >> 1, 0) | 1 << ((x & 1) + 2*(y & 1))
+        pushLeaves(leaves)
+
+    size = max(reader.width, reader.height)
+    if size <= 1:
+        return get_empty_node(1)
+    depth = ceil(log2(size))
+    for k in range(depth-1):  # Les dernières bandes en attente sont complétées par des bandes vides
+        if k < len(levels) and levels[k] is not None:
+            push({}, k)
+    return levels[depth-1].get(0, get_empty_node(depth)) if depth-1 < len(levels) and levels[depth-1] else get_empty_node(depth)
+
+
+def saveMacrocell(root, file_path):  # Enregistre l'arbre au format macrocell (.mc) de Golly : chaque node distincte est écrite une seule fois
+    indices = {}
+    lines = []
+
+    def write(node):  # Écrit la node après ses sous-nodes et retourne son numéro de ligne (0 pour une node vide)
+        if node.n == 0:
+            return 0
+        index = indices.get(node)
+        if index is None:
+            if node.depth == 3:  # Feuille 8x8 : '*' vivante, '.' morte, '$' fin de ligne (points et lignes vides de fin omis)
+                cells = packNode(node, 8)
+                rows = ("".join("*" if cells >> (8*y+x) & 1 else "." for x in range(8)).rstrip(".") for y in range(8))
+                line = "$".join(rows).rstrip("$") + "$"
+            else:
+                line = f"{node.depth} {write(node.a)} {write(node.b)} {write(node.c)} {write(node.d)}"
+            lines.append(line)
+            index = indices[node] = len(lines)
+        return index
+
+    write(updateRootSize(root))  # Les feuilles 8x8 demandent une racine de profondeur 3 au moins
+    with open(file_path, "w") as f:
+        f.write("[M2] (ConwaysGameOfLife)\n#R B3/S23\n")
+        f.writelines(line + "\n" for line in lines)
+
+
+def loadMacrocell(file_path, store=None):  # Charge un fichier macrocell (.mc) en une seule passe, node par node, sans passer par les cellules
+    new_node = store.newNode if store else newNode
+    get_empty_node = store.getEmptyNode if store else getEmptyNode
+    unpack_node = store.unpackNode if store else unpackNode
+    nodes = [None]  # nodes[i] : node de la ligne i (0 : node vide)
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(("[", "#")):  # En-tête, règle, génération et commentaires
+                continue
+            if line[0] in ".*$":  # Feuille 8x8
+                cells = x = y = 0
+                for c in line:
+                    if c == "$":
+                        y += 1
+                        x = 0
+                    else:
+                        cells |= (c == "*") << (8*y+x)
+                        x += 1
+                nodes.append(unpack_node(cells, 8, 0, 0, 3))
+            else:
+                depth, a, b, c, d = map(int, line.split())
+                empty_node = get_empty_node(depth-1)
+                nodes.append(new_node(depth, *(nodes[i] if i else empty_node for i in (a, b, c, d))))
+    return nodes[-1] if len(nodes) > 1 else get_empty_node(4)
+
+
+def getRootPosition(root):  # Retourne les coordonnées de la cellule en haut à gauche de la racine
+    return -(2**(root.depth-1))
+
+
+def increaseRootSize(root):  # Retourne la racine agrandie d'un niveau de profondeur, centrée sur la même origine
+    empty_node = getEmptyNode(root.depth-1) if root.depth > 1 else False
+    return newNode(root.depth+1,
+                   newNode(root.depth, empty_node, empty_node, empty_node, root.a),
+                   newNode(root.depth, empty_node, empty_node, root.b, empty_node),
+                   newNode(root.depth, empty_node, root.c, empty_node, empty_node),
+                   newNode(root.depth, root.d, empty_node, empty_node, empty_node)
+                   )
+
+
+def updateRootSize(root):  # Agrandit la racine tant que des cellules vivantes se trouvent hors de son quart central
+    while root.depth < 4 or any(node.n > 0 for node in (
+        root.a.d.a, root.a.d.b, root.a.d.c,
+        root.b.c.a, root.b.c.b, root.b.c.d,
+        root.c.b.a, root.c.b.c, root.c.b.d,
+        root.d.a.b, root.d.a.c, root.d.a.d,
+        root.a.a, root.a.b, root.a.c,
+        root.b.a, root.b.b, root.b.d,
+        root.c.a, root.c.c, root.c.d,
+        root.d.b, root.d.c, root.d.d)):
+        root = increaseRootSize(root)
+    return root
+
+
+def getGenerationsPerStep(root_depth, temporal_compression_level):  # Nombre de générations parcourues par simulateRoot pour une racine (déjà agrandie) de cette profondeur
+    if temporal_compression_level == -1:
+        return 2**(root_depth-3)
+    return 2**min(root_depth-3, temporal_compression_level)
+
+
+def simulateRoot(root, temporal_compression_level, evolve=None):  # Retourne la racine après une étape de simulation (evolve peut remplacer Node.evolve pour la racine)
+    root = updateRootSize(root)
+    if evolve is None:
+        new_root = root.evolve(temporal_compression_level, True)
+    else:
+        new_root = evolve(root, temporal_compression_level)
+    return newNode(root.depth,
+                   newNode(root.depth-1, root.a.a, root.a.b, root.a.c, new_root.a),
+                   newNode(root.depth-1, root.b.a, root.b.b, new_root.b, root.b.d),
+                   newNode(root.depth-1, root.c.a, new_root.c, root.c.c, root.c.d),
+                   newNode(root.depth-1, new_root.d, root.d.b, root.d.c, root.d.d)
+    )
+
+
+def advance(root, generations, evolve=None):  # Retourne la racine avancée d'exactement generations générations (une étape par bit à 1 de generations)
+    level = 0
+    while generations:
+        if generations & 1:  # 2^level générations en une étape : la racine doit être assez grande pour ce niveau de compression temporelle
+            root = updateRootSize(root)
+            while root.depth < level+3:
+                root = increaseRootSize(root)
+            root = simulateRoot(root, level, evolve)
+        generations >>= 1
+        level += 1
+    return root
+
+
+def setCell(root, x, y, value, check_size=True):  # Retourne la racine avec la cellule x, y modifiée
+    if check_size:
+        maxi = max(abs(x), abs(y))
+        while maxi > 2**(root.depth-3):
+            root = increaseRootSize(root)
+    position = getRootPosition(root)
+    return root.setCell(position, position, x, y, value)
+
+
+def getPopulation(root, rect):  # Nombre de cellules vivantes dans le rectangle (x, y, largeur, hauteur)
+    x, y, width, height = rect
+    position = getRootPosition(root)
+    return root.getPopulationIn(position, position, x, y, x+width, y+height)
+
+
+def getLivingCells(root, rect):  # Génère les coordonnées x, y des cellules vivantes dans le rectangle (x, y, largeur, hauteur)
+    x, y, width, height = rect
+    position = getRootPosition(root)
+    return root.getLivingCells(position, position, x, y, x+width, y+height)
+
+
+def getBoundingBox(root, cache=None):  # Retourne le plus petit rectangle (x, y, largeur, hauteur) contenant les cellules vivantes, None s'il n'y en a pas
+    box = root.getBoundingBox({} if cache is None else cache)  # cache : rectangles des nodes, réutilisable d'un appel à l'autre
+    if box is None:
+        return None
+    position = getRootPosition(root)
+    return position+box[0], position+box[1], box[2]-box[0], box[3]-box[1]
+
+
+def buildNode(cells):  # Retourne la node contenant les cellules [x, y] (x, y >= 0), cellule 0, 0 en haut à gauche, construite niveau par niveau
+    nodes = defaultdict(int)  # Nodes 2x2 sous forme de bits a, b, c, d
+    for x, y in cells:
+        nodes[(x >> 1, y >> 1)] |= 1 << ((x & 1) + 2*(y & 1))
+    nodes = {key: newNode(1, bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8)) for key, bits in nodes.items()}
+    depth = 1
+    while nodes.keys() - {(0, 0)}:  # On regroupe les nodes par 4 jusqu'à n'en avoir plus qu'une en 0, 0
+        empty_node = getEmptyNode(depth)
+        nodes = {(i, j): newNode(depth+1, nodes.get((2*i, 2*j), empty_node), nodes.get((2*i+1, 2*j), empty_node),
+                                 nodes.get((2*i, 2*j+1), empty_node), nodes.get((2*i+1, 2*j+1), empty_node))
+                 for i, j in {(x >> 1, y >> 1) for x, y in nodes}}
+        depth += 1
+    return nodes.get((0, 0), getEmptyNode(1))
+
+
+def unionNode(node1, node2, cache):  # Retourne la node dont les cellules vivantes sont celles de node1 ou de node2 (même profondeur)
+    if node1.n == 0 or node1 is node2:
+        return node2
+    if node2.n == 0:
+        return node1
+    if node1.depth == 1:
+        return newNode(1, node1.a or node2.a, node1.b or node2.b, node1.c or node2.c, node1.d or node2.d)
+    key = (node1, node2)
+    result = cache.get(key)
+    if result is None:
+        result = cache[key] = newNode(node1.depth, unionNode(node1.a, node2.a, cache), unionNode(node1.b, node2.b, cache),
+                                      unionNode(node1.c, node2.c, cache), unionNode(node1.d, node2.d, cache))
+    return result
+
+
+def shiftNode(a, b, c, d, dx, dy, cache):  # Retourne la node de même profondeur que a, b, c, d vue au décalage dx, dy (0 à sa taille) dans le carré qu'elles forment
+    size = 2**a.depth
+    if dx in (0, size) and dy in (0, size):  # Décalage aligné : c'est l'une des 4 nodes
+        return ((a, b), (c, d))[dy > 0][dx > 0]
+    if a.n == b.n == c.n == d.n == 0:
+        return a
+    key = (a, b, c, d, dx, dy)
+    result = cache.get(key)
+    if result is not None:
+        return result
+    if a.depth == 1:
+        grid = ((a.a, a.b, b.a, b.b), (a.c, a.d, b.c, b.d), (c.a, c.b, d.a, d.b), (c.c, c.d, d.c, d.d))
+        result = newNode(1, grid[dy][dx], grid[dy][dx+1], grid[dy+1][dx], grid[dy+1][dx+1])
+    else:
+        grid = ((a.a, a.b, b.a, b.b), (a.c, a.d, b.c, b.d), (c.a, c.b, d.a, d.b), (c.c, c.d, d.c, d.d))
+        half = size // 2
+        quarters = []
+        for qy, qx in ((0, 0), (0, 1), (1, 0), (1, 1)):  # Chaque quart du résultat est lui-même vu dans 4 sous-nodes voisines
+            column = min((dx + qx*half) // half, 2)
+            row = min((dy + qy*half) // half, 2)
+            quarters.append(shiftNode(grid[row][column], grid[row][column+1], grid[row+1][column], grid[row+1][column+1],
+                                      dx + qx*half - column*half, dy + qy*half - row*half, cache))
+        result = newNode(a.depth, *quarters)
+    cache[key] = result
+    return result
+
+
+def insertNode(node, x, y, block, bx, by, cache):  # Retourne la node (coin x, y) avec block (coin bx, by, aligné sur sa taille) ajoutée à ses cellules
+    if node.depth == block.depth:
+        return unionNode(node, block, cache)
+    half = 2**(node.depth-1)
+    i = (bx >= x+half) + 2*(by >= y+half)
+    children = [node.a, node.b, node.c, node.d]
+    children[i] = insertNode(children[i], x+half*(i & 1), y+half*(i >> 1), block, bx, by, cache)
+    return newNode(node.depth, *children)
+
+
+def pasteNode(root, node, x, y):  # Retourne la racine avec les cellules de node ajoutées, son coin en haut à gauche en x, y
+    if node.n == 0:
+        return root
+    size = 2**node.depth
+    while root.depth < node.depth+3 or max(abs(x), abs(y), abs(x+size), abs(y+size)) > 2**(root.depth-3):
+        root = increaseRootSize(root)
+    cache = {}
+    # On décale node dans une node 2 fois plus grande, alignée sur sa taille, puis on ajoute ses 4 quarts à la racine
+    rx, ry = x % size, y % size
+    empty_node = getEmptyNode(node.depth)
+    larger_empty_node = getEmptyNode(node.depth+1)
+    shifted = shiftNode(larger_empty_node, larger_empty_node, larger_empty_node,
+                        newNode(node.depth+1, node, empty_node, empty_node, empty_node), 2*size-rx, 2*size-ry, cache)
+    position = getRootPosition(root)
+    for dx, dy, quarter in shifted.getSubNodes():
+        if quarter.n:
+            root = insertNode(root, position, position, quarter, x-rx+dx, y-ry+dy, cache)
+    return root
+
+
+def getAlignedNode(root, x, y, depth):  # Retourne la sous-node de la racine de profondeur depth dont le coin est x, y (aligné sur sa taille), vide hors de la racine
+    nx = ny = getRootPosition(root)
+    if not (nx <= x < nx+2**root.depth and ny <= y < ny+2**root.depth):
+        return getEmptyNode(depth)
+    node = root
+    while node.depth > depth:
+        half = 2**(node.depth-1)
+        i = (x >= nx+half) + 2*(y >= ny+half)
+        node = (node.a, node.b, node.c, node.d)[i]
+        nx += half*(i & 1)
+        ny += half*(i >> 1)
+    return node
+
+
+def extractNode(root, x, y, depth, cache):  # Retourne la node de profondeur depth (au moins 1) dont le coin en haut à gauche est la cellule x, y, alignée ou non
+    size = 2**depth
+    ax, ay = x - x % size, y - y % size  # Les 4 nodes alignées qui recouvrent le carré
+    return shiftNode(getAlignedNode(root, ax, ay, depth), getAlignedNode(root, ax+size, ay, depth),
+                     getAlignedNode(root, ax, ay+size, depth), getAlignedNode(root, ax+size, ay+size, depth), x-ax, y-ay, cache)
+
+
+def getMemoryUsage():  # Estimation rapide de la mémoire occupée par les nodes (en octets)
+    return len(known_nodes) * average_node_bytes
+
+
+def needsGarbageCollection(memory_budget):  # Retourne True si les nodes dépassent le budget mémoire (en octets, None pour aucun budget)
+    # À appeler après chaque étape. La mémoire nécessaire est celle des nodes gardées par le dernier ramasse-miettes plus
+    # les nodes créées par la plus grosse étape depuis : si elle dépasse le budget, on attend qu'elle double au lieu de tout
+    # ramasser (et de perdre les résultats en cache) à chaque étape
+    global step_bytes, checked_bytes
+    if memory_budget is None:
+        return False
+    usage = getMemoryUsage()
+    step_bytes = max(step_bytes, usage - checked_bytes)
+    checked_bytes = usage
+    return usage > max(memory_budget, GARBAGE_GROWTH * (kept_bytes + step_bytes))
+
+
+def measureMemoryUsage():  # Mesure la mémoire occupée par les nodes, leurs clés et la table (en octets)
+    return getsizeof(known_nodes) + sum(getsizeof(key) + getsizeof(node) + getsizeof(node.result) for key, node in known_nodes.items())
+
+
+def collectGarbage(*roots):  # Supprime les nodes inaccessibles depuis roots (et les nodes vides), retourne les statistiques
+    global average_node_bytes, kept_bytes, step_bytes, checked_bytes
+    nodes_before = len(known_nodes)
+    bytes_before = measureMemoryUsage()
+
+    # Marquage : toutes les nodes accessibles depuis les racines
+    marked = set()
+    stack = [node for node in roots + tuple(empty_nodes) if node is not None]
+    while stack:
+        node = stack.pop()
+        if id(node) in marked:
+            continue
+        marked.add(id(node))
+        if node.depth > 1:
+            stack.extend((node.a, node.b, node.c, node.d))
+
+    # Balayage : on reconstruit la table canonique avec les nodes marquées et on oublie les résultats vers les autres
+    kept_nodes = {key: node for key, node in known_nodes.items() if id(node) in marked}
+    for node in kept_nodes.values():
+        result = node.result
+        for i in range(len(result)):
+            if result[i] is not None and id(result[i]) not in marked:
+                result[i] = None
+    known_nodes.clear()
+    known_nodes.update(kept_nodes)
+    edit_cache.clear()
+    block_keys.clear()
+    block_nodes.clear()
+
+    bytes_after = measureMemoryUsage()
+    kept_bytes = checked_bytes = bytes_after
+    step_bytes = 0
+    if known_nodes:
+        average_node_bytes = bytes_after / len(known_nodes)
+    return {"nodes_before": nodes_before, "nodes_after": len(known_nodes),
+            "bytes_before": bytes_before, "bytes_after": bytes_after, "bytes_freed": bytes_before - bytes_after}
+
+
+def clearNodes():  # Vide les tables de nodes : les nodes créées avant ne doivent plus être utilisées
+    global kept_bytes, step_bytes, checked_bytes
+    kept_bytes = step_bytes = checked_bytes = 0
+    edit_cache.clear()
+    block_keys.clear()
+    block_nodes.clear()
+    known_nodes.clear()
+    empty_nodes[:] = [newNode(1, False, False, False, False)]
+
+
+def createStats():  # Retourne des compteurs à zéro
+    return {"node_hits": 0, "node_misses": 0, "evolve_hits": defaultdict(int), "evolve_misses": defaultdict(int),
+            "steps": 0, "step_seconds": 0.0, "max_step_seconds": 0.0}
+
+
+def countedNewNode(depth, a, b, c, d):  # newNode qui compte les nodes déjà présentes dans known_nodes
+    counters = stats
+    if counters is not None:
+        counters["node_hits" if (a, b, c, d) in known_nodes else "node_misses"] += 1
+    return uncountedNewNode(depth, a, b, c, d)
+
+
+def countedEvolve(self, temporal_compression_level, is_root=False):  # Node.evolve qui compte, par profondeur, les résultats déjà en cache
+    counters = stats
+    if counters is not None:
+        if temporal_compression_level == -1:
+            index = len(self.result)-1
+        else:
+            index = min(temporal_compression_level, len(self.result)-1)
+        if is_root:
+            index = min(index, self.depth-3)
+        counters["evolve_misses" if self.result[index] is None else "evolve_hits"][self.depth] += 1
+    return uncountedEvolve(self, temporal_compression_level, is_root)
+
+
+def enableStats():  # Active les compteurs : newNode et Node.evolve sont remplacées par leurs versions qui comptent
+    global stats, newNode
+    if stats is None:
+        stats = createStats()
+        newNode = countedNewNode
+        Node.evolve = countedEvolve
+
+
+def disableStats():  # Désactive les compteurs : les fonctions d'origine sont remises, sans aucun coût supplémentaire
+    global stats, newNode
+    newNode = uncountedNewNode
+    Node.evolve = uncountedEvolve
+    stats = None
+
+
+def countStep(seconds):  # Ajoute la durée d'une étape de simulation aux compteurs (s'ils sont activés)
+    counters = stats
+    if counters is not None:
+        counters["steps"] += 1
+        counters["step_seconds"] += seconds
+        counters["max_step_seconds"] = max(counters["max_step_seconds"], seconds)
+
+
+def takeStats():  # Retourne les compteurs accumulés depuis le dernier appel (avec la taille des tables) et les remet à zéro
+    global stats
+    if stats is None:
+        return None
+    taken, stats = stats, createStats()
+    taken["known_nodes"] = len(known_nodes)
+    taken["edit_cache"] = len(edit_cache)
+    return taken
+
+# Création des tables de nodes
+
+edit_cache = {}
+known_nodes = {}
+block_keys = {}  # Node 4x4 → ses 16 cellules sous forme d'entier (cellule x, y au bit y*4+x)
+block_nodes = {}  # Inverse de block_keys
+average_node_bytes = 300  # Taille moyenne d'une node mesurée lors du dernier ramasse-miettes (table, clé et résultats compris)
+kept_bytes = 0  # Mémoire des nodes gardées par le dernier ramasse-miettes
+step_bytes = 0  # Mémoire des nodes créées par la plus grosse étape depuis le dernier ramasse-miettes
+checked_bytes = 0  # Mémoire des nodes lors du dernier appel de needsGarbageCollection
+empty_nodes = [newNode(1, False, False, False, False)]
+base_results = buildBaseResults()
+
+# Compteurs (désactivés par défaut)
+
+stats = None  # Compteurs depuis le dernier takeStats(), None s'ils sont désactivés
+uncountedNewNode = newNode
+uncountedEvolve = Node.evolve
@@ -0,0 +1,231 @@
+"""
+Évolution Hashlife multi-processus pour les niveaux du haut de l'arbre.
+
+Près de la racine, les 9 sous-évolutions puis les 4 évolutions intermédiaires d'une node sont indépendantes.
+Sur les ParallelEvolver.levels niveaux du haut, elles sont regroupées par lots et envoyées à des processus.
+Chaque processus garde sa propre table de nodes canoniques et ses résultats en cache d'un appel à l'autre.
+
+Les nodes circulent sous une forme compacte : une suite d'entiers (profondeur, a, b, c, d) par node, où a, b, c, d
+sont les 4 cellules d'une node 2x2 ou les numéros des sous-nodes. Le processus principal et chaque processus
+numérotent les nodes échangées dans le même ordre, ce qui permet de n'envoyer que les nodes que l'autre ne connait pas encore.
+
+Mesure du temps par appel de simulateCells() avec et sans processus :
+python hashlife_parallel.py clock.rle --workers 4 --levels 2 --steps 10 --level 4
+"""
+
+# Importation des librairies
+
+from array import array
+from multiprocessing import Pipe, Process
+from os import cpu_count
+import hashlife
+
+
+class NodeTable:  # Numérotation des nodes partagée entre le processus principal et un processus de calcul
+
+    def __init__(self):
+        self.nodes = []
+        self.indices = {}
+
+    def encode(self, node, data):  # Ajoute à data les nodes encore inconnues de l'autre processus et retourne le numéro de node
+        index = self.indices.get(node)
+        if index is not None:
+            return index
+        if node.depth == 1:
+            data.extend((1, node.a, node.b, node.c, node.d))
+        else:
+            data.extend((node.depth, self.encode(node.a, data), self.encode(node.b, data),
+                         self.encode(node.c, data), self.encode(node.d, data)))
+        return self.add(node)
+
+    def decode(self, data, start):  # Crée (ou retrouve) les nodes canoniques reçues à partir de data[start:]
+        nodes = self.nodes
+        for i in range(start, len(data), 5):
+            depth, a, b, c, d = data[i:i+5]
+            if depth == 1:
+                self.add(hashlife.newNode(1, bool(a), bool(b), bool(c), bool(d)))
+            else:
+                self.add(hashlife.newNode(depth, nodes[a], nodes[b], nodes[c], nodes[d]))
+
+    def add(self, node):
+        self.indices[node] = len(self.nodes)
+        self.nodes.append(node)
+        return self.indices[node]
+
+
+def workerLoop(connection):  # Boucle d'un processus de calcul : reçoit des nodes à faire évoluer et renvoie leurs résultats
+    table = NodeTable()
+    while True:
+        message = connection.recv_bytes()
+        if not message:
+            break
+        data = array("q")
+        data.frombytes(message)
+        temporal_compression_level, task_count = data[0], data[1]
+        if task_count == -1:  # Le processus principal a ramassé ses nodes : on repart de zéro
+            table = NodeTable()
+            hashlife.clearNodes()
+            continue
+        table.decode(data, 2+task_count)
+        response = array("q", [task_count])
+        response.extend([0] * task_count)  # Place réservée pour les numéros des résultats
+        for i in range(task_count):
+            result = table.nodes[data[2+i]].evolve(temporal_compression_level)
+            response[1+i] = table.encode(result, response)
+        connection.send_bytes(response.tobytes())
+
+
+def gather(tasks):  # Fait avancer plusieurs générateurs d'évolution ensemble pour regrouper leurs demandes en un seul lot
+    results = [None] * len(tasks)
+    pending = {}
+    for i, task in enumerate(tasks):
+        try:
+            pending[i] = next(task)
+        except StopIteration as stop:
+            results[i] = stop.value
+    while pending:
+        responses = yield [node for request in pending.values() for node in request]
+        position = 0
+        still_pending = {}
+        for i, request in pending.items():
+            try:
+                still_pending[i] = tasks[i].send(responses[position:position+len(request)])
+            except StopIteration as stop:
+                results[i] = stop.value
+            position += len(request)
+        pending = still_pending
+    return results
+
+
+def evolveTask(node, temporal_compression_level, levels, is_root=False):  # Générateur qui reproduit Node.evolve en déléguant les nodes de niveau inférieur
+    if temporal_compression_level == -1:
+        self_temporal_compression = len(node.result)-1
+    else:
+        self_temporal_compression = min(temporal_compression_level, len(node.result)-1)
+    if is_root:
+        self_temporal_compression = min(self_temporal_compression, node.depth-3)
+    if node.n == 0 or node.depth <= ParallelEvolver.MIN_DEPTH:  # Node.evolve compte elle-même son résultat en cache
+        return node.evolve(temporal_compression_level, is_root)
+    result = node.result[self_temporal_compression]
+    counters = hashlife.stats  # Compteurs de hashlife.enableStats, comme dans hashlife.countedEvolve
+    if counters is not None:
+        counters["evolve_misses" if result is None else "evolve_hits"][node.depth] += 1
+    if result != None:
+        return result
+    if levels == 0:  # Node calculée par un processus
+        return (yield [node])[0]
+
+    depth = node.depth
+    sub_nodes = (node.a,
+                 hashlife.newNode(depth-1, node.a.b, node.b.a, node.a.d, node.b.c),
+                 node.b,
+                 hashlife.newNode(depth-1, node.a.c, node.a.d, node.c.a, node.c.b),
+                 node.getCenterNode(),
+                 hashlife.newNode(depth-1, node.b.c, node.b.d, node.d.a, node.d.b),
+                 node.c,
+                 hashlife.newNode(depth-1, node.c.b, node.d.a, node.c.d, node.d.c),
+                 node.d)
+    r = yield from gather([evolveTask(sub_node, temporal_compression_level, levels-1) for sub_node in sub_nodes])
+    intermediate_nodes = (hashlife.newNode(depth-1, r[0], r[1], r[3], r[4]),
+                          hashlife.newNode(depth-1, r[1], r[2], r[4], r[5]),
+                          hashlife.newNode(depth-1, r[3], r[4], r[6], r[7]),
+                          hashlife.newNode(depth-1, r[4], r[5], r[7], r[8]))
+    if self_temporal_compression == depth-2:
+        result = hashlife.newNode(depth-1, *(yield from gather([evolveTask(intermediate_node, temporal_compression_level, levels-1)
+                                                                 for intermediate_node in intermediate_nodes])))
+    else:
+        result = hashlife.newNode(depth-1, *(intermediate_node.getCenterNode() for intermediate_node in intermediate_nodes))
+    node.result[self_temporal_compression] = result
+    return result
+
+
+class ParallelEvolver:  # Répartit l'évolution des niveaux du haut de la racine sur plusieurs processus
+
+    MIN_DEPTH = 6  # En dessous, une node est trop petite pour valoir un envoi à un processus
+
+    def __init__(self, workers=None, levels=2):
+        self.levels = levels
+        self.connections = []
+        self.processes = []
+        self.tables = []
+        for _ in range(workers or cpu_count() or 1):
+            connection, worker_connection = Pipe()
+            process = Process(target=workerLoop, args=(worker_connection,), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+            self.tables.append(NodeTable())
+
+    def evolve(self, root, temporal_compression_level):  # Équivalent de root.evolve(temporal_compression_level, True)
+        task = evolveTask(root, temporal_compression_level, self.levels, True)
+        try:
+            request = next(task)
+            while True:
+                results = self.compute(request, temporal_compression_level)
+                request = task.send([results[node] for node in request])
+        except StopIteration as stop:
+            return stop.value
+
+    def compute(self, nodes, temporal_compression_level):  # Fait évoluer un lot de nodes sur les processus, retourne {node: résultat}
+        batches = [[] for _ in self.connections]
+        for node in dict.fromkeys(nodes):  # Une même node va toujours au même processus, qui a déjà son résultat en cache
+            batches[hash(node) % len(batches)].append(node)
+        for connection, table, batch in zip(self.connections, self.tables, batches):
+            if batch:
+                data = array("q", [temporal_compression_level, len(batch)])
+                data.extend([0] * len(batch))
+                for i, node in enumerate(batch):
+                    data[2+i] = table.encode(node, data)
+                connection.send_bytes(data.tobytes())
+        results = {}
+        for connection, table, batch in zip(self.connections, self.tables, batches):
+            if batch:
+                data = array("q")
+                data.frombytes(connection.recv_bytes())
+                table.decode(data, 1+data[0])
+                for i, node in enumerate(batch):
+                    result = table.nodes[data[1+i]]
+                    level = len(node.result)-1 if temporal_compression_level == -1 else min(temporal_compression_level, len(node.result)-1)
+                    node.result[level] = result
+                    results[node] = result
+        return results
+
+    def reset(self):  # Oublie les nodes échangées (à appeler après hashlife.collectGarbage)
+        for connection in self.connections:
+            connection.send_bytes(array("q", [0, -1]).tobytes())
+        self.tables = [NodeTable() for _ in self.connections]
+
+    def close(self):  # Arrête les processus
+        for connection in self.connections:
+            connection.send_bytes(b"")
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description="Temps par appel de simulateCells() avec et sans processus")
+    parser.add_argument("rle", help="fichier RLE à simuler")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--levels", type=int, default=2, help="nombre de niveaux du haut répartis sur les processus")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--level", type=int, default=4, help="niveau de compression temporelle")
+    args = parser.parse_args()
+
+    for name in ("séquentiel", "parallèle"):
+        hashlife.clearNodes()  # Chaque mesure part d'un cache vide
+        root = hashlife.loadRLEFile(args.rle)
+        evolver = ParallelEvolver(args.workers, args.levels) if name == "parallèle" else None
+        durations = []
+        for _ in range(args.steps):
+            start = perf_counter()
+            root = hashlife.simulateRoot(root, args.level, evolver.evolve if evolver else None)
+            durations.append(perf_counter() - start)
+        if evolver:
+            evolver.close()
+        print(f"{name} : {1000*sum(durations)/len(durations):.1f} ms par appel "
+              f"(premier {1000*durations[0]:.1f} ms, dernier {1000*durations[-1]:.1f} ms), population {root.n}")
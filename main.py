@@ -3,25 +3,44 @@ Ce programme est une simulation du jeu de la vie de Conway.
 
 - Clic gauche pour changer l'état d'une cellule
 - Espace pour lancer/arrêter la simulation
+- M pour simuler aussi vite que possible (sans limite de vitesse)
 - Molette de souris ou défilement à 2 doigts pour zoomer/dézoomer
 - Flèches directionnelles pour se déplacer sur la grille
 - Shift + flèches pour aller plus vite
-- Ctrl + Z durant pour revenir à l'état précédent de la grille
+- Ctrl + Z pour annuler la dernière modification (clic, collage, simulation ou vidage), plusieurs fois pour remonter l'historique
+- Ctrl + Y pour refaire une modification annulée
 - Ctrl + X pour vider la grille
 - Shift + sélectionner une zone avec la souris pour ajouter une structure au catalogue
 - Ctrl + clic pour supprimer un élément du catalogue
 
 Pour rajouter des structures au catalogue depuis internet, télécharger un fichier RLE sur un site (exemple : https://conwaylife.appspot.com/library)
-et exécuter le script 'rle2json.py' en fournissant le chemin du fichier RLE quand demandé.
+et exécuter le script 'rle2catalog.py' en fournissant le chemin du fichier RLE quand demandé.
+
+La simulation tourne dans un fil séparé (module 'simulation.py') : l'affichage reste à 60 images par seconde quelle que soit la vitesse.
+L'historique ne garde que les cellules qui ont changé d'état à chaque modification, dans la limite de HISTORY_BUDGET octets
+(les modifications les plus anciennes sont oubliées au-delà).
+Pour simuler sans fenêtre (serveur sans affichage, mesures de performance), utiliser le module 'engine.py'.
+Si NumPy est installé, les populations denses sont simulées sur une grille NumPy (module 'dense.py').
+Les cellules sont alors affichées en une seule image (module 'raster.py') : en dézoomant sous 1 pixel par cellule,
+chaque pixel regroupe plusieurs cellules et son gris indique leur densité.
+Pour forcer un moteur, donner son nom en argument : 'python main.py dense', 'python main.py packed' (64 cellules par mot)
+ou 'python main.py tiled' (tuiles calculées en parallèle sur tous les cœurs).
 """
 
 # Importation des librairies
 
 import pygame
-from json import load, dump
-from collections import defaultdict
+from catalog import loadCatalog
+import thumbnails
+from math import floor, log2
+from sys import argv
+from engine import ENGINES, SetEngine
+from simulation import SimulationThread
 
-pygame.init()  # Initiation de pygame
+try:
+    import raster
+except ImportError:  # NumPy n'est pas installé : les cellules sont dessinées une par une
+    raster = None
 
 
 class RangeButton:  # Class du bouton de vitesse de simulation
@@ -58,21 +77,19 @@ class CatalogItem:  # Class représentant les structures du catalogue
     PREVIEW_SIZE = 120
     INTERVAL = 16
     max_index = -1
-    FONT = pygame.font.SysFont("arial", 18)
+    FONT = None  # Police des aperçus, créée après l'initialisation de pygame
     
     def __init__(self, index):
         self.index = index
         if index > CatalogItem.max_index:
             CatalogItem.max_index = index
-        self.structure = catalog[index]
         self.touching_mouse = False
         self.rect = pygame.Rect(0, 0, 0, 0)
-        self.preview = pygame.Surface((self.PREVIEW_SIZE, self.PREVIEW_SIZE), pygame.SRCALPHA)
+        self.preview = None  # L'aperçu est lu dans le cache au premier affichage, la surface est créée au premier collage
         self.surface = None
-        self.instant_paste = False
+        entry = catalog.getEntry(index)
+        self.instant_paste = entry.width*entry.height > 10000
         self.tick()
-        self.createSurface()
-        self.createPreview()
         
     def tick(self):  # Mise à jour des coordonnées et vérification de la collision avec la souris
         item_per_line = (window_size[0]-self.INTERVAL-16) // (self.SIZE+self.INTERVAL)
@@ -88,72 +105,77 @@ class CatalogItem:  # Class représentant les structures du catalogue
     def display(self):  # Affichage
         color = ((180, 120, 135) if keys[pygame.K_LCTRL] else (185, 205, 225)) if self.touching_mouse else (175, 200, 230)
         pygame.draw.rect(window, color, self.rect, border_radius=10)
+        if self.preview is None:
+            self.createPreview()
         window.blit(self.preview, (self.rect.x+(self.SIZE-self.PREVIEW_SIZE)//2, self.rect.y+(self.SIZE-self.PREVIEW_SIZE)//2))
         
-    def createSurface(self):  # Création de la surface représentatant la structure
-        if self.structure:
-            x_axis, y_axis = tuple(zip(*self.structure))
-            min_x_axis = min(x_axis)
-            min_y_axis = min(y_axis)
-            width = max(x_axis) - min_x_axis + 1
-            height = max(y_axis) - min_y_axis + 1
-        else:
-            width, height = 0, 0
-        if width*height > 10000:
-            self.instant_paste = True
-            if width*height > 10000000:
-                width, height = 0, 0
-        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        for x, y in self.structure:
-            self.surface.set_at((x-min_x_axis, y-min_y_axis), BLACK)
+    def getSurface(self):  # Surface représentant la structure, créée au premier besoin
+        if self.surface is None:
+            self.surface = thumbnails.createSurface(catalog, self.index)
+        return self.surface
         
-    def createPreview(self):  # Création de l'aperçu à partir de la surface
-        width, height = self.surface.get_size()
-        if 0 < width and 0 < height:
-            scale = min(self.PREVIEW_SIZE / width, self.PREVIEW_SIZE / height)
-            scaled = pygame.transform.scale_by(self.surface, scale)
-            size = scaled.get_size()
-            self.preview.blit(scaled, (self.PREVIEW_SIZE//2-size[0]//2, self.PREVIEW_SIZE//2-size[1]//2))
-        else:
+    def createPreview(self):  # Aperçu lu dans le cache du disque (créé et enregistré la première fois)
+        self.preview = thumbnails.loadPreview(catalog, self.index, self.PREVIEW_SIZE)
+        if self.preview is None:
+            self.preview = pygame.Surface((self.PREVIEW_SIZE, self.PREVIEW_SIZE), pygame.SRCALPHA)
             txt = self.FONT.render("Aucun aperçu", True, (100, 125, 145))
             txt_size = txt.get_size()
             self.preview.blit(txt, (self.PREVIEW_SIZE//2-txt_size[0]//2, self.PREVIEW_SIZE//2-txt_size[1]//2))
 
 # Définition des fonctions
 
-def simulateCells():  # Simule les cellules
-    global init_simulation
-    if init_simulation:
-        neighbors.clear()
-        for y, x in living_cells:  # On compte le nombre de voisins de chaque cellule en possèdant au moins 1
-            for dx, dy in NEIGHBORS:
-                neighbors[y+dy, x+dx] += 1
-        init_simulation = False
-        
-    to_kill = []
-    to_birth = []
-    
-    for cell in living_cells:  # On retient les cellules vivantes n'ayant pas un nombre de voisins entre 2 et 3
-        if not 1 < neighbors.get(cell, 0) < 4:
-            to_kill.append(cell)
+def simulateCells(engine):  # Étape du fil de simulation (le moteur passe seul sur une grille dense NumPy quand la population est dense)
+    engine.step()
+    return engine
 
-    for cell, n in neighbors.items():  # On retient les cellules mortes qui possèdent 3 voisins
-        if n == 3 and cell not in living_cells:
-            to_birth.append(cell)
-    
-    for y, x in to_birth:  # On fait naitre les cellules
-        living_cells.add((y, x))
-        for dx, dy in NEIGHBORS:
-            neighbors[y+dy, x+dx] += 1
-     
-    for y, x in to_kill:  # On tue les cellules
-        living_cells.discard((y, x))
-        for dx, dy in NEIGHBORS:
-            count = neighbors[y+dy, x+dx] - 1
-            if count:
-                neighbors[y+dy, x+dx] = count
-            else:
-                del neighbors[y+dy, x+dx]
+
+def takeSnapshot(engine):  # Copie des cellules lue par l'affichage pendant la simulation
+    if not raster:
+        return list(engine.living_cells)
+    if engine.cells_outdated:  # Les cellules sont lues directement dans la grille dense
+        return engine.dense_grid.getCoordinates()
+    return raster.cellsToArrays(engine.living_cells)
+
+
+def startSimulation():  # Lance le fil de simulation à partir de la grille actuelle
+    global simulating
+    simulating = True
+    engine.startRecording()
+    simulation.resume(engine)
+
+
+def stopSimulation():  # Met en pause le fil de simulation et enregistre ses changements dans l'historique
+    global simulating
+    if simulating:
+        simulating = False
+        simulation.pause()
+        recordChange(engine.stopRecording())
+
+
+def recordChange(cells):  # Enregistre une modification (ensemble des cellules qui ont changé d'état) dans l'historique
+    global history_cells
+    if not cells:
+        return
+    history_cells -= sum(map(len, redo_history))
+    redo_history.clear()
+    undo_history.append(cells)
+    history_cells += len(cells)
+    while history_cells * CELL_BYTES > HISTORY_BUDGET and len(undo_history) > 1:  # On oublie les modifications les plus anciennes
+        history_cells -= len(undo_history.pop(0))
+
+
+def undoChange():  # Annule la dernière modification (une modification inverse l'état de ses cellules)
+    if undo_history:
+        cells = undo_history.pop()
+        engine.toggleCells(cells)
+        redo_history.append(cells)
+
+
+def redoChange():  # Refait la dernière modification annulée
+    if redo_history:
+        cells = redo_history.pop()
+        engine.toggleCells(cells)
+        undo_history.append(cells)
 
 
 def displayGrid(line_width):  # Affiche la grille
@@ -163,9 +185,19 @@ def displayGrid(line_width):  # Affiche la grille
         pygame.draw.line(window, GRAY, (0, y), (window_size[0], y), line_width)
         
 
-def displayCells():  # Affiche les cellules
-    for i, j in living_cells:
-        pygame.draw.rect(window, BLACK, (j*cell_size-scroll_x+window_size[0]//2, i*cell_size-scroll_y+window_size[1]//2, cell_size, cell_size))
+def displayCells():  # Affiche les cellules visibles dans la fenêtre (en une seule image avec NumPy)
+    top = (scroll_y-window_size[1]//2) / cell_size
+    left = (scroll_x-window_size[0]//2) / cell_size
+    cells = simulation.getSnapshot() if simulating else None  # Pendant la simulation, dernier instantané publié par le fil
+    if raster:
+        y_axis, x_axis = cells if simulating else raster.cellsToArrays(living_cells)
+        raster.drawCells(window, y_axis, x_axis, top, left, cell_size)
+        return
+    bottom = top + window_size[1]/cell_size
+    right = left + window_size[0]/cell_size
+    for i, j in cells if simulating else living_cells:
+        if top-1 < i < bottom and left-1 < j < right:
+            pygame.draw.rect(window, BLACK, (j*cell_size-scroll_x+window_size[0]//2, i*cell_size-scroll_y+window_size[1]//2, max(1, cell_size), max(1, cell_size)))
                 
                 
 def onMouseClick(nb_clicks, x, y):  # Clic de souris
@@ -189,9 +221,9 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
                                 catalog_item_.index -= 1
                     else:
                         if catalog_item.instant_paste:
-                            w, h = catalog_item.surface.get_size()
-                            i = scroll_y // cell_size
-                            j = scroll_x // cell_size
+                            w, h = catalog_item.getSurface().get_size()
+                            i = floor(scroll_y / cell_size)
+                            j = floor(scroll_x / cell_size)
                             pasteCatalogItem(catalog_item.index, j-w//2, i-h//2)
                         else:
                             copied_item = catalog_item
@@ -201,11 +233,11 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
     elif mouse[0] == 1 and mouse[2] >= window_size[1]-16:
         opening_catalog = True
         return
-    i = (y+scroll_y-window_size[1]//2) // cell_size
-    j = (x+scroll_x-window_size[0]//2) // cell_size
+    i = floor((y+scroll_y-window_size[1]//2) / cell_size)
+    j = floor((x+scroll_x-window_size[0]//2) / cell_size)
     if copied_item:
         if nb_clicks == 1:
-            w, h = copied_item.surface.get_size()
+            w, h = copied_item.getSurface().get_size()
             pasteCatalogItem(copied_item.index, j-w//2, i-h//2)
             if keys[pygame.K_LSHIFT] == 0:
                 copied_item = None
@@ -219,15 +251,14 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
         copy_rect[2] = j-copy_rect[0]
         copy_rect[3] = i-copy_rect[1]
     if brush == None: return
-    if brush:
-        living_cells.discard((i, j))
-    else:
-        living_cells.add((i, j))
+    if ((i, j) in living_cells) == brush:
+        engine.setCell((i, j), not brush)
+        stroke.add((i, j))
         
 
 def displayStats():  # Affiche le bandeau de statistique en haut de l'écran
     pygame.draw.rect(window, BLACK, (window_size[0]//2-210, -40, 420, 110), border_radius=40)
-    txt = font.render(f"Vitesse de simulation : {simulation_speed} ticks/s", True, WHITE)
+    txt = font.render("Vitesse de simulation : max" if max_speed else f"Vitesse de simulation : {simulation_speed} ticks/s", True, WHITE)
     txt_size = txt.get_size()
     window.blit(txt, (window_size[0]//2-txt_size[0]//2, 20-txt_size[1]//2))
     pygame.draw.rect(window, LIGHT_GRAY, (window_size[0]//2-160, 48, 320, 5), border_radius=2)
@@ -238,20 +269,31 @@ def changeCellSize(value):  # Zoom / Dezoom
     global cell_size, scroll_x, scroll_y
     real_scroll_x = scroll_x / cell_size
     real_scroll_y = scroll_y / cell_size
-    cell_size = max(1, value)
+    if value >= 1:
+        cell_size = round(value)
+    else:  # Plusieurs cellules par pixel : toujours une puissance de 2
+        cell_size = max(MIN_CELL_SIZE, 2**floor(log2(value))) if value > 0 else MIN_CELL_SIZE
     scroll_x = round(real_scroll_x*cell_size)
     scroll_y = round(real_scroll_y*cell_size)
     
     
+def zoomCells(steps):  # Zoom de la molette : x1.1 par cran (au moins 1 pixel), puis x2 en dessous d'un pixel par cellule
+    if cell_size < 1 or (cell_size == 1 and steps < 0):
+        changeCellSize(cell_size * 2**steps)
+    else:
+        value = round(cell_size * 1.1**steps)
+        changeCellSize(value if value != cell_size else cell_size + (1 if steps > 0 else -1))
+    
+    
 def updateCatalog():  # Actualise la position du catalogue
     global catalog_y
     if opening_catalog:
-        catalog_y += (window_size[1]-160-catalog_y) // 4
+        catalog_y += (window_size[1]-160-catalog_y) // 8
     else:
-        if 0 < catalog_y < 4:
+        if 0 < catalog_y < 8:
             catalog_y -= 1
         else:
-            catalog_y -= catalog_y // 4
+            catalog_y -= catalog_y // 8
             
     if catalog_y > 0:
         for catalog_item in catalog_items:
@@ -276,21 +318,22 @@ def pasteCatalogItem(index, x, y):  # Colle un élément du catalogue sur la gri
     structure = catalog[index]
     if not structure:
         return
-    x_axis, y_axis = tuple(zip(*structure))
-    min_x_axis = min(x_axis)
-    min_y_axis = min(y_axis)
-    for cell_x, cell_y in structure:
-        cell = (cell_y+y-min_y_axis, cell_x+x-min_x_axis)
-        living_cells.add(cell)
+    entry = catalog.getEntry(index)
+    min_x_axis = entry.x
+    min_y_axis = entry.y
+    added = {(cell_y+y-min_y_axis, cell_x+x-min_x_axis) for cell_x, cell_y in structure} - living_cells
+    for cell in added:
+        engine.setCell(cell, True)
+    recordChange(added)
         
 
 def displayCopiedItem():  # Affiche la structure copiée du catalogue
     if copied_item:
-        surface = pygame.transform.scale_by(copied_item.surface, cell_size)
+        surface = pygame.transform.scale_by(copied_item.getSurface(), cell_size)
         surface.set_alpha(160)
-        w, h = copied_item.surface.get_size()
-        x = ((mouse[1]+scroll_x-window_size[0]//2) // cell_size - w//2) * cell_size - scroll_x + window_size[0]//2
-        y = ((mouse[2]+scroll_y-window_size[1]//2) // cell_size - h//2) * cell_size - scroll_y + window_size[1]//2
+        w, h = copied_item.getSurface().get_size()
+        x = (floor((mouse[1]+scroll_x-window_size[0]//2) / cell_size) - w//2) * cell_size - scroll_x + window_size[0]//2
+        y = (floor((mouse[2]+scroll_y-window_size[1]//2) / cell_size) - h//2) * cell_size - scroll_y + window_size[1]//2
         window.blit(surface, (x, y))
         
 
@@ -316,91 +359,82 @@ def addToCatalog(copy_rect):  # Ajoute la zone sélectionnée au catalogue
     
 def displayCopyRect():  # Affiche le rectangle de sélection
     rect = absRect(copy_rect)
-    surface = pygame.Surface(((rect[2]+1)*cell_size, (rect[3]+1)*cell_size), pygame.SRCALPHA)
+    surface = pygame.Surface((max(1, floor((rect[2]+1)*cell_size)), max(1, floor((rect[3]+1)*cell_size))), pygame.SRCALPHA)
     surface.fill(GREEN)
     surface.set_alpha(120)
     window.blit(surface, (window_size[0]//2-scroll_x+rect[0]*cell_size, window_size[1]//2-scroll_y+rect[1]*cell_size))
   
-# Chargement des données            
+if __name__ == "__main__":  # Les processus du moteur en tuiles réimportent ce fichier (méthode spawn) : ils ne doivent pas ouvrir de fenêtre
 
-try:
-    with open("catalog.json", "r") as f:
-        catalog = load(f)
-except FileNotFoundError:
-    catalog = []
-    with open("catalog.json", "x") as f:
-        dump([], f)
-
-# Définition des couleurs
-
-WHITE = (255, 255, 255)
-LIGHT_GRAY = (220, 220, 220)
-GRAY = (128, 128, 128)
-BLACK = (0, 0, 0)
-GREEN = (0, 255, 0)
-
-# Création de la fenêtre et autres
-
-window_size = (800, 600)
-MIN_SIZE = (400, 300)
-window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
-pygame.display.set_caption("Conway's Game of Life")
-clock = pygame.time.Clock()
-
-font = pygame.font.SysFont("arial", 24)
-
-cell_size = 40
-living_cells = set()  # Stocke la liste des coordonnées (y, x) de chaque cellule vivante
-NEIGHBORS = ((-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1))
-neighbors = defaultdict(int)
-init_simulation = True
-simulating = False
-simulation_speed = 5
-MAX_SPEED = 100
-speed_button = RangeButton(50, 320)
-mouse = [0, 0, 0]  # Informations sur la souris : [durée du clic, x, y]
-LOOP_SPEED = 30
-simulation_loop_ticks = 0
-main_loop_ticks = 0
-scroll_x = 0
-scroll_y = 0
-keys = dict((key, 0) for key in (pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
-                                 pygame.K_SPACE, pygame.K_LSHIFT, pygame.K_z, pygame.K_LCTRL,
-                                 pygame.K_x, pygame.K_LALT))
-brush = None
-last_matrix = None
-catalog_y = 0
-opening_catalog = False
-catalog_items = []
-copied_item = None
-for i in range(len(catalog)):
-    catalog_items.append(CatalogItem(i))
-copy_rect = None
-save_catalog = False
-
-running = True
-
-while running:
-        
-    # Boucle de simulation
-    
-    if simulating:
-        simulation_loop_ticks += 1
-        if simulation_loop_ticks >= MAX_SPEED / simulation_speed:
-            simulation_loop_ticks -= MAX_SPEED / simulation_speed
-            simulateCells()
-        
-    # Boucle principale
-    
-    main_loop_ticks += 1
-    
-    if main_loop_ticks >= MAX_SPEED / LOOP_SPEED:
-        main_loop_ticks -= MAX_SPEED / LOOP_SPEED
+    pygame.init()  # Initiation de pygame
+
+    # Chargement des données            
+
+    catalog = loadCatalog()  # Seul l'index est lu : les cellules d'une structure sont lues quand elle est affichée ou collée
+
+    # Définition des couleurs
+
+    WHITE = (255, 255, 255)
+    LIGHT_GRAY = (220, 220, 220)
+    GRAY = (128, 128, 128)
+    BLACK = (0, 0, 0)
+    GREEN = (0, 255, 0)
+
+    # Création de la fenêtre et autres
+
+    window_size = (800, 600)
+    MIN_SIZE = (400, 300)
+    window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+    pygame.display.set_caption("Conway's Game of Life")
+    clock = pygame.time.Clock()
+
+    font = pygame.font.SysFont("arial", 24)
+    CatalogItem.FONT = pygame.font.SysFont("arial", 18)
+
+    cell_size = 40
+    MIN_CELL_SIZE = 1/64  # 64 x 64 cellules par pixel au plus
+    if len(argv) > 1 and issubclass(ENGINES.get(argv[1], object), SetEngine):
+        engine = ENGINES[argv[1]]()
+    else:
+        engine = SetEngine()
+    living_cells = engine.living_cells  # Stocke la liste des coordonnées (y, x) de chaque cellule vivante
+    simulation = SimulationThread(simulateCells, takeSnapshot)
+    simulating = False
+    simulation_speed = 5
+    max_speed = False
+    MAX_SPEED = 100
+    speed_button = RangeButton(50, 320)
+    mouse = [0, 0, 0]  # Informations sur la souris : [durée du clic, x, y]
+    LOOP_SPEED = 60
+    scroll_x = 0
+    scroll_y = 0
+    keys = dict((key, 0) for key in (pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
+                                     pygame.K_SPACE, pygame.K_LSHIFT, pygame.K_z, pygame.K_LCTRL,
+                                     pygame.K_x, pygame.K_LALT, pygame.K_m, pygame.K_y))
+    brush = None
+    stroke = set()  # Cellules modifiées depuis le début du clic en cours
+    HISTORY_BUDGET = 256 * 2**20  # Mémoire maximale de l'historique (en octets)
+    CELL_BYTES = 160  # Mémoire d'une cellule (y, x) dans un ensemble Python
+    undo_history = []  # Modifications annulables, de la plus ancienne à la plus récente
+    redo_history = []  # Modifications annulées, de la plus ancienne à la plus récente annulation
+    history_cells = 0  # Nombre de cellules enregistrées dans les 2 historiques
+    catalog_y = 0
+    opening_catalog = False
+    catalog_items = []
+    copied_item = None
+    for i in range(len(catalog)):
+        catalog_items.append(CatalogItem(i))
+    copy_rect = None
+    save_catalog = False
+
+    running = True
+
+    while running:
 
         for key in keys:
             if keys[key] > 0:
                 keys[key] += 1
-            
+        
         for event in pygame.event.get():  # Boucle d'évènements
             if event.type == pygame.QUIT:
                 running = False
@@ -411,59 +445,77 @@ while running:
                 if event.key in keys:
                     keys[event.key] = 0
             elif event.type == pygame.MOUSEWHEEL:
-                changeCellSize(round(cell_size * 1.1**event.y))
+                zoomCells(event.y)
             elif event.type == pygame.VIDEORESIZE:
                 if event.size[0] < MIN_SIZE[0] or event.size[1] < MIN_SIZE[1]:
                     window = pygame.display.set_mode((max(event.size[0], MIN_SIZE[0]), max(event.size[1], MIN_SIZE[1])), pygame.RESIZABLE)
-                    
+                
         # Mise à jour des données
+    
+        if not simulating:  # Pendant la simulation, l'affichage n'a pas besoin de living_cells à jour
+            engine.syncCells()
+    
+        if keys[pygame.K_z] == 1 and keys[pygame.K_LCTRL] > 0:
+            stopSimulation()
+            undoChange()
+
+        if keys[pygame.K_y] == 1 and keys[pygame.K_LCTRL] > 0:
+            stopSimulation()
+            redoChange()
         
-        if keys[pygame.K_z] == 1 and keys[pygame.K_LCTRL] > 0 and last_matrix:
-            simulating = False
-            living_cells = last_matrix.copy()
-            
         if keys[pygame.K_x] == 1 and keys[pygame.K_LCTRL] > 0:
-            living_cells.clear()
-            neighbors.clear()
+            restart = simulating
+            stopSimulation()
+            recordChange(set(living_cells))
+            engine.clearCells()
+            if restart:
+                startSimulation()
 
         if keys[pygame.K_z] == 1 and keys[pygame.K_LALT] > 0:
-            changeCellSize(cell_size-1 if keys[pygame.K_LSHIFT] > 0 else cell_size+1)
+            changeCellSize(max(cell_size-1, cell_size/2) if keys[pygame.K_LSHIFT] > 0 else cell_size+1)
+
+        if keys[pygame.K_m] == 1:
+            max_speed = not max_speed
 
         if keys[pygame.K_SPACE] == 1:
-            simulating = not simulating
             if simulating:
-                last_matrix = living_cells.copy()
+                stopSimulation()
+            else:
                 opening_catalog = False
                 catalog_y = 0
                 copied_item = None
                 copy_rect = None
-                init_simulation = True
+                startSimulation()
 
-        scroll_x += ((keys[pygame.K_RIGHT] > 0) - (keys[pygame.K_LEFT] > 0)) * (30 if keys[pygame.K_LSHIFT] > 0 else 14)
-        scroll_y += ((keys[pygame.K_UP] > 0) - (keys[pygame.K_DOWN] > 0)) * (-30 if keys[pygame.K_LSHIFT] > 0 else -14)
-                    
+        scroll_x += ((keys[pygame.K_RIGHT] > 0) - (keys[pygame.K_LEFT] > 0)) * (15 if keys[pygame.K_LSHIFT] > 0 else 7)
+        scroll_y += ((keys[pygame.K_UP] > 0) - (keys[pygame.K_DOWN] > 0)) * (-15 if keys[pygame.K_LSHIFT] > 0 else -7)
+                
         mouse[1], mouse[2] = pygame.mouse.get_pos()
         if pygame.mouse.get_pressed()[0]:
             mouse[0] += 1
         else:
             mouse[0] = 0
         window_size = window.get_size()
-        
+    
         if mouse[0] > 0:
             onMouseClick(*mouse)
         else:
             brush = None
+            if stroke:
+                recordChange(stroke)
+                stroke = set()
             if copy_rect:
                 addToCatalog(copy_rect)
                 copy_rect = None
-            
+        
         speed_button.update()
+        simulation.speed = None if max_speed else simulation_speed
         updateCatalog()
-                
+            
         # Affichage
-        
+    
         window.fill(WHITE)  # Efface l'écran
-        
+    
         if not simulating and cell_size > 2:
             displayGrid(cell_size//15+1)
         displayCells()
@@ -473,13 +525,14 @@ while running:
         displayStats()
         if not simulating:
             displayCatalog()
-        
+    
         pygame.display.flip() # Actualise l'écran
     
-    clock.tick(MAX_SPEED)  # Limite la boucle à 'MAX_SPEED' ticks / seconde
+        clock.tick(LOOP_SPEED)  # Limite l'affichage à 'LOOP_SPEED' images / seconde (la simulation a son propre rythme)
 
-pygame.quit()  # Fermeture de la fenêtre
+    pygame.quit()  # Fermeture de la fenêtre
+    simulation.close()
+    engine.close()
 
-if save_catalog:
-    with open("catalog.json", "w") as f:
-        dump(catalog, f, indent=4)
+    if save_catalog:
+        catalog.save()
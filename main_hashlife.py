@@ -5,31 +5,55 @@ Lien vers l'article utilisé pour implémenter le Hashlife : https://www.dev-min
 
 - Clic gauche pour changer l'état d'une cellule
 - Espace pour lancer/arrêter la simulation
+- M pour simuler aussi vite que possible (sans limite de vitesse)
 - Molette de souris ou défilement à 2 doigts pour zoomer/dézoomer
 - Flèches directionnelles pour se déplacer sur la grille
 - Shift + flèches pour aller plus vite
-- Ctrl + Z durant pour revenir à l'état précédent de la grille
+- Ctrl + Z pour annuler la dernière modification (clic, collage, simulation, vidage ou saut de génération), plusieurs fois pour remonter l'historique
+- Ctrl + Y pour refaire une modification annulée
 - Ctrl + X pour vider la grille
 - Shift + sélectionner une zone avec la souris pour ajouter une structure au catalogue
 - Ctrl + clic pour supprimer un élément du catalogue
-- Ctrl + C pour vider le cache et libérer de la mémoire vive
+- Ctrl + C pour vider le cache et libérer de la mémoire vive (supprime les nodes qui ne servent plus)
+- Ctrl + G pour aller directement à une génération (taper son numéro puis Entrée, Échap pour annuler)
+- F3 pour afficher le temps d'affichage et l'efficacité du cache des tuiles
+- P pour détecter les cycles (structure stable, oscillateur ou vaisseau) : désactivée, arrêt de la simulation ou saut
+  (en mode saut, les générations suivantes sont calculées à partir du cycle sans être simulées) ; les planeurs qui
+  s'échappent sont mis à part, mais un autre vaisseau qui s'échappe (LWSS...) empêche toujours de trouver le cycle
+- F4 pour afficher les compteurs du Hashlife chaque seconde (nodes trouvées par newNode, résultats en cache par profondeur, durée des étapes)
+- Ctrl + S pour enregistrer la grille au format macrocell (.mc) de Golly, dans 'grille.mc' ou le fichier donné par '--save fichier.mc'
 
 Pour rajouter des structures au catalogue depuis internet, télécharger un fichier RLE sur un site (exemple : https://conwaylife.appspot.com/library)
-et exécuter le script 'rle2json.py' en fournissant le chemin du fichier RLE quand demandé.
-
-Pour charger une structure vraiment massive, glisser le fichier RLE directement sur ce fichier.
+et exécuter le script 'rle2catalog.py' en fournissant le chemin du fichier RLE quand demandé.
+
+La simulation tourne dans un fil séparé (module 'simulation.py') : l'affichage reste à 60 images par seconde quelle que soit la vitesse.
+Pour simuler sans fenêtre (serveur sans affichage, mesures de performance), utiliser le module 'engine.py'.
+Pour simuler des milliers de soupes aléatoires sans fenêtre et recenser leurs cendres : 'python soups.py --soups 1000 --output recensement.json'.
+L'historique garde les racines précédentes sans les copier : les nodes sont canoniques et jamais modifiées, un état ne coûte que ses nodes
+absentes des autres états, et les résultats en cache de ces nodes rendent instantanée la simulation d'un état retrouvé par Ctrl + Z.
+Les états les plus anciens sont oubliés quand les nodes dépassent le budget mémoire malgré le ramasse-miettes.
+
+Pour charger une structure vraiment massive, glisser le fichier RLE ou macrocell (.mc) directement sur ce fichier.
+Pour répartir les niveaux du haut de l'arbre sur plusieurs processus : 'python main_hashlife.py fichier.rle --workers 4'.
+Pour changer le budget mémoire des nodes (en Mo, 2048 par défaut) : 'python main_hashlife.py --memory 4096'.
+Pour enregistrer ces compteurs (une ligne JSON par seconde) : 'python main_hashlife.py --stats compteurs.jsonl'.
 """
 
 # Importation des librairies
 
 import pygame
-from json import load, dump
-from math import floor, log2, ceil
+from catalog import loadCatalog
+import thumbnails
+from math import floor, ceil
 from sys import argv
-from collections import defaultdict
 from os import path
-
-pygame.init()  # Initiation de pygame
+from time import perf_counter, time
+import json
+import hashlife
+from hashlife import getEmptyNode
+from simulation import SimulationThread
+from cycles import CycleDetector
+from hashlife_parallel import ParallelEvolver
 
 
 class RangeButton:  # Class du bouton de vitesse de simulation
@@ -69,21 +93,19 @@ class CatalogItem:  # Class représentant les structures du catalogue
     PREVIEW_SIZE = 120
     INTERVAL = 16
     max_index = -1
-    FONT = pygame.font.SysFont("arial", 18)
+    FONT = None  # Police des aperçus, créée après l'initialisation de pygame
     
     def __init__(self, index):
         self.index = index
         if index > CatalogItem.max_index:
             CatalogItem.max_index = index
-        self.structure = catalog[index]
         self.touching_mouse = False
         self.rect = pygame.Rect(0, 0, 0, 0)
-        self.preview = pygame.Surface((self.PREVIEW_SIZE, self.PREVIEW_SIZE), pygame.SRCALPHA)
+        self.preview = None  # L'aperçu est lu dans le cache au premier affichage, la surface est créée au premier collage
         self.surface = None
-        self.instant_paste = False
+        entry = catalog.getEntry(index)
+        self.instant_paste = entry.width*entry.height > 10000
         self.tick()
-        self.createSurface()
-        self.createPreview()
         
     def tick(self):  # Mise à jour des coordonnées et vérification de la collision avec la souris
         item_per_line = (window_size[0]-self.INTERVAL-16) // (self.SIZE+self.INTERVAL)
@@ -99,356 +121,153 @@ class CatalogItem:  # Class représentant les structures du catalogue
     def display(self):  # Affichage
         color = ((180, 120, 135) if keys[pygame.K_LCTRL] else (185, 205, 225)) if self.touching_mouse else (175, 200, 230)
         pygame.draw.rect(window, color, self.rect, border_radius=10)
+        if self.preview is None:
+            self.createPreview()
         window.blit(self.preview, (self.rect.x+(self.SIZE-self.PREVIEW_SIZE)//2, self.rect.y+(self.SIZE-self.PREVIEW_SIZE)//2))
         
-    def createSurface(self):  # Création de la surface représentatant la structure
-        if self.structure:
-            x_axis, y_axis = tuple(zip(*self.structure))
-            min_x_axis = min(x_axis)
-            min_y_axis = min(y_axis)
-            width = max(x_axis) - min_x_axis + 1
-            height = max(y_axis) - min_y_axis + 1
-        else:
-            width, height = 0, 0
-        if width*height > 10000:
-            self.instant_paste = True
-            if width*height > 10000000:
-                width, height = 0, 0
-        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
-        for x, y in self.structure:
-            self.surface.set_at((x-min_x_axis, y-min_y_axis), BLACK)
+    def getSurface(self):  # Surface représentant la structure, créée au premier besoin
+        if self.surface is None:
+            self.surface = thumbnails.createSurface(catalog, self.index)
+        return self.surface
         
-    def createPreview(self):  # Création de l'aperçu à partir de la surface
-        width, height = self.surface.get_size()
-        if 0 < width and 0 < height:
-            scale = min(self.PREVIEW_SIZE / width, self.PREVIEW_SIZE / height)
-            scaled = pygame.transform.scale_by(self.surface, scale)
-            size = scaled.get_size()
-            self.preview.blit(scaled, (self.PREVIEW_SIZE//2-size[0]//2, self.PREVIEW_SIZE//2-size[1]//2))
-        else:
+    def createPreview(self):  # Aperçu lu dans le cache du disque (créé et enregistré la première fois)
+        self.preview = thumbnails.loadPreview(catalog, self.index, self.PREVIEW_SIZE)
+        if self.preview is None:
+            self.preview = pygame.Surface((self.PREVIEW_SIZE, self.PREVIEW_SIZE), pygame.SRCALPHA)
             txt = self.FONT.render("Aucun aperçu", True, (100, 125, 145))
             txt_size = txt.get_size()
             self.preview.blit(txt, (self.PREVIEW_SIZE//2-txt_size[0]//2, self.PREVIEW_SIZE//2-txt_size[1]//2))
 
-
-class RLE_Loader:  # Class contenant les fonctions permettant de charger une structure massive depuis le format RLE de façon optimale
-    
-    # Tout le code contenu dans cette class a été créé par ChatGPT
-
-    def parse_rle(rle_text):
-        rows = defaultdict(list)
-
-        x = y = 0
-        count = 0
-        width = height = 0
-
-        for c in rle_text:
-            if c.isdigit():
-                count = count * 10 + int(c)
-                continue
-
-            n = count if count else 1
-            count = 0
-
-            if c == 'o':  # cellules vivantes
-                rows[y].append((x, x + n))
-                x += n
-
-            elif c == 'b':  # cellules mortes (on ignore)
-                x += n
-
-            elif c == '$':  # nouvelle ligne
-                y += n
-                x = 0
-
-            elif c == '!':
-                break
-
-            width = max(width, x)
-            height = max(height, y + 1)
-
-        return rows, width, height
-    
-    def build_node(depth, x0, y0, rows):
-        if not rows:
-            return getEmptyNode(depth)
-        
-        def cell_alive(x, y, rows):
-            runs = rows.get(y)
-            if not runs:
-                return False
-
-            for x1, x2 in runs:
-                if x1 <= x < x2:
-                    return True
-            return False
-
-        if depth == 1:
-            # construire un 2×2
-            return newNode(
-                1,
-                cell_alive(x0,     y0,     rows),
-                cell_alive(x0 + 1, y0,     rows),
-                cell_alive(x0,     y0 + 1, rows),
-                cell_alive(x0 + 1, y0 + 1, rows),
-            )
-
-        half = 1 << (depth - 1)
-
-        nw_rows = {}
-        ne_rows = {}
-        sw_rows = {}
-        se_rows = {}
-
-        for y, runs in rows.items():
-            if y < y0 or y >= y0 + 2 * half:
-                continue
-
-            if y < y0 + half:
-                target = (nw_rows, ne_rows)
-            else:
-                target = (sw_rows, se_rows)
-
-            for x1, x2 in runs:
-                if x2 <= x0 or x1 >= x0 + 2 * half:
-                    continue
-
-                if x1 < x0 + half:
-                    target[0].setdefault(y, []).append((x1, min(x2, x0 + half)))
-                if x2 > x0 + half:
-                    target[1].setdefault(y, []).append((max(x1, x0 + half), x2))
-
-        return newNode(
-            depth,
-            RLE_Loader.build_node(depth - 1, x0, y0, nw_rows),
-            RLE_Loader.build_node(depth - 1, x0 + half, y0, ne_rows),
-            RLE_Loader.build_node(depth - 1, x0, y0 + half, sw_rows),
-            RLE_Loader.build_node(depth - 1, x0 + half, y0 + half, se_rows),
-        )
-        
-    def load(rle_text):
-        # 1) Parser le RLE → runs horizontaux
-        rows, width, height = RLE_Loader.parse_rle(rle_text)
-
-        # 2) Taille minimale du carré englobant
-        size = max(width, height)
-        if size <= 1:
-            return getEmptyNode(1)
-
-        # 3) Profondeur Hashlife (2^depth ≥ size)
-        depth = ceil(log2(size))
-        if depth < 1:
-            depth = 1
-
-        # 4) Construire la node racine bottom-up
-        return RLE_Loader.build_node(depth, 0, 0, rows)
-
-            
-class Node:
-    
-    __slots__ = ('depth', 'a', 'b', 'c', 'd', 'result', 'hash', 'n')
-    
-    def __init__(self, depth, a, b, c, d):
-        self.depth = depth
-        self.a = a
-        self.b = b
-        self.c = c
-        self.d = d
-        self.n = (a.n + b.n + c.n + d.n) if self.depth > 1 else (a + b + c + d)
-        self.result = [None] * (self.depth - 1)
-        self.hash = hash((id(self.a), id(self.b), id(self.c), id(self.d)))
-            
-    def evolve(self):  # Fonction de simulation utilisant l'algorithme Hashlife pour compresser l'espace et le temps
-        
-        # Si la node a déjà été calculée au moins 1 fois, on réutilise le résultat enregistré
-        self_temporal_compression = min(temporal_compression_level, len(self.result)-1)
-        result = self.result[self_temporal_compression]
-        if result == None:
-            if self.n == 0:
-                result = getEmptyNode(self.depth-1)
-            elif self.depth == 2:  # Simulation classique pour les plus petites nodes (4x4)
-                an = self.a.a + self.a.b + self.a.c + self.b.a + self.b.c + self.c.a + self.c.b + self.d.a
-                bn = self.a.b + self.b.a + self.a.d + self.c.b + self.d.a + self.b.b + self.b.d + self.d.b
-                cn = self.a.c + self.a.d + self.b.c + self.c.a + self.c.c + self.c.d + self.d.a + self.d.c
-                dn = self.a.d + self.b.c + self.b.d + self.c.b + self.c.d + self.d.b + self.d.c + self.d.d
-                a = 1 < an < 4 if self.a.d else an == 3
-                b = 1 < bn < 4 if self.b.c else bn == 3
-                c = 1 < cn < 4 if self.c.b else cn == 3
-                d = 1 < dn < 4 if self.d.a else dn == 3
-                result = newNode(1, a, b, c, d)
-            else:
-                node1 = self.a
-                node2 = newNode(self.depth-1, self.a.b, self.b.a, self.a.d, self.b.c)
-                node3 = self.b
-                node4 = newNode(self.depth-1, self.a.c, self.a.d, self.c.a, self.c.b)
-                node5 = self.getCenterNode()
-                node6 = newNode(self.depth-1, self.b.c, self.b.d, self.d.a, self.d.b)
-                node7 = self.c
-                node8 = newNode(self.depth-1, self.c.b, self.d.a, self.c.d, self.d.c)
-                node9 = self.d
-                
-                node1Res = node1.evolve()
-                node2Res = node2.evolve()
-                node3Res = node3.evolve()
-                node4Res = node4.evolve()
-                node5Res = node5.evolve()
-                node6Res = node6.evolve()
-                node7Res = node7.evolve()
-                node8Res = node8.evolve()
-                node9Res = node9.evolve()
-                
-                intermediateNode1 = newNode(self.depth-1, node1Res, node2Res, node4Res, node5Res)
-                intermediateNode2 = newNode(self.depth-1, node2Res, node3Res, node5Res, node6Res)
-                intermediateNode3 = newNode(self.depth-1, node4Res, node5Res, node7Res, node8Res)
-                intermediateNode4 = newNode(self.depth-1, node5Res, node6Res, node8Res, node9Res)
-                
-                if (self.depth-3 < temporal_compression_level or temporal_compression_level == -1) and self is not root:
-                    result = newNode(self.depth-1,
-                                intermediateNode1.evolve(),
-                                intermediateNode2.evolve(),
-                                intermediateNode3.evolve(),
-                                intermediateNode4.evolve()
-                                )
-                else:
-                    result = newNode(self.depth-1,
-                                intermediateNode1.getCenterNode(),
-                                intermediateNode2.getCenterNode(),
-                                intermediateNode3.getCenterNode(),
-                                intermediateNode4.getCenterNode()
-                                )
-            self.result[self_temporal_compression] = result
-        return result
-        
-    def getCenterNode(self):  # Retourne la node centrale de celle-ci, centrée et 2 fois plus petite
-        return newNode(self.depth-1, self.a.d, self.b.c, self.c.b, self.d.a)
-    
-    def getSubNodes(self):  # Retourne la position relative de chaque sous-node et celle-ci
-        half = 2**(self.depth-1)
-        yield 0, 0, self.a
-        yield half, 0, self.b
-        yield 0, half, self.c
-        yield half, half, self.d
-        
-    def getSubNodeFromXY(self, dx, dy):  # Retourne la sous-node correspondante à dx, dy
-        match dx, dy:
-            case 0, 0: return self.a
-            case 1, 0: return self.b
-            case 0, 1: return self.c
-            case 1, 1: return self.d
-        raise ValueError
-        
-    def setCell(self, x, y, cx, cy, value):  # Renvoie une nouvelle node de la même taille avec la cellule modifiée
-        
-        cached = edit_cache.get((self, cx-x, cy-y, value))
-        if cached != None:
-            return cached
-        
-        if self.depth == 1:
-            result = newNode(1, *(value if x+dx == cx and y+dy == cy else cell for dx, dy, cell in self.getSubNodes()))
-            edit_cache[(self, cx-x, cy-y, value)] = result
-            return result
-
-        half = 2**(self.depth-1)
-        result = newNode(self.depth, *(node.setCell(x+dx, y+dy, cx, cy, value)
-                                     if x+dx <= cx < x+dx+half and y+dy <= cy < y+dy+half else node
-                                     for dx, dy, node in self.getSubNodes()
-                                     )
-                       )
-        edit_cache[(self, cx-x, cy-y, value)] = result
-        return result
-    
-    def isLiving(self, x, y, cx, cy):  # Retourne True si la cellule en cx, cy est vivante sinon False
-        if self.n == 0:
-            return False
-        if self.depth == 1:
-            return self.getSubNodeFromXY(cx-x, cy-y)
-        half = 2**(self.depth-1)
-        for dx, dy, node in self.getSubNodes():
-            if x+dx <= cx < x+dx+half and y+dy <= cy < y+dy+half:
-                return node.isLiving(x+dx, y+dy, cx, cy)
-        return False
-    
-    def display(self, x, y, bx, by, window_rect):  # Affichage de la node
-        if self.n == 0: return
-        size = 2**self.depth
-        if not window_rect.colliderect(x*size+root_x, y*size+root_y, size, size): return
-        if self.depth == 1 and min_depth_display == 0:
-            for dx, dy, cell in self.getSubNodes():
-                if cell:
-                    pygame.draw.rect(window, BLACK, ((2*x+dx)*displayed_node_size+bx, (2*y+dy)*displayed_node_size+by, displayed_node_size, displayed_node_size))
-        elif self.depth <= min_depth_display:
-            p = self.n / 2**self.depth
-            c = 0 if p > 0.8 else floor(255 - 255 * p / 0.8)
-            if c < 255:
-                pygame.draw.rect(window, (c,)*3, (x*displayed_node_size+bx, y*displayed_node_size+by, displayed_node_size, displayed_node_size))
-        else:
-            for dx, dy, node in self.getSubNodes():
-                node.display(2*x+min(dx, 1), 2*y+min(dy, 1), bx, by, window_rect)
-        
-    def __hash__(self):
-        return self.hash
-    
-    def __eq__(self, node):
-        if not isinstance(node, Node): return False
-        return id(self.a) == id(node.a) and id(self.b) == id(node.b) and id(self.c) == id(node.c) and id(self.d) == id(node.d)
-
-    def __ne__(self, node):
-        return not self.__eq__(node)
-    
-    def __repr__(self):
-        if self.depth == 1:
-            return f"Node 2x2 a={self.a} b={self.b} c={self.c} d={self.d}"
-        return f"Node {2**self.depth}x{2**self.depth} depth={self.depth} n={self.n}"
-             
-
 # Définition des fonctions
 
-def newNode(depth, a, b, c, d):  # Vérifie si une node avec les mêmes propriétés existe et la retourne, sinon en créé une nouvelle
-    key = (a, b, c, d)
-    node = known_nodes.get(key)
-    if node == None:
-        node = Node(depth, a, b, c, d)
-        known_nodes[key] = node
-    return node
-
-
-def updateRootSize():  # Met à jour la taille de la node racine
-    while any(node.n > 0 for node in (
-        root.a.d.a, root.a.d.b, root.a.d.c,
-        root.b.c.a, root.b.c.b, root.b.c.d,
-        root.c.b.a, root.c.b.c, root.c.b.d,
-        root.d.a.b, root.d.a.c, root.d.a.d,
-        root.a.a, root.a.b, root.a.c,
-        root.b.a, root.b.b, root.b.d,
-        root.c.a, root.c.c, root.c.d,
-        root.d.b, root.d.c, root.d.d)):
-        increaseRootSize()
-    
-    
-def increaseRootSize():  # Augmente la profondeur (et donc la taille) de la racine de 1
+def setRoot(node):  # Remplace la node racine et met à jour sa profondeur et sa position
     global root, root_depth, root_x, root_y
-    root_depth += 1
-    empty_node = getEmptyNode(root_depth-2)
-    root = newNode(root_depth,
-                newNode(root_depth-1, empty_node, empty_node, empty_node, root.a),
-                newNode(root_depth-1, empty_node, empty_node, root.b, empty_node),
-                newNode(root_depth-1, empty_node, root.c, empty_node, empty_node),
-                newNode(root_depth-1, root.d, empty_node, empty_node, empty_node)
-                )
-    root_x = - 2**(root_depth-1)
+    root = node
+    root_depth = root.depth
+    root_x = hashlife.getRootPosition(root)
     root_y = root_x
 
 
-def simulateCells():  # Simule les cellules à partir de la node racine
-    global root
-    updateRootSize()
-    new_root = root.evolve()
-    root = newNode(root.depth,
-                   newNode(root.depth-1, root.a.a, root.a.b, root.a.c, new_root.a),
-                   newNode(root.depth-1, root.b.a, root.b.b, new_root.b, root.b.d),
-                   newNode(root.depth-1, root.c.a, new_root.c, root.c.c, root.c.d),
-                   newNode(root.depth-1, new_root.d, root.d.b, root.d.c, root.d.d)
-    )
+def simulateCells(state):  # Étape du fil de simulation : state = (racine, numéro de sa génération)
+    node, generation = state
+    level = temporal_compression_level
+    cycle = detector.cycle if cycle_mode else None
+    if cycle is not None:
+        if CYCLE_MODES[cycle_mode] == "arrêt":  # La boucle principale arrête la simulation à la génération du cycle trouvé
+            return state
+        generation += hashlife.getGenerationsPerStep(hashlife.updateRootSize(node).depth, level)
+        return cycle.getRoot(generation), generation
+    start = perf_counter()
+    node = hashlife.simulateRoot(node, level, evolver and evolver.evolve)
+    hashlife.countStep(perf_counter()-start)
+    generation += hashlife.getGenerationsPerStep(node.depth, level)
+    if hashlife.needsGarbageCollection(memory_budget):
+        collectGarbage(node)
+    if cycle_mode and detector.record(node, generation) is not None:
+        cycle = detector.cycle
+        print(f"Cycle trouvé : période {cycle.period}, décalage ({cycle.dx}, {cycle.dy}), depuis la génération {cycle.start}, "
+              f"{len(cycle.gliders)} planeur(s) échappé(s)")
+    return node, generation
+
+
+def startSimulation(record=True):  # Lance le fil de simulation à partir de la racine actuelle
+    global simulating
+    simulating = True
+    if record:  # record=False : l'état d'avant la dernière modification est déjà le dernier de l'historique
+        recordState()
+    simulation.resume((root, generation))
+
+
+def stopSimulation():  # Met en pause le fil de simulation et reprend sa racine
+    global simulating, generation
+    if simulating:
+        simulating = False
+        node, generation = simulation.pause()
+        setRoot(node)
+        if undo_history and undo_history[-1][0] is root and undo_history[-1][1] == generation:  # Aucune étape simulée
+            undo_history.pop()
+
+
+def recordState():  # Enregistre l'état actuel dans l'historique avant une modification (la racine n'est jamais modifiée : aucune copie)
+    undo_history.append((root, generation))
+    redo_history.clear()
+    detector.clear()
+
+
+def undoState():  # Revient à l'état d'avant la dernière modification
+    global generation
+    detector.clear()
+    if undo_history:
+        redo_history.append((root, generation))
+        node, generation = undo_history.pop()
+        setRoot(node)
+
+
+def redoState():  # Refait la dernière modification annulée
+    global generation
+    detector.clear()
+    if redo_history:
+        undo_history.append((root, generation))
+        node, generation = redo_history.pop()
+        setRoot(node)
+
+
+def jumpToGeneration(target):  # Avance la grille jusqu'à la génération demandée (depuis le dernier état de l'historique qui la précède si elle est déjà passée)
+    global generation
+    node, start = root, generation
+    cycle = detector.cycle
+    if cycle is not None and target >= cycle.start:  # Le cycle de la simulation est connu : rien à simuler
+        recordState()
+        setRoot(cycle.getRoot(target))
+        generation = target
+        detector.cycle = cycle  # Toujours valable : la grille n'a pas été modifiée
+        return
+    if target < generation:
+        for node, start in reversed(undo_history):
+            if start <= target:
+                break
+        else:
+            return
+    recordState()
+    setRoot(hashlife.advance(node, target-start, evolver and evolver.evolve))
+    generation = target
+    if hashlife.needsGarbageCollection(memory_budget):
+        collectGarbage(root)
+
+
+def editJumpField(event):  # Saisie du numéro de génération à atteindre
+    global jump_field
+    if event.key == pygame.K_RETURN:
+        if jump_field:
+            jumpToGeneration(int(jump_field))
+        jump_field = None
+    elif event.key == pygame.K_ESCAPE:
+        jump_field = None
+    elif event.key == pygame.K_BACKSPACE:
+        jump_field = jump_field[:-1]
+    elif event.unicode.isdigit():
+        jump_field += event.unicode
+
+
+def collectGarbage(node):  # Supprime les nodes qui ne sont plus accessibles depuis la racine, l'historique ou les structures déjà collées
+    global tiles_outdated
+    stats = hashlife.collectGarbage(node, *(state[0] for state in undo_history + redo_history), *structure_nodes.values(), *detector.getNodes())
+    while hashlife.getMemoryUsage() > memory_budget and (undo_history or redo_history):  # L'historique retient trop de nodes
+        forgetOldStates()
+        stats = hashlife.collectGarbage(node, *(state[0] for state in undo_history + redo_history), *structure_nodes.values(), *detector.getNodes())
+    detector.clearCaches()
+    tiles_outdated = True  # Les tuiles sont vidées par la boucle principale (le ramasse-miettes peut tourner dans le fil de simulation)
+    if evolver:
+        evolver.reset()
+    print(f"Ramasse-miettes : {stats['nodes_before']} -> {stats['nodes_after']} nodes, "
+          f"{stats['bytes_before']/2**20:.1f} -> {stats['bytes_after']/2**20:.1f} Mo ({stats['bytes_freed']/2**20:.1f} Mo libérés)")
+
+
+def forgetOldStates():  # Oublie la moitié la plus ancienne de l'historique (puis les modifications annulées les plus lointaines)
+    if undo_history:
+        del undo_history[:max(1, len(undo_history)//2)]
+    else:
+        del redo_history[:max(1, len(redo_history)//2)]
 
 
 def displayGrid(line_width):  # Affiche la grille
@@ -458,13 +277,112 @@ def displayGrid(line_width):  # Affiche la grille
         pygame.draw.line(window, GRAY, (0, y), (window_size[0], y), line_width)
         
 
+def getTileDepth():  # Profondeur des nodes dessinées chacune sur une tuile d'environ TILE_SIZE pixels
+    depth = max(min_depth_display, 1)
+    while depth < root_depth and 2**(depth+1-min_depth_display) * displayed_node_size <= TILE_SIZE:
+        depth += 1
+    return min(depth, root_depth)
+
+
+def getTile(node):  # Retourne la tuile d'une node au zoom actuel (les nodes étant canoniques, les sous-arbres identiques partagent leur tuile)
+    global tile_hits, tile_misses
+    key = (node, min_depth_display, displayed_node_size)
+    tile = tiles.pop(key, None)
+    if tile is None:
+        tile_misses += 1
+        size = 2**(node.depth-min_depth_display) * displayed_node_size
+        tile = pygame.Surface((size, size))
+        tile.fill(WHITE)
+        tile.set_colorkey(WHITE)
+        drawNode(tile, node, 0, 0)
+        if len(tiles) >= MAX_TILES:  # On oublie la tuile utilisée il y a le plus longtemps
+            del tiles[next(iter(tiles))]
+    else:
+        tile_hits += 1
+    tiles[key] = tile  # Réinsérée à la fin : le dictionnaire reste trié de la moins à la plus récemment utilisée
+    return tile
+
+
+def drawNode(surface, node, x, y, bx=0, by=0):  # Dessine une node sur une surface (x, y : position en blocs de displayed_node_size pixels, décalée de bx, by pixels)
+    if node.n == 0: return
+    if node.depth == 1 and min_depth_display == 0:
+        for dx, dy, cell in node.getSubNodes():
+            if cell:
+                pygame.draw.rect(surface, BLACK, ((x+dx)*displayed_node_size+bx, (y+dy)*displayed_node_size+by, displayed_node_size, displayed_node_size))
+    elif node.depth <= min_depth_display:
+        p = node.n / 2**node.depth
+        c = 0 if p > 0.8 else floor(255 - 255 * p / 0.8)
+        if c < 255:
+            pygame.draw.rect(surface, (c,)*3, (x*displayed_node_size+bx, y*displayed_node_size+by, displayed_node_size, displayed_node_size))
+    else:
+        for dx, dy, sub_node in node.getSubNodes():
+            drawNode(surface, sub_node, x+(dx >> min_depth_display), y+(dy >> min_depth_display), bx, by)
+
+
+def displayNode(node, x, y, bx, by, window_rect, tile_depth):  # Affichage d'une node (x, y : position en nombre de nodes de sa profondeur)
+    if node.n == 0: return
+    size = 2**node.depth
+    if not window_rect.colliderect(x*size+root_x, y*size+root_y, size, size): return
+    if node.depth <= tile_depth:
+        blocks = 2**(node.depth-min_depth_display)
+        if blocks * displayed_node_size > MAX_TILE_SIZE:  # Très fort zoom : quelques grands rectangles, dessinés sans tuile
+            drawNode(window, node, x*blocks, y*blocks, bx, by)
+        else:
+            window.blit(getTile(node), (x*blocks*displayed_node_size+bx, y*blocks*displayed_node_size+by))
+    else:
+        for dx, dy, sub_node in node.getSubNodes():
+            displayNode(sub_node, 2*x+min(dx, 1), 2*y+min(dy, 1), bx, by, window_rect, tile_depth)
+
+
 def displayCells():  # Affiche les cellules
+    global tiles_outdated
+    if tiles_outdated:
+        tiles.clear()
+        tiles_outdated = False
     bx = window_size[0]//2-scroll_x
     by = window_size[1]//2-scroll_y
     half = 2**(root_depth-min_depth_display-1) * displayed_node_size
     cell_size = displayed_node_size / 2**min_depth_display
     window_rect = pygame.Rect(floor(-bx/cell_size), floor(-by/cell_size), ceil(window_size[0]/cell_size)+1, ceil(window_size[1]/cell_size)+1)
-    root.display(0, 0, bx-half, by-half, window_rect)
+    displayNode(root, 0, 0, bx-half, by-half, window_rect, getTileDepth())
+
+
+def displayOverlay():  # Affiche le temps d'affichage de la dernière image et l'efficacité du cache des tuiles
+    lookups = tile_hits + tile_misses
+    txt = font.render(f"Image : {frame_time*1000:.1f} ms, tuiles : {lookups} ({tile_hits/max(lookups, 1):.0%} en cache), "
+                      f"cache : {len(tiles)}/{MAX_TILES}", True, BLACK)
+    window.blit(txt, (10, window_size[1]-24-txt.get_size()[1]))
+    
+    
+def updateCounters():  # Relève les compteurs du Hashlife chaque seconde, pour l'affichage et le journal
+    global counters, last_counters_time
+    now = perf_counter()
+    if hashlife.stats is None or now - last_counters_time < COUNTERS_PERIOD:
+        return
+    counters = hashlife.takeStats()
+    counters["seconds"] = now - last_counters_time
+    counters["generation"] = generation
+    last_counters_time = now
+    if stats_log:
+        stats_log.write(json.dumps({"time": time(), **counters}) + "\n")
+        stats_log.flush()
+
+
+def displayCounters():  # Affiche les compteurs du Hashlife relevés pendant la dernière seconde
+    if counters is None:
+        return
+    seconds = counters["seconds"]
+    node_calls = counters["node_hits"] + counters["node_misses"]
+    lines = [f"Nodes : {counters['known_nodes']}, cache d'édition : {counters['edit_cache']}",
+             f"newNode : {node_calls/seconds:.0f}/s, {counters['node_hits']/max(node_calls, 1):.0%} trouvées"]
+    if counters["steps"]:
+        lines.append(f"Étapes : {counters['steps']/seconds:.1f}/s, {counters['step_seconds']/counters['steps']*1000:.1f} ms en moyenne, "
+                     f"{counters['max_step_seconds']*1000:.1f} ms au plus")
+    for depth in sorted(set(counters["evolve_hits"]) | set(counters["evolve_misses"]), reverse=True):
+        hits, misses = counters["evolve_hits"][depth], counters["evolve_misses"][depth]
+        lines.append(f"evolve profondeur {depth} : {(hits+misses)/seconds:.0f}/s, {hits/(hits+misses):.0%} en cache")
+    for i, line in enumerate(lines):
+        window.blit(font.render(line, True, BLACK), (10, 110 + 20*i))
     
     
 def onMouseClick(nb_clicks, x, y):  # Clic de souris
@@ -488,7 +406,8 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
                                 catalog_item_.index -= 1
                     else:
                         if catalog_item.instant_paste:
-                            w, h = catalog_item.surface.get_size()
+                            entry = catalog.getEntry(catalog_item.index)
+                            w, h = entry.width, entry.height
                             i = floor(scroll_y / (displayed_node_size / 2**min_depth_display))
                             j = floor(scroll_x / (displayed_node_size / 2**min_depth_display))
                             pasteCatalogItem(catalog_item.index, j-w//2, i-h//2)
@@ -504,7 +423,7 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
     j = floor((x+scroll_x-window_size[0]//2) / (displayed_node_size / 2**min_depth_display))
     if copied_item:
         if nb_clicks == 1:
-            w, h = copied_item.surface.get_size()
+            w, h = copied_item.getSurface().get_size()
             pasteCatalogItem(copied_item.index, j-w//2, i-h//2)
             if keys[pygame.K_LSHIFT] == 0:
                 copied_item = None
@@ -514,6 +433,7 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
             copy_rect = [j, i, 0, 0]
         else:
             brush = root.isLiving(root_x, root_y, j, i)
+            recordState()
     elif copy_rect:
         copy_rect[2] = j-copy_rect[0]
         copy_rect[3] = i-copy_rect[1]
@@ -523,7 +443,7 @@ def onMouseClick(nb_clicks, x, y):  # Clic de souris
 
 def displayStats():  # Affiche le bandeau de statistique en haut de l'écran
     pygame.draw.rect(window, BLACK, (window_size[0]//2-400, -40, 800, 110), border_radius=40)
-    txt = font.render(f"Vitesse de simulation : {simulation_speed} ticks/s", True, WHITE)
+    txt = font.render("Vitesse de simulation : max" if max_speed else f"Vitesse de simulation : {simulation_speed} ticks/s", True, WHITE)
     txt_size = txt.get_size()
     window.blit(txt, (window_size[0]//2-txt_size[0]//2-250, 20-txt_size[1]//2))
     pygame.draw.rect(window, LIGHT_GRAY, (window_size[0]//2-340, 40, 180, 5), border_radius=2)
@@ -538,15 +458,25 @@ def displayStats():  # Affiche le bandeau de statistique en haut de l'écran
     window.blit(txt, (window_size[0]//2-txt_size[0]//2, 20-txt_size[1]//2))
     pygame.draw.rect(window, LIGHT_GRAY, (window_size[0]//2-80, 40, 160, 5), border_radius=2)
     clearness_button.display()
+    if jump_field is None:
+        txt = font.render(f"Génération : {generation}", True, BLACK)
+    else:
+        txt = font.render(f"Aller à la génération : {jump_field}_", True, BLACK)
+    window.blit(txt, (window_size[0]//2-txt.get_size()[0]//2, 80))
     
 
+def displayCycle():  # Affiche le mode de détection des cycles et le cycle trouvé
+    cycle = detector.cycle
+    if cycle is None:
+        txt = font.render(f"Détection des cycles : {CYCLE_MODES[cycle_mode]}", True, BLACK)
+    else:
+        txt = font.render(f"Période {cycle.period}, décalage ({cycle.dx}, {cycle.dy}), depuis la génération {cycle.start}, "
+                          f"{len(cycle.gliders)} planeur(s) échappé(s)", True, BLACK)
+    window.blit(txt, (window_size[0]//2-txt.get_size()[0]//2, 104))
+
+
 def setCell(x, y, value, check_size=True):  # Affecte une valeur à une cellule
-    global root
-    if check_size:
-        maxi = max(abs(x), abs(y))
-        while maxi > 2**(root_depth-3):
-            increaseRootSize()
-    root = root.setCell(root_x, root_y, x, y, value)
+    setRoot(hashlife.setCell(root, x, y, value, check_size))
     
 def changeCellSize(value):  # Zoom / Dezoom
     global zoom, scroll_x, scroll_y
@@ -561,12 +491,12 @@ def changeCellSize(value):  # Zoom / Dezoom
 def updateCatalog():  # Actualise la position du catalogue
     global catalog_y
     if opening_catalog:
-        catalog_y += (window_size[1]-160-catalog_y) // 4
+        catalog_y += (window_size[1]-160-catalog_y) // 8
     else:
-        if 0 < catalog_y < 4:
+        if 0 < catalog_y < 8:
             catalog_y -= 1
         else:
-            catalog_y -= catalog_y // 4
+            catalog_y -= catalog_y // 8
             
     if catalog_y > 0:
         for catalog_item in catalog_items:
@@ -587,27 +517,24 @@ def displayCatalog():  # Affiche le catalogue
         pygame.draw.rect(window, color, (0, window_size[1]-16, window_size[0], 32), border_radius=16)
         
 
-def pasteCatalogItem(index, x, y):  # Colle un élément du catalogue sur la grille
-    structure = catalog[index]
-    if not structure:
+def pasteCatalogItem(index, x, y):  # Colle un élément du catalogue sur la grille (sa node est construite une seule fois, puis greffée sur la racine)
+    entry = catalog.getEntry(index)
+    if not entry.population:
         return
-    x_axis, y_axis = tuple(zip(*structure))
-    min_x_axis = min(x_axis)
-    min_y_axis = min(y_axis)
-    max_x = max(abs(cell_x+x-min_x_axis) for cell_x, _ in structure)
-    max_y = max(abs(cell_y+y-min_y_axis) for _, cell_y in structure)
-    setCell(max_x, max_y, False)
-    for cell_x, cell_y in structure:
-        setCell(cell_x+x-min_x_axis, cell_y+y-min_y_axis, True, False)
-    edit_cache.clear()
+    key = catalog.getHash(index)
+    node = structure_nodes.get(key)
+    if node is None:
+        node = structure_nodes[key] = hashlife.buildNode([[cell_x-entry.x, cell_y-entry.y] for cell_x, cell_y in catalog[index]])
+    recordState()
+    setRoot(hashlife.pasteNode(root, node, x, y))
         
 
 def displayCopiedItem():  # Affiche la structure copiée du catalogue
     if copied_item:
         cell_size = displayed_node_size / 2**min_depth_display
-        surface = pygame.transform.scale_by(copied_item.surface, floor(cell_size))
+        surface = pygame.transform.scale_by(copied_item.getSurface(), floor(cell_size))
         surface.set_alpha(160)
-        w, h = copied_item.surface.get_size()
+        w, h = copied_item.getSurface().get_size()
         x = floor((floor((mouse[1]+scroll_x-window_size[0]//2) / cell_size) - w//2) * cell_size) - scroll_x + window_size[0]//2
         y = floor((floor((mouse[2]+scroll_y-window_size[1]//2) / cell_size) - h//2) * cell_size) - scroll_y + window_size[1]//2
         window.blit(surface, (x, y))
@@ -628,7 +555,7 @@ def addToCatalog(copy_rect):  # Ajoute la zone sélectionnée au catalogue
     global save_catalog
     save_catalog = True
     rect = absRect(copy_rect)
-    cells = [[x-rect[0], y-rect[1]] for x in range(rect[0], rect[0]+rect[2]+1) for y in range(rect[1], rect[1]+rect[3]+1) if root.isLiving(root_x, root_y, x, y)]
+    cells = [[x-rect[0], y-rect[1]] for x, y in hashlife.getLivingCells(root, (rect[0], rect[1], rect[2]+1, rect[3]+1))]
     catalog.append(cells)
     catalog_items.append(CatalogItem(len(catalog)-1))
     
@@ -639,15 +566,13 @@ def displayCopyRect():  # Affiche le rectangle de sélection
     surface = pygame.Surface((floor((rect[2]+1)*cell_size), floor((rect[3]+1)*cell_size)), pygame.SRCALPHA)
     surface.fill(GREEN)
     surface.set_alpha(120)
-    window.blit(surface, (window_size[0]//2-scroll_x+floor(rect[0]*cell_size), window_size[1]//2-scroll_y+floor(rect[1]*cell_size)))
+    x = window_size[0]//2-scroll_x+floor(rect[0]*cell_size)
+    y = window_size[1]//2-scroll_y+floor(rect[1]*cell_size)
+    window.blit(surface, (x, y))
+    txt = font.render(f"{hashlife.getPopulation(root, (rect[0], rect[1], rect[2]+1, rect[3]+1))} cellules", True, BLACK)
+    window.blit(txt, (x, y-txt.get_size()[1]))
     
     
-def getEmptyNode(depth):  # Retourne une node avec la profondeur demandée
-    while depth > len(empty_nodes):
-        empty_nodes.append(newNode(len(empty_nodes)+1, *[empty_nodes[-1]]*4))
-    return empty_nodes[depth-1]
-
-
 def updateDisplayedNodeSize():  # Met à jour displayed_node_size à partir du zoom et du niveau de netteté
     global displayed_node_size, min_depth_display
     min_depth_display = floor((1-clearness/100) * (root_depth+1))
@@ -672,108 +597,116 @@ def setTemporalCompressionLevel(v):
     global temporal_compression_level
     temporal_compression_level = v-1
   
-# Chargement des données            
-
-try:
-    with open("catalog.json", "r") as f:
-        catalog = load(f)
-except FileNotFoundError:
-    catalog = []
-    with open("catalog.json", "x") as f:
-        dump([], f)
-
-# Définition des couleurs
-
-WHITE = (255, 255, 255)
-LIGHT_GRAY = (220, 220, 220)
-GRAY = (128, 128, 128)
-BLACK = (0, 0, 0)
-GREEN = (0, 255, 0)
-
-# Création de l'arborescence des noeuds et cellules
-
-edit_cache = {}
-known_nodes = {}
-empty_nodes = [newNode(1, False, False, False, False)]
-if len(argv) > 1 and path.exists(argv[1]):
-    with open(argv[1], "r") as f:
-        root = RLE_Loader.load(f.read())
-        root_depth = root.depth
-else:
-    root_depth = 4
-    root = getEmptyNode(root_depth)
-root_x = -(2**(root_depth-1))
-root_y = -(2**(root_depth-1))
-
-# Création de la fenêtre et autres
-
-window_size = (860, 600)
-MIN_SIZE = (400, 300)
-window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
-pygame.display.set_caption("Conway's Game of Life")
-clock = pygame.time.Clock()
-
-font = pygame.font.SysFont("arial", 16)
-
-zoom = 40
-displayed_node_size = zoom
-min_depth_display = 0
-clearness = 100
-temporal_compression_level = 0
-simulating = False
-simulation_speed = 5
-MAX_SPEED = 160
-speed_button = RangeButton(42, 180, setSimulationSpeed, lambda: simulation_speed, -250, MAX_SPEED)
-clearness_button = RangeButton(42, 160, setClearness, lambda: clearness, 0, 100)
-temporal_button = RangeButton(42, 180, setTemporalCompressionLevel, lambda: temporal_compression_level+1, 250, lambda: root_depth)
-mouse = [0, 0, 0]  # Informations sur la souris : [durée du clic, x, y]
-LOOP_SPEED = 24
-simulation_loop_ticks = 0
-main_loop_ticks = 0
-scroll_x = 0
-scroll_y = 0
-keys = dict((key, 0) for key in (pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
-                                 pygame.K_SPACE, pygame.K_LSHIFT, pygame.K_z, pygame.K_LCTRL,
-                                 pygame.K_x, pygame.K_c, pygame.K_LALT))
-brush = None
-last_matrix = None
-catalog_y = 0
-opening_catalog = False
-catalog_items = []
-copied_item = None
-for i in range(len(catalog)):
-    catalog_items.append(CatalogItem(i))
-copy_rect = None
-save_catalog = False
-
-running = True
-
-while running:
-        
-    # Boucle de simulation
-    
-    if simulating:
-        simulation_loop_ticks += 1
-        if simulation_loop_ticks >= MAX_SPEED / simulation_speed:
-            simulation_loop_ticks -= MAX_SPEED / simulation_speed
-            simulateCells()
-        
-    # Boucle principale
-    
-    main_loop_ticks += 1
-    
-    if main_loop_ticks >= MAX_SPEED / LOOP_SPEED:
-        main_loop_ticks -= MAX_SPEED / LOOP_SPEED
+if __name__ == "__main__":  # Les processus de --workers réimportent ce fichier (méthode spawn) : ils ne doivent pas ouvrir de fenêtre
+
+    pygame.init()  # Initiation de pygame
+
+    # Chargement des données            
+
+    catalog = loadCatalog()  # Seul l'index est lu : les cellules d'une structure sont lues quand elle est affichée ou collée
+    structure_nodes = {}  # Empreinte d'une structure du catalogue → sa node, construite à son premier collage
+
+    # Définition des couleurs
+
+    WHITE = (255, 255, 255)
+    LIGHT_GRAY = (220, 220, 220)
+    GRAY = (128, 128, 128)
+    BLACK = (0, 0, 0)
+    GREEN = (0, 255, 0)
+
+    # Création de l'arborescence des noeuds et cellules
+
+    if len(argv) > 1 and path.exists(argv[1]):
+        if argv[1].endswith(".mc"):
+            setRoot(hashlife.updateRootSize(hashlife.loadMacrocell(argv[1])))
+        else:
+            setRoot(hashlife.updateRootSize(hashlife.loadRLEFile(argv[1])))
+    else:
+        setRoot(getEmptyNode(4))
+    evolver = ParallelEvolver(int(argv[argv.index("--workers")+1])) if "--workers" in argv else None
+    memory_budget = int(argv[argv.index("--memory")+1] if "--memory" in argv else 2048) * 2**20  # Budget mémoire des nodes en octets
+    save_path = argv[argv.index("--save")+1] if "--save" in argv else "grille.mc"  # Fichier macrocell écrit par Ctrl + S
+    stats_log = open(argv[argv.index("--stats")+1], "a") if "--stats" in argv else None  # Journal des compteurs (une ligne JSON par seconde)
+    if stats_log:
+        hashlife.enableStats()
+
+    # Création de la fenêtre et autres
+
+    window_size = (860, 600)
+    MIN_SIZE = (400, 300)
+    window = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+    pygame.display.set_caption("Conway's Game of Life")
+    clock = pygame.time.Clock()
+
+    font = pygame.font.SysFont("arial", 16)
+    CatalogItem.FONT = pygame.font.SysFont("arial", 18)
+
+    zoom = 40
+    displayed_node_size = zoom
+    min_depth_display = 0
+    clearness = 100
+    temporal_compression_level = 0
+    simulation = SimulationThread(simulateCells)  # L'état du fil (racine, génération) ne change jamais : il sert directement d'instantané
+    simulating = False
+    simulation_speed = 5
+    max_speed = False
+    MAX_SPEED = 160
+    speed_button = RangeButton(42, 180, setSimulationSpeed, lambda: simulation_speed, -250, MAX_SPEED)
+    clearness_button = RangeButton(42, 160, setClearness, lambda: clearness, 0, 100)
+    temporal_button = RangeButton(42, 180, setTemporalCompressionLevel, lambda: temporal_compression_level+1, 250, lambda: root_depth)
+    mouse = [0, 0, 0]  # Informations sur la souris : [durée du clic, x, y]
+    LOOP_SPEED = 60
+    scroll_x = 0
+    scroll_y = 0
+    keys = dict((key, 0) for key in (pygame.K_UP, pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT,
+                                     pygame.K_SPACE, pygame.K_LSHIFT, pygame.K_z, pygame.K_LCTRL,
+                                     pygame.K_x, pygame.K_c, pygame.K_s, pygame.K_g, pygame.K_LALT, pygame.K_F3, pygame.K_F4, pygame.K_m, pygame.K_y, pygame.K_p))
+    brush = None
+    generation = 0  # Numéro de la génération affichée
+    undo_history = []  # États (racine, génération) d'avant chaque modification, du plus ancien au plus récent
+    redo_history = []  # États quittés par Ctrl + Z, du plus ancien au plus récemment quitté
+    jump_field = None  # Numéro de génération en cours de saisie (None si le champ est fermé)
+    catalog_y = 0
+    opening_catalog = False
+    catalog_items = []
+    copied_item = None
+    for i in range(len(catalog)):
+        catalog_items.append(CatalogItem(i))
+    copy_rect = None
+    save_catalog = False
+
+    TILE_SIZE = 128  # Taille visée des tuiles en pixels
+    MAX_TILE_SIZE = 512  # Au-delà, les nodes sont dessinées directement sur la fenêtre
+    MAX_TILES = 512  # Nombre maximal de tuiles gardées en mémoire
+    tiles = {}  # (node, min_depth_display, displayed_node_size) → tuile, de la moins à la plus récemment utilisée
+    tiles_outdated = False  # Vrai après un ramasse-miettes : les tuiles seront vidées avant la prochaine image
+    tile_hits = 0  # Tuiles trouvées / dessinées pendant la dernière image
+    tile_misses = 0
+    frame_time = 0  # Durée d'affichage de la dernière image en secondes
+    show_overlay = False
+    COUNTERS_PERIOD = 1  # Durée en secondes entre 2 relevés des compteurs
+    counters = None  # Derniers compteurs relevés
+    last_counters_time = perf_counter()
+    show_counters = False
+    CYCLE_MODES = ("désactivée", "arrêt", "saut")  # Modes de détection des cycles, dans l'ordre de la touche P
+    cycle_mode = 0
+    detector = CycleDetector(remove_gliders=True)  # États de la simulation en cours, jusqu'à ce que l'un d'eux revienne
+
+    running = True
+
+    while running:
 
         for key in keys:
             if keys[key] > 0:
                 keys[key] += 1
-            
+        
         for event in pygame.event.get():  # Boucle d'évènements
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key in keys:
+                if jump_field is not None:
+                    editJumpField(event)
+                elif event.key in keys:
                     keys[event.key] = 1
             elif event.type == pygame.KEYUP:
                 if event.key in keys:
@@ -783,41 +716,93 @@ while running:
             elif event.type == pygame.VIDEORESIZE:
                 if event.size[0] < MIN_SIZE[0] or event.size[1] < MIN_SIZE[1]:
                     window = pygame.display.set_mode((max(event.size[0], MIN_SIZE[0]), max(event.size[1], MIN_SIZE[1])), pygame.RESIZABLE)
-                    
+                
         # Mise à jour des données
+    
+        if simulating:  # Dernier instantané publié par le fil de simulation
+            node, generation = simulation.getSnapshot()
+            setRoot(node)
+
+        if keys[pygame.K_z] == 1 and keys[pygame.K_LCTRL] > 0:
+            stopSimulation()
+            undoState()
+
+        if keys[pygame.K_y] == 1 and keys[pygame.K_LCTRL] > 0:
+            stopSimulation()
+            redoState()
         
-        if keys[pygame.K_z] == 1 and keys[pygame.K_LCTRL] > 0 and last_matrix:
-            simulating = False
-            root = last_matrix
-            
         if keys[pygame.K_x] == 1 and keys[pygame.K_LCTRL] > 0:
-            root_depth = 4
-            root = getEmptyNode(root_depth)
+            restart = simulating
+            stopSimulation()
+            recordState()
+            setRoot(getEmptyNode(4))
             temporal_compression_level = min(temporal_compression_level, 3)
-            
+            generation = 0
+            if restart:  # Annuler le vidage revient directement à l'état vidé, sans passer par la grille vide
+                startSimulation(record=False)
+        
         if keys[pygame.K_c] == 1 and keys[pygame.K_LCTRL] > 0:
-            edit_cache.clear()
+            restart = simulating
+            stopSimulation()
+            collectGarbage(root)
+            if restart:
+                startSimulation()
+
+        if keys[pygame.K_s] == 1 and keys[pygame.K_LCTRL] > 0:
+            hashlife.saveMacrocell(root, save_path)
+            print(f"Grille enregistrée dans {save_path}")
+
+        if keys[pygame.K_p] == 1:
+            restart = simulating
+            stopSimulation()  # Le détecteur n'est modifié que quand le fil de simulation est en pause
+            cycle_mode = (cycle_mode + 1) % len(CYCLE_MODES)
+            if cycle_mode == 0:
+                detector.clear()
+            if restart:
+                startSimulation()
+
+        if simulating and CYCLE_MODES[cycle_mode] == "arrêt" and detector.cycle is not None:
+            stopSimulation()
+
+        if keys[pygame.K_F3] == 1:
+            show_overlay = not show_overlay
+
+        if keys[pygame.K_F4] == 1:
+            show_counters = not show_counters
+            if show_counters and hashlife.stats is None:
+                hashlife.enableStats()
+                last_counters_time = perf_counter()
+            elif not stats_log:  # Les compteurs ne coûtent plus rien une fois désactivés
+                hashlife.disableStats()
+                counters = None
+
+        if keys[pygame.K_g] == 1 and keys[pygame.K_LCTRL] > 0:
+            stopSimulation()
+            jump_field = ""
+
+        if keys[pygame.K_m] == 1:
+            max_speed = not max_speed
 
         if keys[pygame.K_SPACE] == 1:
-            simulating = not simulating
             if simulating:
-                last_matrix = root
+                stopSimulation()
+            else:
                 opening_catalog = False
                 catalog_y = 0
                 copied_item = None
                 copy_rect = None
-                init_simulation = True
+                startSimulation()
 
-        scroll_x += ((keys[pygame.K_RIGHT] > 0) - (keys[pygame.K_LEFT] > 0)) * (30 if keys[pygame.K_LSHIFT] > 0 else 14)
-        scroll_y += ((keys[pygame.K_UP] > 0) - (keys[pygame.K_DOWN] > 0)) * (-30 if keys[pygame.K_LSHIFT] > 0 else -14)
-                    
+        scroll_x += ((keys[pygame.K_RIGHT] > 0) - (keys[pygame.K_LEFT] > 0)) * (12 if keys[pygame.K_LSHIFT] > 0 else 6)
+        scroll_y += ((keys[pygame.K_UP] > 0) - (keys[pygame.K_DOWN] > 0)) * (-12 if keys[pygame.K_LSHIFT] > 0 else -6)
+                
         mouse[1], mouse[2] = pygame.mouse.get_pos()
         if pygame.mouse.get_pressed()[0]:
             mouse[0] += 1
         else:
             mouse[0] = 0
         window_size = window.get_size()
-        
+    
         if mouse[0] > 0:
             onMouseClick(*mouse)
         else:
@@ -825,16 +810,20 @@ while running:
             if copy_rect:
                 addToCatalog(copy_rect)
                 copy_rect = None
-            
+        
         speed_button.update()
         clearness_button.update()
         temporal_button.update()
+        simulation.speed = None if max_speed else simulation_speed
         updateCatalog()
-                
+        updateCounters()
+            
         # Affichage
-        
+    
+        frame_start = perf_counter()
+        tile_hits = tile_misses = 0
         window.fill(WHITE)  # Efface l'écran
-        
+    
         if not simulating and min_depth_display == 0 and zoom > 3:
             displayGrid(floor(zoom/15)+1)
         displayCells()
@@ -844,13 +833,24 @@ while running:
         displayStats()
         if not simulating:
             displayCatalog()
-        
+        if show_overlay:
+            displayOverlay()
+        if show_counters:
+            displayCounters()
+        if cycle_mode:
+            displayCycle()
+        frame_time = perf_counter() - frame_start
+    
         pygame.display.flip() # Actualise l'écran
     
-    clock.tick(MAX_SPEED)  # Limite la boucle à 'MAX_SPEED' ticks / seconde
+        clock.tick(LOOP_SPEED)  # Limite l'affichage à 'LOOP_SPEED' images / seconde (la simulation a son propre rythme)
 
-pygame.quit()  # Fermeture de la fenêtre
+    pygame.quit()  # Fermeture de la fenêtre
+    simulation.close()
+    if stats_log:
+        stats_log.close()
+    if evolver:
+        evolver.close()
 
-if save_catalog:
-    with open("catalog.json", "w") as f:
-        dump(catalog, f, indent=4)
+    if save_catalog:
+        catalog.save()
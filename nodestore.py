@@ -0,0 +1,273 @@
+"""
+Stockage compact des nodes Hashlife dans des tableaux typés, à la place d'un objet Python par node.
+
+Une node est un numéro : ses sous-nodes, sa profondeur et sa population sont rangées dans des tableaux parallèles,
+et ses résultats dans un tableau par niveau de compression temporelle (créé seulement quand ce niveau est utilisé).
+Les nodes 2x2 sont les numéros 0 à 15 : le bit 0 est la cellule a, le bit 1 b, le bit 2 c et le bit 3 d.
+Les nodes sont rendues canoniques par une table de hachage à adressage ouvert sur les numéros des sous-nodes.
+
+Une node coûte ainsi une quarantaine d'octets, contre plusieurs centaines pour un objet Node et sa clé dans known_nodes.
+"""
+
+# Importation des librairies
+
+from array import array
+from hashlife import BLOCK_DEPTH, base_results, stepBlock
+
+EMPTY = -1  # Case vide de la table de hachage, résultat pas encore calculé
+# Cellules d'une node 2x2 placées dans un entier dont les lignes font 4 ou 8 bits (voir hashlife.packNode)
+SPREAD_LEAF = {width: [(leaf & 1) | (leaf >> 1 & 1) << 1 | (leaf >> 2 & 1) << width | (leaf >> 3 & 1) << (width+1) for leaf in range(16)]
+               for width in (4, 8, 16)}
+
+
+class NodeStore:
+
+    def __init__(self, capacity=1 << 16):
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.d = array("i")
+        self.depth = array("B")
+        self.population = array("q")
+        self.results = {}  # Niveau de compression temporelle → tableau des résultats de chaque node
+        self.table = array("i", [EMPTY]) * capacity
+        self.mask = capacity - 1
+        for bits in range(16):  # Nodes 2x2
+            self.append(bits & 1, bits >> 1 & 1, bits >> 2 & 1, bits >> 3 & 1, 1, bin(bits).count("1"))
+        self.empty_nodes = [0]
+
+    def append(self, a, b, c, d, depth, population):  # Ajoute une node aux tableaux et retourne son numéro
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        self.d.append(d)
+        self.depth.append(depth)
+        self.population.append(population)
+        for results in self.results.values():
+            results.append(EMPTY)
+        return len(self.depth) - 1
+
+    def __len__(self):
+        return len(self.depth)
+
+    def newNode(self, depth, a, b, c, d):  # Même rôle que hashlife.newNode, avec des booléens pour une node 2x2
+        if depth == 1:
+            return a | b << 1 | c << 2 | d << 3
+        table = self.table
+        mask = self.mask
+        h = ((a * 0x9E3779B1) ^ (b * 0x85EBCA77) ^ (c * 0xC2B2AE3D) ^ (d * 0x27D4EB2F)) & mask
+        while True:
+            node = table[h]
+            if node == EMPTY:
+                break
+            if self.a[node] == a and self.b[node] == b and self.c[node] == c and self.d[node] == d:
+                return node
+            h = (h + 1) & mask
+        population = self.population
+        node = self.append(a, b, c, d, depth, population[a] + population[b] + population[c] + population[d])
+        table[h] = node
+        if 2 * (len(self.depth) - 16) > len(table):  # On garde la table à moitié vide au plus
+            self.resize(2 * len(table))
+        return node
+
+    def resize(self, capacity):  # Agrandit la table de hachage et y replace toutes les nodes
+        table = array("i", [EMPTY]) * capacity
+        mask = capacity - 1
+        for node in range(16, len(self.depth)):
+            a, b, c, d = self.a[node], self.b[node], self.c[node], self.d[node]
+            h = ((a * 0x9E3779B1) ^ (b * 0x85EBCA77) ^ (c * 0xC2B2AE3D) ^ (d * 0x27D4EB2F)) & mask
+            while table[h] != EMPTY:
+                h = (h + 1) & mask
+            table[h] = node
+        self.table = table
+        self.mask = mask
+
+    def getEmptyNode(self, depth):  # Retourne la node vide de la profondeur demandée
+        while depth > len(self.empty_nodes):
+            empty_node = self.empty_nodes[-1]
+            self.empty_nodes.append(self.newNode(len(self.empty_nodes)+1, empty_node, empty_node, empty_node, empty_node))
+        return self.empty_nodes[depth-1]
+
+    def getResults(self, level):  # Retourne le tableau des résultats d'un niveau de compression temporelle
+        results = self.results.get(level)
+        if results is None:
+            results = self.results[level] = array("i", [EMPTY]) * len(self.depth)
+        return results
+
+    def getCenterNode(self, node):
+        depth = self.depth[node]
+        return self.newNode(depth-1, self.d[self.a[node]], self.c[self.b[node]], self.b[self.c[node]], self.a[self.d[node]])
+
+    def packNode(self, node, width, x=0, y=0):  # Même rôle que hashlife.packNode
+        if self.depth[node] == 1:
+            return SPREAD_LEAF[width][node] << (y*width + x)
+        if self.population[node] == 0:
+            return 0
+        half = 2**(self.depth[node]-1)
+        return (self.packNode(self.a[node], width, x, y) | self.packNode(self.b[node], width, x+half, y)
+                | self.packNode(self.c[node], width, x, y+half) | self.packNode(self.d[node], width, x+half, y+half))
+
+    def unpackNode(self, cells, width, x, y, depth):  # Même rôle que hashlife.unpackNode
+        if depth == 1:
+            i = y*width + x
+            return (cells >> i & 1) | (cells >> (i+1) & 1) << 1 | (cells >> (i+width) & 1) << 2 | (cells >> (i+width+1) & 1) << 3
+        half = 2**(depth-1)
+        return self.newNode(depth, self.unpackNode(cells, width, x, y, depth-1), self.unpackNode(cells, width, x+half, y, depth-1),
+                            self.unpackNode(cells, width, x, y+half, depth-1), self.unpackNode(cells, width, x+half, y+half, depth-1))
+
+    def evolve(self, node, temporal_compression_level, is_root=False):  # Même algorithme que Node.evolve
+        depth = self.depth[node]
+        if temporal_compression_level == -1:
+            self_temporal_compression = depth-2
+        else:
+            self_temporal_compression = min(temporal_compression_level, depth-2)
+        if is_root:
+            self_temporal_compression = min(self_temporal_compression, depth-3)
+        result = self.getResults(self_temporal_compression)[node]
+        if result != EMPTY:
+            return result
+        if self.population[node] == 0:
+            result = self.getEmptyNode(depth-1)
+        elif depth == 2:
+            result = base_results[self.packNode(node, 4)]
+        elif depth <= BLOCK_DEPTH:
+            width = 2**depth
+            cells = self.packNode(node, width)
+            for _ in range(2**self_temporal_compression):
+                cells = stepBlock(cells, width)
+            result = self.unpackNode(cells, width, width//4, width//4, depth-1)
+        else:
+            a, b, c, d = self.a, self.b, self.c, self.d
+            newNode = self.newNode
+            na, nb, nc, nd = a[node], b[node], c[node], d[node]
+            node1 = na
+            node2 = newNode(depth-1, b[na], a[nb], d[na], c[nb])
+            node3 = nb
+            node4 = newNode(depth-1, c[na], d[na], a[nc], b[nc])
+            node5 = newNode(depth-1, d[na], c[nb], b[nc], a[nd])
+            node6 = newNode(depth-1, c[nb], d[nb], a[nd], b[nd])
+            node7 = nc
+            node8 = newNode(depth-1, b[nc], a[nd], d[nc], c[nd])
+            node9 = nd
+
+            evolve = self.evolve
+            node1Res = evolve(node1, temporal_compression_level)
+            node2Res = evolve(node2, temporal_compression_level)
+            node3Res = evolve(node3, temporal_compression_level)
+            node4Res = evolve(node4, temporal_compression_level)
+            node5Res = evolve(node5, temporal_compression_level)
+            node6Res = evolve(node6, temporal_compression_level)
+            node7Res = evolve(node7, temporal_compression_level)
+            node8Res = evolve(node8, temporal_compression_level)
+            node9Res = evolve(node9, temporal_compression_level)
+
+            intermediateNode1 = newNode(depth-1, node1Res, node2Res, node4Res, node5Res)
+            intermediateNode2 = newNode(depth-1, node2Res, node3Res, node5Res, node6Res)
+            intermediateNode3 = newNode(depth-1, node4Res, node5Res, node7Res, node8Res)
+            intermediateNode4 = newNode(depth-1, node5Res, node6Res, node8Res, node9Res)
+
+            if self_temporal_compression == depth-2:
+                result = newNode(depth-1,
+                                 evolve(intermediateNode1, temporal_compression_level),
+                                 evolve(intermediateNode2, temporal_compression_level),
+                                 evolve(intermediateNode3, temporal_compression_level),
+                                 evolve(intermediateNode4, temporal_compression_level)
+                                 )
+            else:
+                result = newNode(depth-1,
+                                 self.getCenterNode(intermediateNode1),
+                                 self.getCenterNode(intermediateNode2),
+                                 self.getCenterNode(intermediateNode3),
+                                 self.getCenterNode(intermediateNode4)
+                                 )
+        self.getResults(self_temporal_compression)[node] = result
+        return result
+
+    def increaseRootSize(self, root):  # Même rôle que hashlife.increaseRootSize
+        depth = self.depth[root]
+        a, b, c, d = self.a[root], self.b[root], self.c[root], self.d[root]
+        empty_node = self.getEmptyNode(depth-1) if depth > 1 else 0
+        return self.newNode(depth+1,
+                            self.newNode(depth, empty_node, empty_node, empty_node, a),
+                            self.newNode(depth, empty_node, empty_node, b, empty_node),
+                            self.newNode(depth, empty_node, c, empty_node, empty_node),
+                            self.newNode(depth, d, empty_node, empty_node, empty_node)
+                            )
+
+    def updateRootSize(self, root):  # Même rôle que hashlife.updateRootSize
+        a, b, c, d, population = self.a, self.b, self.c, self.d, self.population
+        while self.depth[root] < 4:
+            root = self.increaseRootSize(root)
+        while True:
+            ra, rb, rc, rd = a[root], b[root], c[root], d[root]
+            outer = population[root] - population[d[d[ra]]] - population[c[c[rb]]] - population[b[b[rc]]] - population[a[a[rd]]]
+            if outer == 0:
+                return root
+            root = self.increaseRootSize(root)
+
+    def simulateRoot(self, root, temporal_compression_level):  # Même rôle que hashlife.simulateRoot
+        root = self.updateRootSize(root)
+        new_root = self.evolve(root, temporal_compression_level, True)
+        depth = self.depth[root]
+        a, b, c, d = self.a, self.b, self.c, self.d
+        ra, rb, rc, rd = a[root], b[root], c[root], d[root]
+        return self.newNode(depth,
+                            self.newNode(depth-1, a[ra], b[ra], c[ra], a[new_root]),
+                            self.newNode(depth-1, a[rb], b[rb], b[new_root], d[rb]),
+                            self.newNode(depth-1, a[rc], c[new_root], c[rc], d[rc]),
+                            self.newNode(depth-1, d[new_root], b[rd], c[rd], d[rd])
+                            )
+
+    def advance(self, root, generations):  # Même rôle que hashlife.advance
+        level = 0
+        while generations:
+            if generations & 1:
+                root = self.updateRootSize(root)
+                while self.depth[root] < level+3:
+                    root = self.increaseRootSize(root)
+                root = self.simulateRoot(root, level)
+            generations >>= 1
+            level += 1
+        return root
+
+    def setCell(self, node, x, y, cx, cy, value):  # Retourne la node avec la cellule cx, cy modifiée (x, y : coin de la node)
+        depth = self.depth[node]
+        half = 2**(depth-1)
+        children = [self.a[node], self.b[node], self.c[node], self.d[node]]
+        i = (cx >= x+half) + 2*(cy >= y+half)
+        if depth == 1:
+            children[i] = int(value)
+        else:
+            children[i] = self.setCell(children[i], x+half*(i & 1), y+half*(i >> 1), cx, cy, value)
+        return self.newNode(depth, *children)
+
+    def isLiving(self, node, x, y, cx, cy):  # Retourne True si la cellule cx, cy est vivante
+        while self.population[node]:
+            half = 2**(self.depth[node]-1)
+            i = (cx >= x+half) + 2*(cy >= y+half)
+            if self.depth[node] == 1:
+                return node >> i & 1 == 1
+            node = (self.a, self.b, self.c, self.d)[i][node]
+            x += half*(i & 1)
+            y += half*(i >> 1)
+        return False
+
+    def getLivingCells(self, node, x, y, x1, y1, x2, y2):  # Même rôle que Node.getLivingCells (x, y : coin de la node)
+        size = 2**self.depth[node]
+        if self.population[node] == 0 or x >= x2 or y >= y2 or x+size <= x1 or y+size <= y1:
+            return
+        if self.depth[node] == 1:
+            for i in range(4):
+                cx, cy = x + (i & 1), y + (i >> 1)
+                if node >> i & 1 and x1 <= cx < x2 and y1 <= cy < y2:
+                    yield cx, cy
+            return
+        half = size // 2
+        yield from self.getLivingCells(self.a[node], x, y, x1, y1, x2, y2)
+        yield from self.getLivingCells(self.b[node], x+half, y, x1, y1, x2, y2)
+        yield from self.getLivingCells(self.c[node], x, y+half, x1, y1, x2, y2)
+        yield from self.getLivingCells(self.d[node], x+half, y+half, x1, y1, x2, y2)
+
+    def getMemoryUsage(self):  # Mémoire occupée par les tableaux (en octets)
+        arrays = (self.a, self.b, self.c, self.d, self.depth, self.population, self.table, *self.results.values())
+        return sum(len(values) * values.itemsize for values in arrays)
@@ -0,0 +1,58 @@
+"""
+Affichage des cellules de main.py avec NumPy : une seule image par affichage au lieu d'un rectangle par cellule.
+
+Seules les cellules visibles dans la fenêtre sont gardées. Chaque pixel (ou chaque case de cell_size pixels) reçoit
+le nombre de cellules vivantes qu'il contient, l'image est envoyée à pygame avec surfarray puis agrandie à la taille
+des cellules. Quand les cellules sont plus petites qu'un pixel (cell_size < 1), un pixel regroupe plusieurs cellules
+et son gris dépend de leur densité, comme pour les nodes floues de main_hashlife.py.
+"""
+
+# Importation des librairies
+
+from itertools import chain
+from math import floor, ceil
+import numpy as np
+import pygame
+
+EMPTY = 255  # Couleur (et transparence) des pixels sans cellule vivante
+GRAYS = [(i, i, i) for i in range(256)]
+BLACK_DENSITY = 0.8  # Densité à partir de laquelle un pixel regroupant plusieurs cellules est noir
+
+
+def cellsToArrays(living_cells):  # Retourne les tableaux des coordonnées y et x d'un ensemble de cellules (y, x)
+    coordinates = np.fromiter(chain.from_iterable(living_cells), np.int64, 2*len(living_cells))
+    return coordinates[0::2], coordinates[1::2]
+
+
+def drawCells(surface, y_axis, x_axis, top, left, cell_size):  # Dessine les cellules ; top, left : coordonnées (en cellules) du coin de la surface
+    width, height = surface.get_size()
+    if cell_size >= 1:
+        cells_per_pixel = 1
+        y0, x0 = floor(top), floor(left)
+        rows, columns = ceil(height/cell_size)+1, ceil(width/cell_size)+1
+        offset = (round((x0-left)*cell_size), round((y0-top)*cell_size))
+    else:  # Un pixel regroupe cells_per_pixel x cells_per_pixel cellules
+        cells_per_pixel = round(1/cell_size)
+        y0, x0 = floor(top), floor(left)
+        rows, columns = height, width
+        offset = (0, 0)
+
+    # Case de l'image de chaque cellule, en ne gardant que celles qui sont dans la fenêtre
+    i = (y_axis-y0) // cells_per_pixel
+    j = (x_axis-x0) // cells_per_pixel
+    visible = (i >= 0) & (i < rows) & (j >= 0) & (j < columns)
+    counts = np.bincount(j[visible]*rows + i[visible], minlength=rows*columns).reshape(columns, rows)  # Indices [x, y] de surfarray
+
+    if cells_per_pixel == 1:
+        pixels = np.where(counts > 0, 0, EMPTY).astype(np.uint8)
+    else:
+        density = counts / cells_per_pixel**2
+        pixels = np.floor(EMPTY - EMPTY*np.minimum(density/BLACK_DENSITY, 1)).astype(np.uint8)
+        pixels[(counts > 0) & (pixels == EMPTY)] = EMPTY-1  # Une seule cellule vivante reste visible
+    image = pygame.Surface((columns, rows), depth=8)
+    image.set_palette(GRAYS)
+    pygame.surfarray.blit_array(image, pixels)
+    if cell_size > 1:
+        image = pygame.transform.scale(image, (columns*cell_size, rows*cell_size))
+    image.set_colorkey(EMPTY)
+    surface.blit(image, offset)
@@ -1,12 +1,7 @@
-# Script qui convertit les fichiers RLE de structure (trouvable sur internet) en json dans le catalogue
+# Script qui convertit les fichiers RLE de structure (trouvable sur internet) et les ajoute au catalogue (catalog.bin)
 
-from json import dump, load
-from os import path
+from catalog import loadCatalog
 
-if not path.exists("catalog.json"):
-    with open("catalog.json", "x") as f:
-        dump([], f)
-    
 converted = []
 y = 0
 x = 0
@@ -37,11 +32,9 @@ with open(input("Fichier RLE à convertir : "), "r") as f:
                     x = 0
                 case "!":
                     print("Conversion terminée")
-                    with open("catalog.json", "r") as f:
-                        catalog = load(f)
+                    catalog = loadCatalog()
                     catalog.append(converted)
-                    with open("catalog.json", "w") as f:
-                        dump(catalog, f, indent=4)
+                    catalog.save()
                     exit()
             i += 1
             j += 1
@@ -0,0 +1,86 @@
+"""
+Fil de simulation séparé de la boucle d'affichage de main.py et main_hashlife.py.
+
+Le fil appelle step(state) en boucle, au rythme demandé (speed étapes par seconde) ou aussi vite que possible (speed = None),
+et publie un instantané de l'état que l'affichage lit sans attendre la fin de l'étape en cours.
+Pour Hashlife, l'état est la racine, qui ne sera jamais modifiée : elle sert directement d'instantané.
+Pour le moteur à ensemble, l'instantané est une copie des cellules, faite seulement quand l'affichage a lu la précédente.
+La boucle principale met le fil en pause (pause() attend la fin de l'étape en cours) avant de modifier l'état elle-même.
+"""
+
+# Importation des librairies
+
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep
+
+MAX_SLEEP = 0.02  # Durée maximale d'attente entre 2 étapes, pour répondre vite à pause() et aux changements de vitesse
+
+
+class SimulationThread(Thread):
+
+    def __init__(self, step, take_snapshot=lambda state: state):
+        super().__init__(daemon=True)
+        self.step = step  # step(state) simule une étape et retourne le nouvel état
+        self.take_snapshot = take_snapshot  # take_snapshot(state) retourne une copie de l'état que l'affichage peut lire
+        self.state = None
+        self.snapshot = None
+        self.snapshot_requested = False
+        self.speed = None  # Étapes par seconde (None : aussi vite que possible)
+        self.steps = 0  # Étapes simulées depuis le dernier resume()
+        self.error = None  # Exception levée par step(), relancée dans la boucle principale par getSnapshot()
+        self.running = Event()
+        self.stepping = Lock()  # Tenu pendant une étape
+        self.closed = False
+        self.start()
+
+    def run(self):
+        next_step = perf_counter()
+        while True:
+            self.running.wait()
+            if self.closed:
+                return
+            speed = self.speed
+            if speed is None:
+                next_step = perf_counter()
+            else:
+                now = perf_counter()
+                if now < next_step:
+                    sleep(min(next_step - now, MAX_SLEEP))
+                    continue
+                next_step = max(next_step, now - 1/speed) + 1/speed  # Après une étape trop longue, on ne rattrape pas le retard
+            with self.stepping:
+                if not self.running.is_set():  # Mis en pause entre temps
+                    continue
+                try:
+                    self.state = self.step(self.state)
+                except Exception as error:
+                    self.error = error
+                    self.running.clear()
+                    continue
+                self.steps += 1
+                if self.snapshot_requested:
+                    self.snapshot = self.take_snapshot(self.state)
+                    self.snapshot_requested = False
+
+    def getSnapshot(self):  # Retourne le dernier instantané publié et en demande un nouveau
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        self.snapshot_requested = True
+        return self.snapshot
+
+    def resume(self, state):  # Lance la simulation à partir de state
+        self.state = state
+        self.snapshot = self.take_snapshot(state)
+        self.steps = 0
+        self.running.set()
+
+    def pause(self):  # Arrête la simulation après l'étape en cours et retourne l'état
+        self.running.clear()
+        with self.stepping:
+            return self.state
+
+    def close(self):
+        self.pause()
+        self.closed = True
+        self.running.set()
@@ -0,0 +1,254 @@
+"""
+Recherche de soupes en lot, sans fenêtre : des soupes aléatoires sont simulées avec Hashlife jusqu'à stabilisation,
+puis leurs cendres sont séparées en objets et recensées dans un fichier JSON.
+
+- La soupe numéro index est un carré de size x size cellules, chacune vivante avec la probabilité density,
+  tirée avec random.Random(f"{seed}:{index}") : une soupe se retrouve à partir de sa graine et de son numéro.
+- Une soupe est stabilisée quand sa population est périodique (période au plus MAX_PERIOD) sur WINDOW générations :
+  les planeurs qui s'échappent ne changent pas la population. Les générations une à une coûtent cher à Hashlife :
+  ce test n'est fait que si la population est la même qu'il y a CHUNK_GENERATIONS générations.
+- Les cellules vivantes à moins de 3 cellules l'une de l'autre (en x comme en y) forment un même objet.
+- Chaque objet est simulé seul (cycles.CycleDetector) : structure stable (xs + population), oscillateur (xp + période)
+  ou vaisseau (xq + période). Sa forme canonique est le plus petit code de ses phases sous les 8 rotations et réflexions,
+  codées ligne par ligne en hexadécimal (bit x d'une ligne = cellule x), lignes séparées par "z" : le bloc est "xs4_3z3".
+- Les soupes sont réparties par lots sur un pool de processus. Chaque processus garde sa table de nodes d'une soupe à l'autre,
+  et les objets déjà classés sont retrouvés par leur node canonique sans être simulés à nouveau.
+
+Exemples :
+python soups.py --soups 1000 --output recensement.json
+python soups.py --soups 100000 --seed essai --size 16 --density 0.5 --workers 8
+"""
+
+# Importation des librairies
+
+from collections import Counter
+from functools import partial
+from multiprocessing import Pool
+from os import cpu_count
+from random import Random
+from sys import stderr
+from time import perf_counter, strftime
+import json
+import hashlife
+from cycles import CycleDetector
+
+CHUNK_GENERATIONS = 840  # Générations simulées entre 2 tests de stabilisation : multiple des périodes 1 à 8, 10, 12, 14, 15...
+WINDOW = 96  # Générations simulées une à une pour tester la stabilisation
+MAX_PERIOD = 32  # Période maximale de la population d'une soupe stabilisée
+MAX_OBJECT_GENERATIONS = 256  # Générations simulées au plus pour trouver le cycle d'un objet seul
+BATCH_SIZE = 16  # Soupes envoyées ensemble à un processus
+UNKNOWN = "inconnu"  # Objet qui ne se répète pas seul (cendres pas encore stabilisées)
+
+KNOWN_OBJECTS = {  # Noms usuels des objets les plus fréquents (cellules x, y d'une de leurs phases)
+    "bloc": [(0, 0), (1, 0), (0, 1), (1, 1)],
+    "ruche": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (2, 2)],
+    "pain": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (3, 2), (2, 3)],
+    "bateau": [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2)],
+    "navire": [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2), (2, 2)],
+    "baignoire": [(1, 0), (0, 1), (2, 1), (1, 2)],
+    "mare": [(1, 0), (2, 0), (0, 1), (3, 1), (0, 2), (3, 2), (1, 3), (2, 3)],
+    "clignotant": [(0, 0), (1, 0), (2, 0)],
+    "crapaud": [(1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1)],
+    "balise": [(0, 0), (1, 0), (0, 1), (3, 2), (2, 3), (3, 3)],
+    "planeur": [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)],
+}
+
+
+def createSoup(seed, index, size, density):  # Retourne la racine de la soupe numéro index, centrée sur l'origine
+    random = Random(f"{seed}:{index}")
+    cells = [[x, y] for y in range(size) for x in range(size) if random.random() < density]
+    return hashlife.pasteNode(hashlife.getEmptyNode(4), hashlife.buildNode(cells), -(size//2), -(size//2))
+
+
+def getPopulationPeriod(populations):  # Retourne la plus petite période (au plus MAX_PERIOD) de la suite des populations, None si elle n'en a pas
+    for period in range(1, min(MAX_PERIOD, len(populations)//2) + 1):
+        if all(populations[i] == populations[i+period] for i in range(len(populations)-period)):
+            return period
+    return None
+
+
+def evolveSoup(root, max_generations):  # Simule jusqu'à stabilisation, retourne la racine, sa génération et True si la soupe est stabilisée
+    generation = 0
+    last_population = None
+    while generation < max_generations:
+        root = hashlife.advance(root, CHUNK_GENERATIONS)
+        generation += CHUNK_GENERATIONS
+        if root.n != last_population:  # Pas encore stabilisée
+            last_population = root.n
+            continue
+        populations = []
+        node = root
+        for _ in range(WINDOW):
+            populations.append(node.n)
+            node = hashlife.advance(node, 1)
+        if getPopulationPeriod(populations) is not None:
+            return root, generation, True
+    return root, generation, False
+
+
+def separateObjects(cells):  # Regroupe les cellules x, y en objets : listes de cellules à moins de 3 cellules l'une de l'autre
+    remaining = set(cells)
+    objects = []
+    while remaining:
+        stack = [remaining.pop()]
+        found = []
+        while stack:
+            x, y = stack.pop()
+            found.append((x, y))
+            for dy in range(-2, 3):
+                for dx in range(-2, 3):
+                    if (x+dx, y+dy) in remaining:
+                        remaining.remove((x+dx, y+dy))
+                        stack.append((x+dx, y+dy))
+        objects.append(found)
+    return objects
+
+
+def normalizeCells(cells):  # Retourne les cellules décalées pour que leur coin en haut à gauche soit 0, 0
+    x0 = min(x for x, _ in cells)
+    y0 = min(y for _, y in cells)
+    return [(x-x0, y-y0) for x, y in cells]
+
+
+def encodeCells(cells):  # Code des cellules (déjà normalisées) : une valeur hexadécimale par ligne, lignes séparées par "z"
+    rows = [0] * (max(y for _, y in cells) + 1)
+    for x, y in cells:
+        rows[y] |= 1 << x
+    return "z".join(format(row, "x") for row in rows)
+
+
+def getCanonicalCode(cells):  # Plus petit code des cellules sous les 8 rotations et réflexions
+    codes = []
+    for transform in (lambda x, y: (x, y), lambda x, y: (-x, y), lambda x, y: (x, -y), lambda x, y: (-x, -y),
+                      lambda x, y: (y, x), lambda x, y: (-y, x), lambda x, y: (y, -x), lambda x, y: (-y, -x)):
+        code = encodeCells(normalizeCells([transform(x, y) for x, y in cells]))
+        codes.append((len(code), code))
+    return min(codes)[1]
+
+
+def classifyObject(cells):  # Retourne le nom canonique d'un objet (cellules normalisées), UNKNOWN s'il ne se répète pas seul
+    root = hashlife.pasteNode(hashlife.getEmptyNode(4), hashlife.buildNode(cells), 0, 0)
+    detector = CycleDetector(MAX_OBJECT_GENERATIONS+1)
+    detector.record(root, 0)
+    for generation in range(1, MAX_OBJECT_GENERATIONS+1):
+        root = hashlife.advance(root, 1)
+        cycle = detector.record(root, generation)
+        if cycle is not None:
+            break
+    else:
+        return UNKNOWN
+    if cycle.start > 0:  # L'objet évolue avant de se répéter : il n'était pas stabilisé
+        return UNKNOWN
+    codes = []
+    for phase in range(cycle.period):
+        node = cycle.getRoot(phase)
+        code = getCanonicalCode(list(hashlife.getLivingCells(node, hashlife.getBoundingBox(node))))
+        codes.append((len(code), code))
+    code = min(codes)[1]
+    if cycle.dx or cycle.dy:
+        return f"xq{cycle.period}_{code}"
+    if cycle.period > 1:
+        return f"xp{cycle.period}_{code}"
+    return f"xs{len(cells)}_{code}"
+
+
+def getObjectNames():  # Retourne le nom usuel de chaque code d'objet de KNOWN_OBJECTS
+    return {classifyObject(normalizeCells(cells)): name for name, cells in KNOWN_OBJECTS.items()}
+
+
+# Définition des fonctions exécutées par les processus (chacun garde sa table de nodes et ses objets classés)
+
+classified_objects = {}  # Node canonique d'un objet (cellules normalisées) → son code
+
+
+def searchSoup(seed, index, size, density, max_generations):  # Retourne les codes des objets des cendres d'une soupe (None si elle ne se stabilise pas)
+    root, generation, stable = evolveSoup(createSoup(seed, index, size, density), max_generations)
+    if not stable:
+        return None, generation
+    box = hashlife.getBoundingBox(root)
+    if box is None:
+        return [], generation
+    codes = []
+    for cells in separateObjects(hashlife.getLivingCells(root, box)):
+        cells = normalizeCells(cells)
+        node = hashlife.buildNode(cells)  # Même objet, même orientation, même phase : même node
+        code = classified_objects.get(node)
+        if code is None:
+            code = classified_objects[node] = classifyObject(cells)
+        codes.append(code)
+    return codes, generation
+
+
+def searchBatch(indices, seed, size, density, max_generations, memory_budget):  # Simule un lot de soupes, retourne leur recensement partiel
+    census = Counter()
+    first_soups = {}  # Code → numéro de la première soupe du lot qui contient l'objet
+    unstable = []
+    generations = 0
+    for index in indices:
+        if hashlife.needsGarbageCollection(memory_budget):  # Les nodes des objets classés restent, avec leurs résultats en cache
+            hashlife.collectGarbage(*classified_objects)
+        codes, generation = searchSoup(seed, index, size, density, max_generations)
+        generations += generation
+        if codes is None:
+            unstable.append(index)
+            continue
+        census.update(codes)
+        for code in codes:
+            first_soups.setdefault(code, index)
+    return census, first_soups, unstable, generations
+
+
+def runSearch(soups, seed=0, size=16, density=0.5, workers=None, max_generations=2**15, memory_budget=512*2**20):  # Retourne le recensement complet
+    start = perf_counter()
+    census = Counter()
+    first_soups = {}
+    unstable = []
+    generations = 0
+    batches = [range(i, min(i+BATCH_SIZE, soups)) for i in range(0, soups, BATCH_SIZE)]
+    search = partial(searchBatch, seed=seed, size=size, density=density, max_generations=max_generations, memory_budget=memory_budget)
+    with Pool(workers or cpu_count()) as pool:
+        for done, (batch_census, batch_first_soups, batch_unstable, batch_generations) in enumerate(pool.imap_unordered(search, batches), 1):
+            census.update(batch_census)
+            for code, index in batch_first_soups.items():
+                first_soups[code] = min(index, first_soups.get(code, index))
+            unstable += batch_unstable
+            generations += batch_generations
+            print(f"\r{min(done*BATCH_SIZE, soups)}/{soups} soupes, {len(census)} objets différents", end="", file=stderr)
+    print(file=stderr)
+    seconds = perf_counter() - start
+    names = getObjectNames()
+    return {
+        "date": strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "soups": soups,
+        "size": size,
+        "density": density,
+        "seconds": seconds,
+        "soups_per_second": soups / max(seconds, 1e-9),
+        "generations": generations,
+        "unstable_soups": sorted(unstable),
+        "objects": [{"code": code, "name": names.get(code), "count": count, "first_soup": first_soups[code]}
+                    for code, count in sorted(census.items(), key=lambda item: (-item[1], item[0]))],  # Même ordre quel que soit le nombre de processus
+    }
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Simule des soupes aléatoires jusqu'à stabilisation et recense les objets de leurs cendres (JSON)")
+    parser.add_argument("--soups", type=int, default=1000, help="nombre de soupes")
+    parser.add_argument("--seed", default="0", help="graine : la soupe numéro i est tirée avec la graine 'seed:i'")
+    parser.add_argument("--size", type=int, default=16, help="côté des soupes en cellules")
+    parser.add_argument("--density", type=float, default=0.5, help="probabilité qu'une cellule de la soupe soit vivante")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (tous les cœurs par défaut)")
+    parser.add_argument("--max-generations", type=int, default=2**15, help="au-delà, la soupe est comptée comme non stabilisée")
+    parser.add_argument("--memory", type=int, default=512, help="budget mémoire des nodes de chaque processus (en Mo)")
+    parser.add_argument("--output", default=None, help="fichier JSON à écrire (sinon le recensement est affiché)")
+    args = parser.parse_args()
+
+    report = runSearch(args.soups, args.seed, args.size, args.density, args.workers, args.max_generations, args.memory * 2**20)
+    if args.output is None:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
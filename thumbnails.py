@@ -0,0 +1,93 @@
+"""
+Surfaces et aperçus des structures du catalogue pour main.py et main_hashlife.py.
+
+Les surfaces sont créées d'un seul bloc à partir des cellules du rectangle englobant (pas de set_at par cellule).
+Les aperçus sont enregistrés en PNG dans le dossier 'previews', sous le nom de l'empreinte du contenu de la structure,
+et relus aux lancements suivants. Une structure plus grande que l'aperçu est réduite par densité :
+chaque pixel de l'aperçu est d'autant plus opaque qu'il contient de cellules vivantes (comptées avec NumPy si il est installé).
+"""
+
+# Importation des librairies
+
+import pygame
+from os import makedirs, path
+
+try:
+    import numpy as np
+except ImportError:  # NumPy n'est pas installé : les cellules des aperçus réduits sont comptées une par une
+    np = None
+
+CACHE_DIRECTORY = "previews"
+SURFACE_LIMIT = 10000000  # Au-delà de ce nombre de cellules dans le rectangle englobant, la structure n'a pas de surface
+
+PALETTE = [(0, 0, 0)] * 256
+PALETTE[0] = (255, 255, 255)
+
+
+def createSurface(catalog, index):  # Retourne la surface de la structure (1 pixel noir par cellule vivante, fond transparent)
+    entry = catalog.getEntry(index)
+    width, height = entry.width, entry.height
+    if not 0 < width*height <= SURFACE_LIMIT:
+        return pygame.Surface((0, 0), pygame.SRCALPHA)
+    surface = pygame.image.frombytes(catalog.getPixels(index), (width, height), "P")
+    surface.set_palette(PALETTE)
+    surface.set_colorkey(0)
+    return surface
+
+
+def getCoordinates(catalog, index):  # Retourne les tableaux NumPy des coordonnées y et x des cellules vivantes, relatives au rectangle englobant
+    entry = catalog.getEntry(index)
+    bits = np.frombuffer(catalog.getBits(index), np.uint8)
+    filled = np.flatnonzero(bits)  # Seuls les octets non nuls sont décompressés en 8 cellules
+    cells = np.unpackbits(bits[filled, None], axis=1, bitorder="little").astype(bool)
+    indices = (filled[:, None]*8 + np.arange(8))[cells]
+    indices = indices[indices < entry.width*entry.height]
+    return indices // entry.width, indices % entry.width
+
+
+def createPreview(catalog, index, size):  # Retourne l'aperçu carré de la structure (None si elle est vide)
+    entry = catalog.getEntry(index)
+    width, height = entry.width, entry.height
+    if not entry.population:
+        return None
+    preview = pygame.Surface((size, size), pygame.SRCALPHA)
+    scale = min(size / width, size / height)
+    if scale >= 1:  # Structure plus petite que l'aperçu : agrandie sans lissage
+        scaled = pygame.transform.scale_by(createSurface(catalog, index), scale)
+    else:  # Réduction par densité : nombre de cellules vivantes dans chaque pixel de l'aperçu
+        preview_width = max(1, min(size, round(width*scale)))
+        preview_height = max(1, min(size, round(height*scale)))
+        cells_per_pixel = 1 / scale**2
+        if np is None:
+            counts = [0] * (preview_width*preview_height)
+            for x, y in catalog[index]:
+                counts[min(int((y-entry.y)*scale), preview_height-1)*preview_width + min(int((x-entry.x)*scale), preview_width-1)] += 1
+            alpha = bytes(min(255, 96 + int(159 * count / cells_per_pixel)) if count else 0 for count in counts)
+            pixels = b"".join(b"\0\0\0" + bytes((a,)) for a in alpha)
+        else:
+            y_axis, x_axis = getCoordinates(catalog, index)
+            rows = np.minimum((y_axis*scale).astype(np.int64), preview_height-1)
+            columns = np.minimum((x_axis*scale).astype(np.int64), preview_width-1)
+            counts = np.bincount(rows*preview_width + columns, minlength=preview_width*preview_height)
+            rgba = np.zeros((preview_width*preview_height, 4), np.uint8)
+            rgba[:, 3] = np.where(counts > 0, np.minimum(255, 96 + (159 * counts / cells_per_pixel).astype(np.int64)), 0)
+            pixels = rgba.tobytes()
+        scaled = pygame.image.frombytes(pixels, (preview_width, preview_height), "RGBA")
+    scaled_width, scaled_height = scaled.get_size()
+    preview.blit(scaled, (size//2-scaled_width//2, size//2-scaled_height//2))
+    return preview
+
+
+def loadPreview(catalog, index, size):  # Retourne l'aperçu de la structure depuis le cache, en le créant s'il n'y est pas encore
+    if not catalog.getEntry(index).population:
+        return None
+    file_path = path.join(CACHE_DIRECTORY, f"{catalog.getHash(index)}_{size}.png")
+    if path.exists(file_path):
+        try:
+            return pygame.image.load(file_path)
+        except pygame.error:  # Fichier abîmé : l'aperçu est recréé
+            pass
+    preview = createPreview(catalog, index, size)
+    makedirs(CACHE_DIRECTORY, exist_ok=True)
+    pygame.image.save(preview, file_path)
+    return preview
@@ -0,0 +1,226 @@
+"""
+Simulation multi-processus par tuiles pour le moteur à ensemble de cellules de main.py.
+
+La zone active est découpée en tuiles carrées de taille fixe. Les états de la génération courante et de la suivante
+sont 2 tableaux en mémoire partagée : chaque processus du pool calcule ses tuiles en lisant directement la bordure
+d'une cellule des tuiles voisines (le halo) dans le tableau partagé, puis les 2 tableaux sont échangés.
+Une tuile dort (n'est pas recalculée) tant qu'aucune tuile de son voisinage 3x3 n'a changé à la génération
+précédente : c'est le cas des tuiles vides et des tuiles stables. Les rangées de tuiles vides du bord sont retirées
+régulièrement (crop), pour que les planeurs qui s'échappent puis disparaissent n'agrandissent pas la grille indéfiniment.
+
+Mesure du passage à l'échelle de 1 à N processus sur une grande soupe aléatoire :
+python tiled.py --size 4096 --workers 1 2 4 8
+"""
+
+# Importation des librairies
+
+import numpy as np
+from multiprocessing import Pool, shared_memory, resource_tracker
+from os import cpu_count
+from weakref import finalize
+
+TILE_SIZE = 256  # Côté d'une tuile en cellules
+
+attached_memories = {}  # Mémoires partagées ouvertes par le processus, par nom
+
+
+def getSharedArray(name, shape):  # Retourne le tableau correspondant à la mémoire partagée, en l'ouvrant une seule fois par processus
+    memory = attached_memories.get(name)
+    if memory is None:
+        memory = shared_memory.SharedMemory(name=name)
+        attached_memories[name] = memory
+    return np.ndarray(shape, np.uint8, memory.buf)
+
+
+def stepTiles(task):  # Point d'entrée des processus du pool
+    current_name, next_name, shape, tiles = task
+    for name in list(attached_memories):  # Ferme les mémoires d'une grille qui a été agrandie depuis
+        if name != current_name and name != next_name:
+            attached_memories.pop(name).close()
+    return computeTiles(getSharedArray(current_name, shape), getSharedArray(next_name, shape), tiles)
+
+
+def computeTiles(current, following, tiles):  # Calcule la génération suivante des tuiles demandées, retourne pour chacune si elle a changé
+    changed = []
+    for ty, tx in tiles:
+        y0 = 1 + ty*TILE_SIZE
+        x0 = 1 + tx*TILE_SIZE
+        y1 = y0 + TILE_SIZE
+        x1 = x0 + TILE_SIZE
+        n = current[y0-1:y1-1, x0-1:x1-1] + current[y0-1:y1-1, x0:x1]  # Le halo est lu dans les tuiles voisines
+        n += current[y0-1:y1-1, x0+1:x1+1]
+        n += current[y0:y1, x0-1:x1-1]
+        n += current[y0:y1, x0+1:x1+1]
+        n += current[y0+1:y1+1, x0-1:x1-1]
+        n += current[y0+1:y1+1, x0:x1]
+        n += current[y0+1:y1+1, x0+1:x1+1]
+        tile = current[y0:y1, x0:x1]
+        result = (n == 3) | ((n == 2) & (tile == 1))
+        following[y0:y1, x0:x1] = result
+        changed.append(not np.array_equal(result, tile))
+    return changed
+
+
+def releaseMemories(memories):  # Libère les mémoires partagées de la grille
+    for memory in memories:
+        try:
+            memory.close()
+        except BufferError:  # Un tableau utilise encore la mémoire : elle sera fermée avec lui
+            pass
+        memory.unlink()
+
+
+class TiledGrid:  # Grille découpée en tuiles calculées par un pool de processus (même interface que dense.DenseGrid)
+
+    def __init__(self, living_cells, workers=None):
+        y_axis = np.fromiter((y for y, _ in living_cells), np.int64, len(living_cells))
+        x_axis = np.fromiter((x for _, x in living_cells), np.int64, len(living_cells))
+        if len(living_cells):  # Une rangée de tuiles vides entoure toujours les cellules vivantes
+            self.y = int(y_axis.min()) - TILE_SIZE
+            self.x = int(x_axis.min()) - TILE_SIZE
+            tiles_y = (int(y_axis.max()) - self.y) // TILE_SIZE + 2
+            tiles_x = (int(x_axis.max()) - self.x) // TILE_SIZE + 2
+        else:
+            self.y = self.x = -TILE_SIZE
+            tiles_y = tiles_x = 2
+        self.workers = workers or cpu_count() or 1
+        resource_tracker.ensure_running()  # Les processus du pool doivent partager le suivi des mémoires du processus principal
+        self.pool = Pool(self.workers)
+        self.memories = []
+        self.finalizer = None
+        self.computed_tiles = 0
+        self.allocate(tiles_y, tiles_x)
+        self.grids[0][1+y_axis-self.y, 1+x_axis-self.x] = 1
+        self.changed = np.ones((tiles_y, tiles_x), bool)
+
+    def allocate(self, tiles_y, tiles_x):  # Crée les 2 tableaux partagés (entourés d'un cadre vide d'une cellule)
+        shape = (tiles_y*TILE_SIZE + 2, tiles_x*TILE_SIZE + 2)
+        memories = [shared_memory.SharedMemory(create=True, size=shape[0]*shape[1]) for _ in range(2)]
+        grids = [np.ndarray(shape, np.uint8, memory.buf) for memory in memories]
+        for grid in grids:
+            grid.fill(0)
+        old_memories = self.memories
+        if self.finalizer is not None:
+            self.finalizer.detach()
+        self.memories = memories
+        self.grids = grids
+        self.shape = shape
+        self.finalizer = finalize(self, releaseMemories, memories)
+        return old_memories
+
+    def step(self):  # Simule une génération
+        self.fitBounds()
+        # Tuiles à calculer : celles dont le voisinage 3x3 a changé à la génération précédente
+        changed = np.pad(self.changed, 1)
+        active = np.zeros_like(self.changed)
+        for dy in range(3):
+            for dx in range(3):
+                active |= changed[dy:dy+self.changed.shape[0], dx:dx+self.changed.shape[1]]
+        tiles = list(zip(*(axis.tolist() for axis in np.nonzero(active))))
+        self.changed = np.zeros_like(self.changed)
+        self.computed_tiles = len(tiles)
+        if not tiles:
+            return
+        chunk = -(-len(tiles) // self.workers)
+        tasks = [(self.memories[0].name, self.memories[1].name, self.shape, tiles[i:i+chunk]) for i in range(0, len(tiles), chunk)]
+        if len(tasks) > 1:
+            results = self.pool.map(stepTiles, tasks)
+        else:  # Inutile de passer par le pool pour une seule tâche
+            results = [computeTiles(self.grids[0], self.grids[1], tiles)]
+        for task, task_changed in zip(tasks, results):
+            for (ty, tx), tile_changed in zip(task[3], task_changed):
+                self.changed[ty, tx] = tile_changed
+        # Les tuiles endormies sont identiques dans les 2 tableaux puisqu'elles n'ont pas changé à la génération précédente
+        self.memories.reverse()
+        self.grids.reverse()
+
+    def fitBounds(self):  # Ajoute une rangée de tuiles de chaque côté si la rangée du bord n'est plus vide
+        grid = self.grids[0]
+        if not (grid[1:1+TILE_SIZE].any() or grid[-1-TILE_SIZE:-1].any()
+                or grid[:, 1:1+TILE_SIZE].any() or grid[:, -1-TILE_SIZE:-1].any()):
+            return
+        tiles_y, tiles_x = self.changed.shape
+        old_grids = self.grids
+        old_memories = self.allocate(tiles_y+2, tiles_x+2)
+        for grid, old_grid in zip(self.grids, old_grids):
+            grid[1+TILE_SIZE:-1-TILE_SIZE, 1+TILE_SIZE:-1-TILE_SIZE] = old_grid[1:-1, 1:-1]
+        del grid, old_grid, old_grids
+        releaseMemories(old_memories)
+        self.changed = np.pad(self.changed, 1)
+        self.y -= TILE_SIZE
+        self.x -= TILE_SIZE
+
+    def population(self):  # Retourne le nombre de cellules vivantes
+        return int(np.count_nonzero(self.grids[0]))
+
+    def getArea(self):  # Retourne le nombre de cellules calculées à la dernière génération
+        return self.computed_tiles * TILE_SIZE**2
+
+    def crop(self):  # Retire les rangées de tuiles vides du bord en gardant une rangée vide autour des cellules vivantes
+        rows = np.flatnonzero(self.grids[0].any(axis=1))
+        if not len(rows):
+            return
+        columns = np.flatnonzero(self.grids[0].any(axis=0))
+        tiles_y, tiles_x = self.changed.shape
+        # Tuiles à garder (la cellule y du tableau, cadre compris, est dans la tuile (y-1) // TILE_SIZE)
+        ty0 = max(0, (int(rows[0])-1)//TILE_SIZE - 1)
+        ty1 = min(tiles_y, (int(rows[-1])-1)//TILE_SIZE + 2)
+        tx0 = max(0, (int(columns[0])-1)//TILE_SIZE - 1)
+        tx1 = min(tiles_x, (int(columns[-1])-1)//TILE_SIZE + 2)
+        if ty1-ty0 == tiles_y and tx1-tx0 == tiles_x:
+            return
+        old_grids = self.grids
+        old_memories = self.allocate(ty1-ty0, tx1-tx0)
+        for grid, old_grid in zip(self.grids, old_grids):
+            grid[1:-1, 1:-1] = old_grid[1+ty0*TILE_SIZE:1+ty1*TILE_SIZE, 1+tx0*TILE_SIZE:1+tx1*TILE_SIZE]
+        del grid, old_grid, old_grids
+        releaseMemories(old_memories)
+        self.changed = self.changed[ty0:ty1, tx0:tx1].copy()
+        self.y += ty0*TILE_SIZE
+        self.x += tx0*TILE_SIZE
+
+    def getDensity(self):
+        return 1
+
+    def getCoordinates(self):  # Retourne les tableaux des coordonnées y et x des cellules vivantes
+        y_axis, x_axis = np.nonzero(self.grids[0])
+        return y_axis+self.y-1, x_axis+self.x-1
+
+    def toCells(self, living_cells):  # Remplace le contenu de living_cells par les cellules vivantes de la grille
+        y_axis, x_axis = self.getCoordinates()
+        living_cells.clear()
+        living_cells.update(zip(y_axis.tolist(), x_axis.tolist()))
+
+    def close(self):  # Arrête le pool et libère la mémoire partagée
+        self.pool.terminate()
+        self.grids = []
+        self.finalizer()
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from time import perf_counter
+
+    parser = ArgumentParser(description="Passage à l'échelle de la simulation par tuiles sur une soupe aléatoire")
+    parser.add_argument("--size", type=int, default=4096, help="côté de la soupe en cellules")
+    parser.add_argument("--density", type=float, default=0.3, help="proportion de cellules vivantes")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    soup = np.random.default_rng(args.seed).random((args.size, args.size)) < args.density
+    y_axis, x_axis = np.nonzero(soup)
+    cells = set(zip(y_axis.tolist(), x_axis.tolist()))
+    reference = None
+    for workers in args.workers:
+        grid = TiledGrid(cells, workers)
+        start = perf_counter()
+        for _ in range(args.generations):
+            grid.step()
+        duration = perf_counter() - start
+        population = grid.population()
+        grid.close()
+        reference = reference or duration
+        print(f"{workers} processus : {args.generations/duration:.2f} gen/s, "
+              f"accélération x{reference/duration:.2f}, population {population}")